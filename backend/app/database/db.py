@@ -91,10 +91,15 @@ AsyncSessionLocal = SessionLocal
 try:
     from app.models.patient import Patient  # noqa: F401, E402
     from app.models.fax_file import FaxFile  # noqa: F401, E402
+    from app.models.fax_page import FaxPage  # noqa: F401, E402
     from app.models.provider import Provider  # noqa: F401, E402
     from app.models.consent import PatientConsent  # noqa: F401, E402
     # ProviderRequest is defined inside record_request.py, not separate
     from app.models.record_request import RecordRequest, ProviderRequest  # noqa: F401, E402
+    from app.models.unmatched_fax import UnmatchedFax  # noqa: F401, E402
+    from app.models.sync_cursor import SyncCursor  # noqa: F401, E402
+    from app.models.fax_outbox import FaxOutbox  # noqa: F401, E402
+    from app.models.job import Job  # noqa: F401, E402
 
     print("✅ Models imported successfully")
 except ImportError as e:
@@ -10,6 +10,7 @@ Medical records collection automation platform with:
 """
 
 import logging
+import os
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
@@ -17,6 +18,9 @@ from contextlib import asynccontextmanager
 
 # Import routers
 from app.routers import web, portal, humblefax
+from app.services.humblefax_client import close_client
+from app.services.job_queue import get_job_runner
+from app.services.maintenance import start_maintenance
 
 # Configure logging
 logging.basicConfig(
@@ -25,6 +29,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Consume background jobs in the web process too. Off by default: run
+# `python -m app.worker` so OCR never competes with web requests.
+RUN_JOBS_IN_WEB = os.getenv("RUN_JOBS_IN_WEB", "false").lower() in ("1", "true", "yes")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -33,12 +41,29 @@ async def lifespan(app: FastAPI):
     """
     # Startup
     logger.info("🚀 Starting Veritas One application...")
+
+    # Fax pipeline (ingest, sends, polling, outbox): here only in
+    # single-process mode, otherwise the worker (python -m app.worker) does
+    # all of this
+    pipeline_tasks = []
+    if RUN_JOBS_IN_WEB:
+        pipeline_tasks = start_maintenance()
+
+        # Run durable background jobs (inbound fax ingest, re-matching, sends)
+        await get_job_runner().start()
+    else:
+        logger.info("ℹ️ Background jobs are consumed by `python -m app.worker` (RUN_JOBS_IN_WEB=false)")
+
     logger.info("✅ Application started successfully")
 
     yield
 
     # Shutdown
     logger.info("👋 Shutting down Veritas One application...")
+    for task in pipeline_tasks:
+        task.cancel()
+    await get_job_runner().stop()
+    await close_client()
 
 
 # Create FastAPI app
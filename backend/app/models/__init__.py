@@ -1,14 +1,24 @@
 from .patient import Patient
 from .fax_file import FaxFile
+from .fax_page import FaxPage
 from .provider import Provider
 from .consent import PatientConsent
 from .record_request import RecordRequest, ProviderRequest
+from .unmatched_fax import UnmatchedFax
+from .sync_cursor import SyncCursor
+from .fax_outbox import FaxOutbox
+from .job import Job
 
 __all__ = [
     "Patient",
     "FaxFile",
+    "FaxPage",
     "Provider",
     "PatientConsent",
     "RecordRequest",
     "ProviderRequest",
+    "UnmatchedFax",
+    "SyncCursor",
+    "FaxOutbox",
+    "Job",
 ]
@@ -7,8 +7,8 @@ Changes:
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary, Text, Date
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary, Text, Date, Index
+from sqlalchemy.orm import relationship, deferred
 from app.database.db import Base
 
 
@@ -19,15 +19,21 @@ class FaxFile(Base):
     Attributes:
         id: Primary key
         patient_id: Foreign key to Patient
-        job_id: iFax job identifier
+        job_id: HumbleFax fax identifier (unique; webhook/reconciler inserts
+            are idempotent on it)
         transaction_id: iFax transaction identifier
         sender: Fax number of sender (healthcare provider)
         receiver: Fax number of receiver (our service)
         received_time: When fax was received
         file_path: Path to PDF file on disk
-        pdf_data: Binary PDF data
+        pdf_data: Binary PDF data (legacy rows only; new faxes live on disk)
+        pdf_sha256: SHA-256 hex digest of the PDF at file_path
         ocr_text: Extracted text from OCR processing
         encounter_date: Date when medical services were provided (NEW)
+        parsed_first_name: Patient first name as parsed from the OCR text
+        parsed_last_name: Patient last name as parsed from the OCR text
+        parsed_dob: Patient date of birth as parsed from the OCR text
+        processing_stage: Pipeline stage reached (received|acquired|processed|failed)
 
     The encounter_date field stores the "Date of Service", "Visit Date", etc.
     extracted from the medical record. This is used for chronological ordering
@@ -43,7 +49,10 @@ class FaxFile(Base):
     receiver = Column(String, nullable=True)
     received_time = Column(DateTime, default=datetime.utcnow)
     file_path = Column(String, nullable=True)
-    pdf_data = Column(LargeBinary, nullable=True)
+    # Legacy: PDFs used to be stored in the row as well as on disk. Deferred
+    # so listing faxes never loads them; new faxes only set file_path.
+    pdf_data = deferred(Column(LargeBinary, nullable=True))
+    pdf_sha256 = Column(String(64), nullable=True)
     ocr_text = Column(Text, nullable=True)
 
     # NEW: Date of clinical encounter (when services were provided)
@@ -51,8 +60,25 @@ class FaxFile(Base):
     # Used for chronological ordering when compiling records
     encounter_date = Column(Date, nullable=True)
 
+    # Patient identity as parsed from the OCR text. Persisted so parser
+    # improvements can be re-applied with backfill_parsed_fields.py
+    # without re-running OCR.
+    parsed_first_name = Column(String, nullable=True)
+    parsed_last_name = Column(String, nullable=True)
+    parsed_dob = Column(Date, nullable=True)
+
+    # Inbound pipeline checkpoint. "acquired" means the PDF is stored and
+    # OCR text is saved; faxes left in received/acquired are resumed.
+    processing_stage = Column(String, nullable=True, default="received", index=True)
+
     patient = relationship("Patient", backref="faxes")
 
+    __table_args__ = (
+        # One row per HumbleFax fax: webhook retries and the reconciler
+        # insert with ON CONFLICT (job_id) DO NOTHING. NULLs do not conflict.
+        Index("ix_fax_files_job_id", "job_id", unique=True),
+    )
+
     def __repr__(self):
         return (
             f"<FaxFile(id={self.id}, patient_id={self.patient_id}, "
@@ -0,0 +1,27 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from app.database.db import Base
+
+
+class FaxOutbox(Base):
+    """
+    Outbound sends parked while HumbleFax is unavailable.
+
+    A provider request whose send failed transiently (circuit open,
+    connection errors, 5xx before the fax was sent) goes back to "queued"
+    and gets a row here instead of being marked fax_failed. The outbox
+    drainer queues send jobs for it at a controlled rate once health checks
+    pass, least recently tried first; the row is deleted once the send is
+    resolved (sent, failed for good, or skipped).
+    """
+    __tablename__ = "fax_outbox"
+
+    id = Column(Integer, primary_key=True)
+    provider_request_id = Column(Integer, ForeignKey("provider_requests.id"), nullable=False, unique=True)
+    reason = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    provider_request = relationship("ProviderRequest")
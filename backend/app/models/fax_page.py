@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from app.database.db import Base
+
+
+class FaxPage(Base):
+    """
+    Page-level document-type index for received faxes.
+
+    One row per OCR page, labeled at ingest by app.services.page_classifier
+    (lab|imaging|notes|discharge|billing|other). page_number is 1-based and
+    matches the page in FaxFile.file_path.
+    """
+    __tablename__ = "fax_pages"
+    __table_args__ = (
+        Index("ix_fax_pages_doc_type_fax_file_id", "doc_type", "fax_file_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    fax_file_id = Column(Integer, ForeignKey("fax_files.id"), nullable=False, index=True)
+    page_number = Column(Integer, nullable=False)
+    doc_type = Column(String, nullable=False)
+    score = Column(Float, nullable=True)
+
+    fax_file = relationship("FaxFile", backref="pages")
@@ -0,0 +1,51 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index, text
+from app.database.db import Base
+
+
+# Unfinished jobs, for the partial dedupe index (matches job_queue.OPEN_STATES)
+JOB_OPEN_CONDITION = "state IN ('queued', 'running')"
+
+
+class Job(Base):
+    """
+    Durable background job (see app.services.job_queue).
+
+    state moves queued -> running -> done, or back to queued with a later
+    run_after when an attempt fails, or to dead once max_attempts is used
+    up. A running job is owned by leased_by until lease_expires_at; a job
+    whose lease lapses (worker crashed or was redeployed) is claimed again.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    # Enqueueing is skipped while an unfinished job of the kind has the same key
+    dedupe_key = Column(String, nullable=True)
+    state = Column(String, nullable=False, default="queued")
+    # Higher runs first
+    priority = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    leased_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Dequeue: next runnable job by state, priority and age
+        Index("ix_jobs_state_priority_run_after", "state", "priority", "run_after"),
+        # Lease recovery: running jobs whose lease has lapsed
+        Index("ix_jobs_state_lease_expires_at", "state", "lease_expires_at"),
+        # At most one unfinished job per dedupe key (enqueue_job conflicts on it)
+        Index(
+            "ix_jobs_kind_dedupe_key_open", "kind", "dedupe_key",
+            unique=True,
+            postgresql_where=text(JOB_OPEN_CONDITION),
+            sqlite_where=text(JOB_OPEN_CONDITION),
+        ),
+    )
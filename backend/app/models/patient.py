@@ -1,8 +1,10 @@
 import uuid
 from sqlalchemy import Column, String, Integer, Date, DateTime
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import validates
 from sqlalchemy.sql import func
 from app.database.db import Base
+from app.utils.parsing import phonetic_key
 
 class Patient(Base):
     __tablename__ = "patients"
@@ -11,7 +13,13 @@ class Patient(Base):
     uuid = Column(UUID(as_uuid=True), unique=True, nullable=False, default=uuid.uuid4)
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
+    last_name_key = Column(String(4), index=True, nullable=True)  # Soundex of last_name, for fax matching
     email = Column(String, nullable=True)
     phone = Column(String, nullable=True)
-    date_of_birth = Column(Date, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    date_of_birth = Column(Date, index=True, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    @validates("last_name")
+    def _set_last_name_key(self, key, value):
+        self.last_name_key = phonetic_key(value)
+        return value
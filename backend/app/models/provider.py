@@ -1,6 +1,8 @@
 from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.orm import validates
 from sqlalchemy.sql import func
 from app.database.db import Base
+from app.utils.parsing import normalize_phone_number
 
 class Provider(Base):
     __tablename__ = "providers"
@@ -16,6 +18,12 @@ class Provider(Base):
     postal_code = Column(String, nullable=True)
     phone = Column(String, nullable=True)
     fax = Column(String, nullable=True)
+    fax_key = Column(String(10), index=True, nullable=True)  # last 10 digits of fax, for sender routing
     source = Column(String, nullable=True)
     last_verified_at = Column(DateTime(timezone=True), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    @validates("fax")
+    def _set_fax_key(self, key, value):
+        self.fax_key = normalize_phone_number(value)
+        return value
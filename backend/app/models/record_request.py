@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from app.database.db import Base
+from app.utils.parsing import normalize_phone_number
 
 class RecordRequest(Base):
     __tablename__ = "record_requests"
@@ -14,6 +15,9 @@ class RecordRequest(Base):
     requested_providers_json = Column(Text, nullable=True)  # JSON of manual providers
     release_pdf_path = Column(String, nullable=False)
     compiled_pdf_path = Column(String, nullable=True)
+    # Provider request counters, maintained by app.services.request_progress
+    outstanding_count = Column(Integer, nullable=False, default=0, server_default="0")
+    terminal_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
 
@@ -22,21 +26,35 @@ class RecordRequest(Base):
 
 class ProviderRequest(Base):
     __tablename__ = "provider_requests"
+    __table_args__ = (
+        # Sender routing: open provider requests by inbound fax number
+        Index("ix_provider_requests_fax_key_status", "fax_key", "status"),
+        # Outbound status poller: stale fax_sent rows by send time
+        Index("ix_provider_requests_status_sent_at", "status", "sent_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     record_request_id = Column(Integer, ForeignKey("record_requests.id"), nullable=False)
     provider_id = Column(Integer, ForeignKey("providers.id"), nullable=True)
     fax_number_used = Column(String, nullable=True)
+    fax_key = Column(String(10), nullable=True)  # last 10 digits of fax_number_used
 
-    status = Column(String, nullable=False, default="queued")  # queued|fax_sent|fax_delivered|fax_failed|response_received
+    status = Column(String, nullable=False, default="queued")  # queued|sending|fax_sent|fax_delivered|fax_failed|response_received
+    send_started_at = Column(DateTime(timezone=True), nullable=True)  # when a send job claimed the row, refreshed while the send is in flight
     outbound_job_id = Column(String, nullable=True)
     outbound_transaction_id = Column(String, nullable=True)
     sent_at = Column(DateTime(timezone=True), nullable=True)
     delivered_at = Column(DateTime(timezone=True), nullable=True)
     failed_reason = Column(Text, nullable=True)
+    status_checked_at = Column(DateTime(timezone=True), nullable=True)  # last outbound status poll
 
     inbound_fax_id = Column(Integer, ForeignKey("fax_files.id"), nullable=True)
     responded_at = Column(DateTime(timezone=True), nullable=True)
 
     record_request = relationship("RecordRequest", backref="provider_requests")
-    provider = relationship("Provider", backref="requests")
\ No newline at end of file
+    provider = relationship("Provider", backref="requests")
+
+    @validates("fax_number_used")
+    def _set_fax_key(self, key, value):
+        self.fax_key = normalize_phone_number(value)
+        return value
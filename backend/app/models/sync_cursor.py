@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime
+from app.database.db import Base
+
+
+class SyncCursor(Base):
+    """
+    Persisted high-watermark for an incremental sync against an external API.
+
+    One row per sync (e.g. "humblefax_incoming"). watermark is the end of
+    the last time window that was fully fetched and reconciled; the next run
+    resumes from there.
+    """
+    __tablename__ = "sync_cursors"
+
+    name = Column(String, primary_key=True)
+    watermark = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from app.database.db import Base
+
+
+class UnmatchedFax(Base):
+    """
+    Re-match queue of processed faxes that could not be linked to a patient.
+
+    Keyed by the fax's persisted parsed identity (DOB, Soundex of the parsed
+    last name) and the sender's 10-digit fax key, so a new registration or
+    record request only re-matches the faxes its own keys can explain.
+    Rows are removed once the fax is matched.
+    """
+    __tablename__ = "unmatched_faxes"
+
+    id = Column(Integer, primary_key=True)
+    fax_file_id = Column(Integer, ForeignKey("fax_files.id"), nullable=False, unique=True)
+    parsed_dob = Column(Date, index=True, nullable=True)
+    last_name_key = Column(String(4), index=True, nullable=True)
+    sender_fax_key = Column(String(10), index=True, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    fax_file = relationship("FaxFile")
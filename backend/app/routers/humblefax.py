@@ -5,22 +5,28 @@ Handles incoming and outbound fax webhooks from HumbleFax service.
 Integrated with OCR processing and patient matching.
 """
 
+import asyncio
 import logging
 import os
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import select, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database.db import get_db, get_async_session_context
 from app.models.fax_file import FaxFile
+from app.models.job import Job
 from app.models.record_request import ProviderRequest, RecordRequest
-from app.services.humblefax_service import download_incoming_fax
+from app.services.humblefax_client import get_client, delivery_status, format_fax_number, validate_fax_number
+from app.services.cpu_pool import run_cpu_bound
 from app.services.ocr_service import extract_text_from_pdf
 from app.services.fax_processor import IncomingFaxProcessor
+from app.services.fax_reconciler import insert_fax_files, reconcile_incoming_faxes
+from app.services.job_queue import enqueue_job, get_job_runner, job_handler, OPEN_STATES
+from app.services.request_progress import transition_provider_requests
 
 logger = logging.getLogger(__name__)
 
@@ -78,6 +84,9 @@ class HumbleFaxOutboundPayload(BaseModel):
     status: str
     completedAt: Optional[str] = None
     error: Optional[str] = None
+    # Identify one recipient of a multi-recipient fax
+    recipientId: Optional[str] = None
+    toNumber: Optional[str] = None
 
     class Config:
         extra = "allow"
@@ -87,6 +96,110 @@ class HumbleFaxOutboundPayload(BaseModel):
 # BACKGROUND PROCESSING - COMPLETE PIPELINE
 # ============================================================================
 
+# FaxFile.processing_stage values for the inbound pipeline
+STAGE_RECEIVED = "received"
+STAGE_ACQUIRED = "acquired"
+STAGE_FAILED = "failed"
+RESUMABLE_STAGES = [STAGE_RECEIVED, STAGE_ACQUIRED]
+
+# Acquired faxes matched per process_many call when resuming
+RESUME_BATCH_SIZE = 200
+
+# Seconds between inbound reconciliation runs (missed-webhook safety net)
+RECONCILE_INTERVAL = int(os.getenv("FAX_RECONCILE_INTERVAL", "600"))
+
+INGEST_JOB = "ingest_fax"
+
+# ProviderRequest statuses an in-progress ("sent") callback may move to fax_sent
+PRE_DELIVERY_STATUSES = ("queued", "sending", "fax_sent")
+
+# Ingest runs ahead of other jobs
+INGEST_PRIORITY = 10
+
+
+class IngestRetry(Exception):
+    """Transient ingest failure; the ingest job is retried with backoff."""
+
+
+def _ingest_key(fax_record_id: int) -> str:
+    return f"{INGEST_JOB}:{fax_record_id}"
+
+
+async def enqueue_ingest(db: AsyncSession, fax_id: str, fax_record_id: int) -> Optional[int]:
+    """Queue the inbound pipeline for one fax; the caller commits."""
+    return await enqueue_job(
+        db, INGEST_JOB,
+        {"fax_id": fax_id, "fax_record_id": fax_record_id},
+        priority=INGEST_PRIORITY,
+        dedupe_key=_ingest_key(fax_record_id),
+    )
+
+
+async def _acquire_fax(fax_id: str, fax: FaxFile) -> bool:
+    """
+    Stage group 1: download the PDF, save it to disk and run OCR.
+
+    Only sets attributes on the fax; the caller commits once for the whole
+    group. Every step is skipped when its output is already present, so a
+    resumed fax does not repeat work.
+
+    Returns:
+        True if the fax now has a stored PDF and OCR text, False if it
+        never will (e.g. HumbleFax has no such fax, or OCR found no text)
+
+    Raises:
+        IngestRetry: the download failed for a transient reason
+        Exception: OCR raised; both leave the fax "received" for a retry
+    """
+    # ================================================================
+    # STEP 1: Download PDF from HumbleFax
+    # ================================================================
+    if not fax.file_path or not os.path.exists(fax.file_path):
+        logger.info("📥 Downloading PDF from HumbleFax...")
+
+        download_result = await get_client().download_incoming_fax(fax_id)
+
+        if not download_result.success:
+            logger.error(
+                f"❌ Failed to download PDF: "
+                f"{download_result.message or 'Unknown error'}"
+            )
+            if download_result.retryable:
+                raise IngestRetry(f"Download failed: {download_result.message}")
+            fax.ocr_text = f"[ERROR: Failed to download PDF - {download_result.message}]"
+            return False
+
+        # Only the location and digest are stored, never the PDF bytes
+        fax.file_path = download_result.file_path
+        fax.pdf_sha256 = download_result.sha256
+
+        logger.info(
+            f"✅ Downloaded PDF: {download_result.size} bytes, "
+            f"saved to {fax.file_path} (sha256 {fax.pdf_sha256[:12]}…)"
+        )
+
+    # ================================================================
+    # STEP 2: Run OCR with proper error handling
+    # ================================================================
+    if not fax.ocr_text or fax.ocr_text.startswith("[ERROR:"):
+        logger.info("📄 Running OCR on PDF...")
+        # Off the event loop: in the worker's OCR process pool
+        ocr_text = await run_cpu_bound(extract_text_from_pdf, fax.file_path)
+
+        if not ocr_text or len(ocr_text.strip()) == 0:
+            logger.error("❌ OCR returned empty text")
+            logger.error(f"PDF file exists: {os.path.exists(fax.file_path)}")
+            logger.error(f"PDF file size: {os.path.getsize(fax.file_path)} bytes")
+            fax.ocr_text = "[OCR FAILED - Empty result]"
+            return False
+
+        fax.ocr_text = ocr_text
+        logger.info(f"✅ OCR complete: {len(ocr_text)} characters extracted")
+        logger.debug(f"OCR text preview: {ocr_text[:200]}...")
+
+    return True
+
+
 async def process_incoming_fax_background(
         fax_id: str,
         fax_record_id: int
@@ -94,128 +207,167 @@ async def process_incoming_fax_background(
     """
     Background task for processing incoming fax from HumbleFax.
 
-    Complete pipeline:
-    1. Download PDF from HumbleFax
-    2. Save to filesystem
-    3. Run OCR (with proper error handling)
-    4. Parse encounter date
-    5. Match patient (name + DOB)
-    6. Match provider request
-    7. Check if request is complete
+    Runs in two stage groups, each committed once:
+    1. Acquire: download PDF, save to filesystem, run OCR
+       -> processing_stage "acquired" (or "failed")
+    2. Process (IncomingFaxProcessor): page index, patient match,
+       encounter date, provider request match, completion check
+       -> processing_stage "processed"
+
+    The stage is read on entry, so calling this again for a fax that was
+    interrupted resumes at the first unfinished group. Runs as the ingest
+    job: transient download errors, OCR errors and processing errors
+    propagate with the fax left at its stage, so the job backs off and
+    retries; once the job is dead-lettered _ingest_fax_dead marks the fax
+    "failed". Failures that retrying cannot fix mark it "failed" at once.
     """
     logger.info(f"🔄 Background processing started: FaxFile #{fax_record_id}")
 
-    try:
-        async with get_async_session_context() as db:
-            # Get the fax record
-            result = await db.execute(
-                select(FaxFile).where(FaxFile.id == fax_record_id)
+    async with get_async_session_context() as db:
+        # Get the fax record
+        result = await db.execute(
+            select(FaxFile).where(FaxFile.id == fax_record_id)
+        )
+        fax = result.scalar_one_or_none()
+
+        if not fax:
+            logger.error(f"❌ FaxFile {fax_record_id} not found in database")
+            return
+
+        if fax.processing_stage not in RESUMABLE_STAGES:
+            logger.info(
+                f"ℹ️ FaxFile #{fax_record_id} already at stage "
+                f"'{fax.processing_stage}', nothing to do"
             )
-            fax = result.scalar_one_or_none()
+            return
+
+        # ================================================================
+        # STAGE GROUP 1: Acquire PDF and OCR text
+        # ================================================================
+        if fax.processing_stage == STAGE_RECEIVED:
+            acquired = await _acquire_fax(fax_id, fax)
+            fax.processing_stage = STAGE_ACQUIRED if acquired else STAGE_FAILED
+            await db.commit()
 
-            if not fax:
-                logger.error(f"❌ FaxFile {fax_record_id} not found in database")
+            if not acquired:
                 return
 
-            # ================================================================
-            # STEP 1: Download PDF from HumbleFax
-            # ================================================================
-            if not fax.pdf_data or len(fax.pdf_data) == 0:
-                logger.info("📥 Downloading PDF from HumbleFax...")
-
-                download_result = download_incoming_fax(fax_id, save_to_disk=True)
-
-                if download_result["success"]:
-                    fax.pdf_data = download_result["pdf_bytes"]
-                    if "file_path" in download_result:
-                        fax.file_path = download_result["file_path"]
-                    await db.commit()
-
-                    logger.info(
-                        f"✅ Downloaded PDF: {len(fax.pdf_data)} bytes, "
-                        f"saved to {fax.file_path}"
-                    )
-                else:
-                    logger.error(
-                        f"❌ Failed to download PDF: "
-                        f"{download_result.get('message', 'Unknown error')}"
-                    )
-                    fax.ocr_text = f"[ERROR: Failed to download PDF - {download_result.get('message')}]"
-                    await db.commit()
-                    return
-
-            # Ensure file is saved to filesystem
-            if fax.pdf_data and not fax.file_path:
-                logger.info("💾 Saving PDF to filesystem...")
-                try:
-                    out_dir = "received_faxes"
-                    os.makedirs(out_dir, exist_ok=True)
-                    file_path = os.path.join(out_dir, f"{fax_id}.pdf")
-
-                    with open(file_path, "wb") as f:
-                        f.write(fax.pdf_data)
-
-                    fax.file_path = file_path
-                    await db.commit()
-                    logger.info(f"✅ Saved PDF to filesystem: {file_path}")
-                except Exception as e:
-                    logger.error(f"❌ Error saving PDF: {e}")
-
-            # ================================================================
-            # STEP 2: Run OCR with proper error handling
-            # ================================================================
-            if not fax.ocr_text or fax.ocr_text.startswith("[ERROR:"):
-                logger.info("📄 Running OCR on PDF...")
-                try:
-                    ocr_text = extract_text_from_pdf(fax.file_path)
-
-                    if not ocr_text or len(ocr_text.strip()) == 0:
-                        logger.error("❌ OCR returned empty text")
-                        logger.error(f"PDF file exists: {os.path.exists(fax.file_path)}")
-                        logger.error(f"PDF file size: {os.path.getsize(fax.file_path)} bytes")
-                        fax.ocr_text = "[OCR FAILED - Empty result]"
-                        await db.commit()
-                        return
-
-                    fax.ocr_text = ocr_text
-                    await db.commit()
-                    logger.info(f"✅ OCR complete: {len(ocr_text)} characters extracted")
-                    logger.debug(f"OCR text preview: {ocr_text[:200]}...")
-
-                except Exception as e:
-                    logger.error(f"❌ OCR failed: {e}", exc_info=True)
-                    fax.ocr_text = f"[OCR ERROR: {str(e)}]"
-                    await db.commit()
-                    return
-
-            # ================================================================
-            # STEP 3-6: Process with IncomingFaxProcessor
-            # This handles:
-            # - Parsing encounter date
-            # - Matching to patient
-            # - Matching to provider requests
-            # ================================================================
-            logger.info("🔍 Processing fax content (patient matching, date parsing, provider matching)...")
-            try:
-                processor = IncomingFaxProcessor(db)
-                success = await processor.process_incoming_fax(
-                    job_id=fax_id,
-                    fax_file=fax
-                )
+        # ================================================================
+        # STAGE GROUP 2: Process with IncomingFaxProcessor
+        # This handles:
+        # - Parsing encounter date
+        # - Matching to patient
+        # - Matching to provider requests
+        # ================================================================
+        logger.info("🔍 Processing fax content (patient matching, date parsing, provider matching)...")
+        processor = IncomingFaxProcessor(db)
+        success = await processor.process_incoming_fax(
+            job_id=fax_id,
+            fax_file=fax
+        )
+
+        if success:
+            logger.info("✅ Fax processing complete - patient matched and linked")
+        else:
+            logger.warning("⚠️ Fax processing completed but patient matching may have failed")
+
+        logger.info(f"✅ Background processing complete: FaxFile #{fax_record_id}")
+
+
+async def _ingest_fax_dead(payload: dict, error: str) -> None:
+    """Out of retries: park the fax as "failed" so it is no longer resumed."""
+    async with get_async_session_context() as db:
+        fax = await db.get(FaxFile, payload["fax_record_id"])
+        if fax is None or fax.processing_stage not in RESUMABLE_STAGES:
+            return
+        fax.processing_stage = STAGE_FAILED
+        if not fax.ocr_text or fax.ocr_text.startswith("[ERROR:"):
+            fax.ocr_text = f"[ERROR: Ingest gave up - {error[:500]}]"
+        await db.commit()
+    logger.error(f"❌ FaxFile #{payload['fax_record_id']} marked failed: {error}")
+
+
+@job_handler(INGEST_JOB, on_dead=_ingest_fax_dead)
+async def _ingest_fax_job(payload: dict) -> None:
+    await process_incoming_fax_background(payload["fax_id"], payload["fax_record_id"])
+
+
+async def resume_incomplete_faxes(batch_size: int = RESUME_BATCH_SIZE) -> int:
+    """
+    Re-run the pipeline for faxes left in a resumable stage (e.g. after a
+    crash, restart or outage).
+
+    Faxes that still have an unfinished ingest job are left to it. Faxes
+    still "received" need their download and OCR, so they get an ingest
+    job; "acquired" faxes are matched in batches with process_many. If a
+    batch fails its faxes get ingest jobs instead, so they are retried
+    with backoff rather than waiting for the next restart.
 
-                if success:
-                    logger.info("✅ Fax processing complete - patient matched and linked")
-                else:
-                    logger.warning("⚠️ Fax processing completed but patient matching may have failed")
+    Returns:
+        Number of faxes resumed
+    """
+    async with get_async_session_context() as db:
+        result = await db.execute(
+            select(Job.dedupe_key).where(Job.kind == INGEST_JOB, Job.state.in_(OPEN_STATES))
+        )
+        in_queue = set(result.scalars().all())
+
+        result = await db.execute(
+            select(FaxFile.id, FaxFile.job_id, FaxFile.processing_stage)
+            .where(FaxFile.processing_stage.in_(RESUMABLE_STAGES))
+            .order_by(FaxFile.id)
+        )
+        pending = [row for row in result.all() if _ingest_key(row[0]) not in in_queue]
+
+        for fax_record_id, job_id, stage in pending:
+            if stage == STAGE_RECEIVED:
+                await enqueue_ingest(db, job_id, fax_record_id)
+        await db.commit()
+    get_job_runner().wake()
 
+    acquired = [fax_record_id for fax_record_id, _, stage in pending if stage == STAGE_ACQUIRED]
+    job_ids = {fax_record_id: job_id for fax_record_id, job_id, _ in pending}
+    for i in range(0, len(acquired), batch_size):
+        batch = acquired[i:i + batch_size]
+        async with get_async_session_context() as db:
+            try:
+                await IncomingFaxProcessor(db).process_many(batch)
             except Exception as e:
-                logger.error(f"❌ Error in fax processor: {str(e)}", exc_info=True)
-                # Don't return - continue to mark as complete
+                logger.warning(f"⚠️ Resume batch of {len(batch)} fax(es) failed ({e}); queueing ingest jobs")
+                for fax_record_id in batch:
+                    await enqueue_ingest(db, job_ids[fax_record_id], fax_record_id)
+                await db.commit()
+                get_job_runner().wake()
 
-            logger.info(f"✅ Background processing complete: FaxFile #{fax_record_id}")
+    if pending:
+        logger.info(f"♻️ Resumed {len(pending)} incomplete fax(es)")
+    return len(pending)
 
-    except Exception as e:
-        logger.exception(f"❌ Fatal error in background processing: {e}")
+
+async def _enqueue_ingests(db: AsyncSession, inserted) -> None:
+    """Ingest jobs for reconciled faxes, in the reconciler's transaction."""
+    for fax_record_id, job_id in inserted:
+        await enqueue_ingest(db, job_id, fax_record_id)
+
+
+async def run_inbound_reconciler(interval: int = RECONCILE_INTERVAL) -> None:
+    """
+    Periodically pick up incoming faxes whose webhook never arrived and
+    queue them for the same ingest job as webhook deliveries.
+    """
+    if not get_client().auth:
+        logger.info("ℹ️ HumbleFax credentials not configured; inbound reconciler disabled")
+        return
+
+    while True:
+        try:
+            inserted = await reconcile_incoming_faxes(_enqueue_ingests)
+            if inserted:
+                get_job_runner().wake()
+        except Exception as e:
+            logger.exception(f"❌ Inbound reconciliation failed: {e}")
+
+        await asyncio.sleep(interval)
 
 
 # ============================================================================
@@ -225,7 +377,6 @@ async def process_incoming_fax_background(
 @router.post("/receive")
 async def receive_fax_webhook(
         request: Request,
-        background_tasks: BackgroundTasks,
         db: AsyncSession = Depends(get_db)
 ):
     """
@@ -273,27 +424,6 @@ async def receive_fax_webhook(
     # Extract fax data
     fax_id = str(fax_data.id)
 
-    # Check for duplicate faxes (idempotency)
-    try:
-        result = await db.execute(
-            select(FaxFile).where(FaxFile.job_id == fax_id)
-        )
-        existing_fax = result.scalar_one_or_none()
-
-        if existing_fax:
-            logger.warning(
-                f"⚠️ Duplicate fax webhook: {fax_id} "
-                f"(already processed as FaxFile #{existing_fax.id})"
-            )
-            return {
-                "status": "duplicate",
-                "message": "Fax already processed",
-                "fax_id": existing_fax.id,
-                "humblefax_id": fax_id
-            }
-    except Exception as e:
-        logger.error(f"❌ Error checking for duplicates: {e}")
-
     # Parse received time
     received_time = datetime.utcnow()
     if fax_data.time:
@@ -303,26 +433,28 @@ async def receive_fax_webhook(
         except Exception as e:
             logger.warning(f"Could not parse time: {e}")
 
-    # Create FaxFile record immediately
+    # The ack is two INSERTs and a commit. The FaxFile row is inserted with
+    # INSERT ... ON CONFLICT (job_id) DO NOTHING, so concurrent retries of
+    # the same webhook race on the unique index and exactly one of them
+    # inserts. Only that one adds the ingest job, which is new by
+    # construction (enqueue_job is a single INSERT with no lookup).
     try:
-        fax = FaxFile(
+        inserted = await insert_fax_files(db, [dict(
             job_id=fax_id,
             transaction_id=fax_id,
             sender=fax_data.fromNumber or "",
             receiver=fax_data.toNumber or "",
             received_time=received_time,
             file_path="",
-            pdf_data=b"",
-            ocr_text=""
-        )
-        db.add(fax)
+            ocr_text="",
+            processing_stage=STAGE_RECEIVED
+        )])
+        if inserted:
+            fax_file_id = inserted[0][0]
+            # Committed together with the row, so the fax can never be
+            # stored without its ingest job
+            await enqueue_ingest(db, fax_id, fax_file_id)
         await db.commit()
-        await db.refresh(fax)
-
-        logger.info(
-            f"✅ Created FaxFile record: "
-            f"ID={fax.id}, HumbleFaxID={fax_id}"
-        )
     except Exception as e:
         await db.rollback()
         logger.exception(f"❌ Failed to create FaxFile record: {e}")
@@ -331,23 +463,40 @@ async def receive_fax_webhook(
             detail=f"Database error: {str(e)}"
         )
 
-    # Queue background processing
-    background_tasks.add_task(
-        process_incoming_fax_background,
-        fax_id=fax_id,
-        fax_record_id=fax.id
+    if not inserted:
+        # Duplicate delivery: only this path pays for the lookup
+        existing_id = (await db.execute(
+            select(FaxFile.id).where(FaxFile.job_id == fax_id)
+        )).scalar_one_or_none()
+        logger.warning(
+            f"⚠️ Duplicate fax webhook: {fax_id} "
+            f"(already processed as FaxFile #{existing_id})"
+        )
+        return {
+            "status": "duplicate",
+            "message": "Fax already processed",
+            "fax_id": existing_id,
+            "humblefax_id": fax_id
+        }
+
+    logger.info(
+        f"✅ Created FaxFile record: "
+        f"ID={fax_file_id}, HumbleFaxID={fax_id}"
     )
 
+    # Run it now if this process consumes jobs; otherwise a worker polls for it
+    get_job_runner().wake()
+
     logger.info(
         f"✅ Queued background processing: "
-        f"FaxFile #{fax.id}, HumbleFaxID={fax_id}"
+        f"FaxFile #{fax_file_id}, HumbleFaxID={fax_id}"
     )
     logger.info("=" * 80)
 
     return {
         "status": "accepted",
         "message": "Fax received and queued for processing",
-        "fax_id": fax.id,
+        "fax_id": fax_file_id,
         "humblefax_id": fax_id
     }
 
@@ -356,6 +505,27 @@ async def receive_fax_webhook(
 # WEBHOOK ENDPOINT - OUTBOUND STATUS UPDATES
 # ============================================================================
 
+def _match_recipient(provider_requests, payload: HumbleFaxOutboundPayload):
+    """
+    Narrow a batched fax's provider requests to the recipient the callback
+    is about; a callback without recipient details applies to all of them.
+    """
+    if len(provider_requests) <= 1:
+        return provider_requests
+
+    if payload.recipientId:
+        return [pr for pr in provider_requests if pr.outbound_transaction_id == payload.recipientId]
+
+    if payload.toNumber and validate_fax_number(payload.toNumber):
+        number = format_fax_number(payload.toNumber)
+        return [
+            pr for pr in provider_requests
+            if validate_fax_number(pr.fax_number_used) and format_fax_number(pr.fax_number_used) == number
+        ]
+
+    return provider_requests
+
+
 @router.post("/outbound-status")
 async def outbound_status_webhook(
         request: Request,
@@ -383,14 +553,18 @@ async def outbound_status_webhook(
         logger.error(f"❌ Error parsing payload: {e}")
         raise HTTPException(status_code=400, detail=f"Failed to parse payload: {str(e)}")
 
-    # Find the provider request by outbound_job_id
+    # Find the provider request(s) by job ID; a batched multi-recipient
+    # fax shares one job ID across all of its provider requests
     try:
         result = await db.execute(
-            select(ProviderRequest).where(ProviderRequest.outbound_job_id == payload.id)
+            select(ProviderRequest).where(
+                or_(ProviderRequest.outbound_job_id == payload.id,
+                    ProviderRequest.outbound_transaction_id == payload.id)
+            )
         )
-        provider_request = result.scalar_one_or_none()
+        provider_requests = _match_recipient(result.scalars().all(), payload)
 
-        if not provider_request:
+        if not provider_requests:
             logger.warning(f"⚠️ No provider request found for fax ID: {payload.id}")
             return {
                 "status": "not_found",
@@ -398,32 +572,55 @@ async def outbound_status_webhook(
                 "fax_id": payload.id
             }
 
-        # Update status based on HumbleFax status
-        if payload.status == "delivered":
-            provider_request.status = "fax_delivered"
-            provider_request.delivered_at = datetime.utcnow()
-            logger.info(f"✅ Marked provider request #{provider_request.id} as delivered")
+        ids = [pr.id for pr in provider_requests]
+
+        # Update status based on HumbleFax status, mapped the same way as
+        # the status poller does. Transitions update the request counters
+        # in the same transaction and never leave a terminal state; a late
+        # or reordered "sent" also cannot move a delivered request back.
+        status = delivery_status(payload.status)
+        if status == "delivered":
+            changed = await transition_provider_requests(
+                db, ids, "fax_delivered",
+                delivered_at=datetime.utcnow()
+            )
+            logger.info(f"✅ Marked provider request(s) {ids} as delivered")
 
-        elif payload.status == "failed":
-            provider_request.status = "fax_failed"
-            provider_request.failed_reason = payload.error or "Unknown error"
+        elif status == "failed":
+            changed = await transition_provider_requests(
+                db, ids, "fax_failed",
+                failed_reason=payload.error or "Unknown error"
+            )
             logger.info(
-                f"❌ Marked provider request #{provider_request.id} as failed: "
-                f"{provider_request.failed_reason}"
+                f"❌ Marked provider request(s) {ids} as failed: "
+                f"{payload.error or 'Unknown error'}"
+            )
+
+        else:
+            # "sent" and other in-progress statuses: accepted, not delivered
+            changed = await transition_provider_requests(
+                db, ids, "fax_sent",
+                only_if=ProviderRequest.status.in_(PRE_DELIVERY_STATUSES)
             )
+            logger.info(f"ℹ️ Provider request(s) {ids} marked as sent")
 
-        elif payload.status == "sent":
-            provider_request.status = "fax_sent"
-            logger.info(f"ℹ️ Provider request #{provider_request.id} marked as sent")
+        if not changed:
+            logger.info(
+                f"ℹ️ Provider request(s) {ids} unchanged "
+                f"(status '{payload.status}' ignored)"
+            )
 
         await db.commit()
+        for provider_request in provider_requests:
+            await db.refresh(provider_request)
         logger.info("=" * 80)
 
         return {
             "status": "updated",
             "message": "Provider request status updated",
-            "provider_request_id": provider_request.id,
-            "new_status": provider_request.status
+            "provider_request_id": ids[0],
+            "provider_request_ids": ids,
+            "new_status": provider_requests[0].status
         }
 
     except Exception as e:
@@ -482,7 +679,8 @@ async def get_fax_status(fax_id: str, db: AsyncSession = Depends(get_db)):
         "received_time": fax.received_time.isoformat() if fax.received_time else None,
         "patient_id": fax.patient_id,
         "file_path": fax.file_path,
-        "has_pdf": len(fax.pdf_data) > 0 if fax.pdf_data else False,
+        "has_pdf": bool(fax.file_path) and os.path.exists(fax.file_path),
+        "pdf_sha256": fax.pdf_sha256,
         "has_ocr": bool(fax.ocr_text),
         "ocr_length": len(fax.ocr_text) if fax.ocr_text else 0,
         "ocr_snippet": fax.ocr_text[:200] if fax.ocr_text else None,
@@ -21,7 +21,12 @@ from app.database.db import get_db
 from app.models.patient import Patient
 from app.models.record_request import RecordRequest
 from app.models.fax_file import FaxFile
-from app.services.medical_records_compiler import compile_all_patient_records, get_patient_records_summary
+from app.services.medical_records_compiler import (
+    compile_all_patient_records,
+    compile_patient_records_by_type,
+    get_patient_records_summary,
+)
+from app.services.page_classifier import DOC_TYPE_LABELS
 
 # ✅ CRITICAL: This line MUST come BEFORE any @router decorators
 router = APIRouter()
@@ -72,6 +77,7 @@ async def portal_home(request: Request, patient_uuid: str, db: AsyncSession = De
         "requests": requests,
         "faxes": faxes,
         "records_summary": records_summary,
+        "doc_type_labels": DOC_TYPE_LABELS,
         "active_request": active_request,
     })
 
@@ -106,6 +112,37 @@ async def compile_all_records(
     )
 
 
+@router.post("/portal/{patient_uuid}/compile/{doc_type}")
+async def compile_records_by_type(
+    patient_uuid: str,
+    doc_type: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Compile only one category of pages (e.g. "lab") into a single PDF.
+    Pages are looked up in the fax_pages index built at ingest.
+    """
+    if doc_type not in DOC_TYPE_LABELS:
+        raise HTTPException(status_code=404, detail=f"Unknown record type: {doc_type}")
+
+    # Get patient
+    res = await db.execute(select(Patient).where(Patient.uuid == patient_uuid))
+    patient = res.scalars().first()
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient not found")
+
+    compiled_path = await compile_patient_records_by_type(patient.id, db, [doc_type])
+
+    if not compiled_path or not os.path.exists(compiled_path):
+        raise HTTPException(status_code=404, detail=f"No {DOC_TYPE_LABELS[doc_type].lower()} found")
+
+    return FileResponse(
+        path=compiled_path,
+        media_type="application/pdf",
+        filename=f"{patient.first_name}_{patient.last_name}_{doc_type}_records.pdf"
+    )
+
+
 @router.get("/portal/{patient_uuid}/download-compiled/{request_id}")
 async def download_compiled(
     patient_uuid: str,
@@ -19,7 +19,7 @@ from app.models.patient import Patient
 from app.models.consent import PatientConsent
 from app.models.record_request import RecordRequest, ProviderRequest
 from app.models.provider import Provider
-from app.services.pdf_ops import generate_release_pdf, write_cover_sheet
+from app.services.pdf_ops import generate_release_pdf
 # UPDATED: Import enhanced hospital search with fuzzy matching and pagination (v3.0)
 from app.services.hospital_directory import (
     search_hospitals,
@@ -34,8 +34,11 @@ from app.services.auth_service import (
     verify_magic_link,
     send_magic_link_email
 )
-# UPDATED v3.1: Import HumbleFax service instead of iFax
-from app.services.humblefax_service import send_fax
+# Outbound faxes are sent by send jobs in the worker, not in the request
+from app.services.fax_dispatch import enqueue_sends
+from app.services.request_progress import add_new_provider_requests, request_progress
+from app.services.fax_rematch import enqueue_rematch
+from app.services.job_queue import get_job_runner
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -47,6 +50,9 @@ This authorization is voluntary and may be revoked in writing at any time except
 has already been taken. This authorization will expire 180 days from the date of signature.
 """
 
+# Provider rows listed on the status page; the summary comes from the counters
+STATUS_PAGE_MAX_PROVIDERS = 200
+
 
 # -------------------------
 # Helper Functions
@@ -184,8 +190,12 @@ async def register_submit(
         date_of_birth=date_of_birth
     )
     db.add(patient)
+    # Faxes that arrived before this patient registered may now match
+    await enqueue_rematch(db, dobs=[patient.date_of_birth], last_names=[patient.last_name])
     await db.commit()
     await db.refresh(patient)
+    get_job_runner().wake()
+
     response = RedirectResponse(url=f"/consent/{patient.id}", status_code=303)
     response.set_cookie(key="patient_uuid", value=str(patient.uuid), httponly=True, max_age=86400 * 30)
     return response
@@ -493,8 +503,8 @@ async def review_providers_submit(
 ) -> RedirectResponse:
     """
     Process selected providers and create requests.
-    ENHANCED v3.1: Now uses HumbleFax service for reliable fax delivery
-    with professional cover sheets and HIPAA-compliant documents.
+    Faxes are not sent here: each provider request is created "queued"
+    together with its send job, so the response returns at once.
     """
     p = await db.get(Patient, patient_id)
     if not p:
@@ -559,98 +569,38 @@ async def review_providers_submit(
         status="in_progress",
     )
     db.add(rr)
-    await db.commit()
-    await db.refresh(rr)
-
-    # Prepare for fax sending with HumbleFax
-    base_url = os.getenv("BASE_EXTERNAL_URL", "")
-    # UPDATED v3.1: Change callback URL to HumbleFax endpoint
-    callback = f"{base_url}/humblefax/outbound-status" if base_url else None
-
-    covers_dir = "storage/covers"
-    os.makedirs(covers_dir, exist_ok=True)
-
-    patient_name = f"{p.first_name} {p.last_name}"
-    dob_str = p.date_of_birth.isoformat() if p.date_of_birth else ""
-
-    # Send fax to each provider with professional cover sheets
-    for prov in providers:
-        # Generate professional cover sheet with all details
-        cover_path = os.path.join(covers_dir, f"cover_rr{rr.id}_prov{prov.id}.pdf")
-
-        # Calculate total pages (cover + release form)
-        # Typically: 1 page cover + 2 pages release = 3 pages total
-        total_pages = 3
-
-        write_cover_sheet(
-            path=cover_path,
-            patient_name=patient_name,
-            dob=dob_str,
-            request_id=rr.id,
-            patient_phone=p.phone or "",
-            patient_email=p.email or "",
-            provider_name=prov.name,
-            provider_fax=prov.fax or "",
-            provider_phone=prov.phone or "",
-            total_pages=total_pages,
+    await db.flush()
+
+    # One queued provider request per provider, each with a send job
+    provider_requests = [
+        ProviderRequest(
+            record_request_id=rr.id,
+            provider_id=prov.id,
+            fax_number_used=prov.fax,
+            status="queued",
         )
-
-        try:
-            # UPDATED v3.1: Send fax via HumbleFax service
-            # HumbleFax service handles the API call and returns structured response
-            res = send_fax(
-                to_number=prov.fax,
-                file_paths=[cover_path, consent.consent_pdf_path],
-                callback_url=callback
-            )
-
-            if res.get("success"):
-                job_id = res.get("fax_id", "")  # HumbleFax returns 'fax_id'
-                log.info(
-                    f"✅ Fax sent successfully to {prov.name} "
-                    f"(Fax: {prov.fax}, Job ID: {job_id})"
-                )
-                pr = ProviderRequest(
-                    record_request_id=rr.id,
-                    provider_id=prov.id,
-                    fax_number_used=prov.fax,
-                    status="fax_sent",
-                    outbound_job_id=job_id,
-                    outbound_transaction_id=job_id,  # HumbleFax uses same ID
-                    sent_at=datetime.utcnow()
-                )
-            else:
-                error_msg = res.get("message", res.get("error", "Unknown error"))
-                log.error(
-                    f"❌ Failed to send fax to {prov.name} "
-                    f"(Fax: {prov.fax}): {error_msg}"
-                )
-                pr = ProviderRequest(
-                    record_request_id=rr.id,
-                    provider_id=prov.id,
-                    fax_number_used=prov.fax,
-                    status="fax_failed",
-                    failed_reason=error_msg
-                )
-        except Exception as e:
-            log.exception(
-                f"❌ Exception sending fax to {prov.name} "
-                f"(Fax: {prov.fax}): {e}"
-            )
-            pr = ProviderRequest(
-                record_request_id=rr.id,
-                provider_id=prov.id,
-                fax_number_used=prov.fax,
-                status="fax_failed",
-                failed_reason=str(e)
-            )
-        db.add(pr)
-
+        for prov in providers
+    ]
+    db.add_all(provider_requests)
+
+    add_new_provider_requests(rr, provider_requests)
+    await db.flush()
+    await enqueue_sends(db, [pr.id for pr in provider_requests])
+
+    # Queued faxes from these providers' numbers (or for this patient) may now match
+    await enqueue_rematch(
+        db,
+        dobs=[p.date_of_birth],
+        last_names=[p.last_name],
+        fax_keys=[prov.fax_key for prov in providers]
+    )
     await db.commit()
 
+    get_job_runner().wake()
+
     log.info(
         f"✅ Record request {rr.id} created with {len(providers)} providers. "
-        f"Faxes sent via HumbleFax with professional cover sheets and release forms."
+        f"Faxes queued for sending via HumbleFax."
     )
     return RedirectResponse(url=f"/status/{rr.id}", status_code=303)
 
@@ -664,22 +614,41 @@ async def status_page(
         request: Request,
         db: AsyncSession = Depends(get_db),
 ) -> HTMLResponse:
-    """Render the status page with all relationships preloaded via JOINs."""
+    """
+    Render the status page.
+
+    The progress summary is read from the request's counters; provider
+    requests are only loaded (as a column projection, capped) for the
+    per-provider list.
+    """
     q = (
         select(RecordRequest)
-        .options(
-            joinedload(RecordRequest.patient),
-            joinedload(RecordRequest.provider_requests).joinedload(ProviderRequest.provider),
-        )
+        .options(joinedload(RecordRequest.patient))
         .where(RecordRequest.id == request_id)
     )
     result = await db.execute(q)
-    rr = result.unique().scalar_one_or_none()
+    rr = result.scalar_one_or_none()
 
     if rr is None:
         raise HTTPException(status_code=404, detail="Record request not found")
 
-    prs: List[ProviderRequest] = list(rr.provider_requests or [])
+    result = await db.execute(
+        select(
+            ProviderRequest.id,
+            ProviderRequest.status,
+            ProviderRequest.fax_number_used,
+            ProviderRequest.sent_at,
+            ProviderRequest.delivered_at,
+            ProviderRequest.responded_at,
+            ProviderRequest.failed_reason,
+            Provider.name.label("provider_name"),
+        )
+        .outerjoin(Provider, ProviderRequest.provider_id == Provider.id)
+        .where(ProviderRequest.record_request_id == rr.id)
+        .order_by(ProviderRequest.id)
+        .limit(STATUS_PAGE_MAX_PROVIDERS)
+    )
+    prs = result.all()
 
     return templates.TemplateResponse(
         "status.html",
@@ -687,6 +656,7 @@ async def status_page(
             "request": request,
             "rr": rr,
             "prs": prs,
+            "progress": request_progress(rr),
             "patient": rr.patient,
             "portal_url": f"/portal/{rr.patient.uuid}",
             "add_providers_url": f"/search-providers/{rr.patient_id}",
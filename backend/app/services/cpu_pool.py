@@ -0,0 +1,55 @@
+"""
+CPU-Bound Work Off the Event Loop
+
+OCR (pdf2image + Tesseract) keeps a core busy for seconds per page. Calling
+it directly from async code stalls every other coroutine in the process,
+which in the web server means every page request.
+
+run_cpu_bound() runs such calls in the process pool configured by the
+worker (app.worker), so OCR scales with the worker's --ocr-processes rather
+than competing for one interpreter. Without a pool (inline job mode,
+scripts) it falls back to a thread, which still keeps the event loop
+responsive.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def configure_process_pool(processes: int) -> ProcessPoolExecutor:
+    """Create the process pool used by run_cpu_bound()."""
+    global _pool
+    shutdown_process_pool()
+    # spawn, not fork: forking a process with a running event loop and
+    # database driver threads can deadlock the child
+    _pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+    logger.info(f"🧮 CPU process pool started ({processes} process(es))")
+    return _pool
+
+
+def shutdown_process_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+async def run_cpu_bound(func: Callable[..., T], *args) -> T:
+    """
+    Run a blocking, CPU-heavy call without blocking the event loop.
+
+    func and args must be picklable (module-level function) when a process
+    pool is configured.
+    """
+    if _pool is None:
+        return await asyncio.to_thread(func, *args)
+    return await asyncio.get_running_loop().run_in_executor(_pool, func, *args)
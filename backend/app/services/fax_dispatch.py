@@ -0,0 +1,455 @@
+"""
+Outbound Fax Dispatch
+
+review_providers_submit creates ProviderRequest rows with status "queued"
+and, in the same transaction, one "send_fax" job per row (enqueue_sends),
+so a committed request always has a durable send job. The worker
+(python -m app.worker) runs the jobs: each builds the cover+release packet,
+sends the fax through the shared HumbleFax client and records the result
+on the row (fax_sent with its job ID, or fax_failed) through
+request_progress so the request counters stay exact.
+
+Before sending, a job claims its rows with a conditional UPDATE from
+"queued" to "sending" and only sends the rows it actually moved. A row
+picked up twice (a retried job, sibling batches, several workers) is
+therefore sent once. While the send is in flight (rate limiter waits,
+HumbleFax retries with Retry-After backoff, slow uploads) the job
+refreshes send_started_at every SEND_HEARTBEAT_INTERVAL, so a row whose
+send_started_at is older than SEND_STALE_AFTER has lost its job: it was
+interrupted mid-send (worker crash). Whether HumbleFax accepted it is
+unknown, so it is failed with INTERRUPTED_REASON rather than sent again.
+
+Sends that fail transiently without reaching HumbleFax (circuit open,
+connection errors, 5xx before the fax was sent) are not failed: the
+request goes back to "queued" and is parked in the fax_outbox table. The
+outbox drainer (run_outbox_drainer, a worker maintenance loop)
+health-checks HumbleFax every OUTBOX_CHECK_INTERVAL seconds while the
+outbox is non-empty and, once it answers, queues send jobs for parked
+requests spaced at OUTBOX_DRAIN_RATE per second. A parked request keeps
+its outbox row (and attempt count) until the send is resolved.
+
+With FAX_COVER_MODE=generic every provider of a record request gets the
+same packet (a cover without provider details), so a job for one provider
+request claims its still-queued siblings and sends them as one
+multi-recipient tmpFax: API calls scale with distinct packets, not
+recipients. The siblings' own jobs find them claimed and skip them. Each
+provider request records the shared job ID plus its own per-recipient ID
+as outbound_transaction_id. Only this mode reduces uploads and API calls;
+in the default per-provider mode each provider's cover is personalised, so
+every provider request is still uploaded and sent on its own.
+
+Cached packets are deleted once they can no longer be reused
+(run_packet_pruner, a worker maintenance loop; see fax_packets).
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import select, delete, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.database.db import get_async_session_context
+from app.models.fax_outbox import FaxOutbox
+from app.models.job import Job
+from app.models.record_request import RecordRequest, ProviderRequest
+from app.services.humblefax_client import get_client, validate_fax_number, format_fax_number
+from app.services.fax_packets import build_provider_packet, prune_packets
+from app.services.job_queue import enqueue_job, get_job_runner, job_handler, OPEN_STATES
+from app.services.request_progress import transition_provider_request, transition_provider_requests
+
+logger = logging.getLogger(__name__)
+
+SEND_JOB = "send_fax"
+
+# A row still "sending" without a heartbeat for this long was interrupted
+# mid-send; in-flight sends refresh send_started_at every
+# SEND_HEARTBEAT_INTERVAL seconds, however long they wait or retry
+SEND_STALE_AFTER = timedelta(minutes=15)
+SEND_HEARTBEAT_INTERVAL = 60
+
+INTERRUPTED_REASON = "Send was interrupted; HumbleFax may or may not have sent it"
+
+# Outbox draining after an outage
+OUTBOX_CHECK_INTERVAL = 30
+OUTBOX_DRAIN_RATE = float(os.getenv("FAX_OUTBOX_DRAIN_RATE", "2"))
+OUTBOX_DRAIN_BATCH = 100
+
+# Transient failures after which a parked send is finally failed
+OUTBOX_MAX_ATTEMPTS = 20
+
+# Seconds between packet cache prunes
+PACKET_PRUNE_INTERVAL = 3600
+
+# "provider": one cover (and upload) per provider; "generic": one shared cover per
+# record request, sent to its providers as batched multi-recipient faxes (the
+# only mode that reduces uploads and API calls)
+COVER_MODE = os.getenv("FAX_COVER_MODE", "provider").lower()
+
+# Most recipients on one batched tmpFax
+MAX_BATCH_RECIPIENTS = int(os.getenv("FAX_MAX_BATCH_RECIPIENTS", "20"))
+
+
+def _callback_url() -> Optional[str]:
+    base_url = os.getenv("BASE_EXTERNAL_URL", "")
+    return f"{base_url}/humblefax/outbound-status" if base_url else None
+
+
+def _send_key(provider_request_id: int) -> str:
+    return f"{SEND_JOB}:{provider_request_id}"
+
+
+async def enqueue_sends(
+        db: AsyncSession,
+        provider_request_ids: Iterable[int],
+        spacing: Optional[timedelta] = None
+) -> None:
+    """
+    Queue a send job per provider request; the caller commits.
+
+    With spacing, the n-th job runs no earlier than n * spacing from now.
+    """
+    for n, pr_id in enumerate(provider_request_ids):
+        await enqueue_job(
+            db, SEND_JOB,
+            {"provider_request_id": pr_id},
+            delay=spacing * n if spacing else None,
+            dedupe_key=_send_key(pr_id),
+        )
+
+
+@job_handler(SEND_JOB)
+async def _send_fax_job(payload: dict) -> None:
+    """Send one provider request, batched with its siblings for generic covers."""
+    pr_id = payload["provider_request_id"]
+    if COVER_MODE != "generic":
+        await send_provider_requests([pr_id])
+        return
+
+    record_request_id = await _record_request_id(pr_id)
+    if record_request_id is None:
+        return
+
+    siblings = await _queued_provider_requests(record_request_id)
+    batch = [pr_id] + [s for s in siblings if s != pr_id][:MAX_BATCH_RECIPIENTS - 1]
+    await send_provider_requests(batch)
+
+
+async def _heartbeat_sends(provider_request_ids: List[int]) -> None:
+    """
+    Refresh send_started_at on claimed rows until cancelled, so
+    fail_interrupted_sends does not fail a send that is still in flight.
+    """
+    while True:
+        await asyncio.sleep(SEND_HEARTBEAT_INTERVAL)
+        try:
+            async with get_async_session_context() as db:
+                await db.execute(
+                    update(ProviderRequest)
+                    .where(ProviderRequest.id.in_(provider_request_ids), ProviderRequest.status == "sending")
+                    .values(send_started_at=datetime.utcnow())
+                )
+                await db.commit()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Send heartbeat failed for {provider_request_ids}: {e}")
+
+
+async def resume_queued_sends() -> int:
+    """
+    Queue send jobs for provider requests left "queued" without one (e.g.
+    created before sends ran as jobs). Parked requests are left to the
+    outbox drainer.
+
+    Returns:
+        Number of send jobs queued
+    """
+    async with get_async_session_context() as db:
+        result = await db.execute(
+            select(Job.dedupe_key).where(Job.kind == SEND_JOB, Job.state.in_(OPEN_STATES))
+        )
+        in_queue = set(result.scalars().all())
+
+        result = await db.execute(
+            select(ProviderRequest.id)
+            .where(
+                ProviderRequest.status == "queued",
+                ~select(FaxOutbox.id)
+                .where(FaxOutbox.provider_request_id == ProviderRequest.id)
+                .exists()
+            )
+            .order_by(ProviderRequest.id)
+        )
+        queued = [pr_id for pr_id in result.scalars().all() if _send_key(pr_id) not in in_queue]
+
+        await enqueue_sends(db, queued)
+        await db.commit()
+
+    if queued:
+        logger.info(f"📤 Queued send jobs for {len(queued)} queued outbound fax(es)")
+        get_job_runner().wake()
+    return len(queued)
+
+
+async def fail_interrupted_sends(now: Optional[datetime] = None) -> int:
+    """
+    Fail provider requests left "sending" for over SEND_STALE_AFTER.
+
+    Returns:
+        Number of provider requests failed
+    """
+    cutoff = (now or datetime.utcnow()) - SEND_STALE_AFTER
+    stale = (ProviderRequest.status == "sending") & (ProviderRequest.send_started_at < cutoff)
+
+    async with get_async_session_context() as db:
+        result = await db.execute(select(ProviderRequest.id).where(stale))
+        failed = await transition_provider_requests(
+            db, result.scalars().all(), "fax_failed", only_if=stale, failed_reason=INTERRUPTED_REASON
+        )
+        if failed:
+            await db.execute(delete(FaxOutbox).where(FaxOutbox.provider_request_id.in_(failed)))
+        await db.commit()
+
+    if failed:
+        logger.error(f"❌ Failed {len(failed)} send(s) interrupted mid-flight: {failed}")
+    return len(failed)
+
+
+async def run_outbox_drainer(interval: int = OUTBOX_CHECK_INTERVAL) -> None:
+    """
+    Every `interval` seconds fail interrupted sends and, once HumbleFax is
+    healthy, queue send jobs for parked requests at a controlled rate.
+    """
+    client = get_client()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await fail_interrupted_sends()
+
+            async with get_async_session_context() as db:
+                parked = (await db.execute(select(func.count(FaxOutbox.id)))).scalar()
+                if not parked:
+                    continue
+
+                if client.breaker.state != "closed" and not await client.health_check():
+                    logger.info(f"⏸️ HumbleFax still unavailable; {parked} send(s) parked")
+                    continue
+
+                # Re-parking bumps updated_at, so nothing starves
+                result = await db.execute(
+                    select(FaxOutbox.provider_request_id)
+                    .order_by(FaxOutbox.updated_at)
+                    .limit(OUTBOX_DRAIN_BATCH)
+                )
+                pr_ids = result.scalars().all()
+
+                # If the circuit opens again mid-drain the jobs simply park
+                # these again
+                logger.info(f"▶️ Draining {len(pr_ids)} of {parked} parked send(s)")
+                await enqueue_sends(db, pr_ids, spacing=timedelta(seconds=1 / OUTBOX_DRAIN_RATE))
+                await db.commit()
+            get_job_runner().wake()
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"❌ Outbox drain failed: {e}")
+
+
+async def run_packet_pruner(interval: int = PACKET_PRUNE_INTERVAL) -> None:
+    """Every `interval` seconds delete cached packets too old to be reused."""
+    while True:
+        try:
+            pruned = await asyncio.to_thread(prune_packets)
+            if pruned:
+                logger.info(f"🧹 Pruned {pruned} day(s) of cached fax packets")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"❌ Packet prune failed: {e}")
+        await asyncio.sleep(interval)
+
+
+async def _park(db, pr: ProviderRequest, reason: str) -> None:
+    """
+    Put a transiently failed send back to "queued" and keep it in the
+    outbox, or fail it for good after OUTBOX_MAX_ATTEMPTS.
+    """
+    result = await db.execute(select(FaxOutbox).where(FaxOutbox.provider_request_id == pr.id))
+    entry = result.scalar_one_or_none()
+
+    if entry is None:
+        db.add(FaxOutbox(provider_request_id=pr.id, reason=reason, attempts=1))
+        await transition_provider_request(db, pr.id, "queued", send_started_at=None)
+        logger.warning(f"🅿️ Parked ProviderRequest #{pr.id} in outbox: {reason}")
+        return
+
+    entry.attempts += 1
+    entry.reason = reason
+    if entry.attempts >= OUTBOX_MAX_ATTEMPTS:
+        await db.delete(entry)
+        await transition_provider_request(
+            db, pr.id, "fax_failed",
+            failed_reason=f"{reason} (gave up after {entry.attempts} attempts)"
+        )
+        logger.error(f"❌ Gave up on ProviderRequest #{pr.id} after {entry.attempts} attempts")
+    else:
+        await transition_provider_request(db, pr.id, "queued", send_started_at=None)
+
+
+async def _unpark(db, provider_request_id: int) -> None:
+    await db.execute(delete(FaxOutbox).where(FaxOutbox.provider_request_id == provider_request_id))
+
+
+async def _record_request_id(provider_request_id: int) -> Optional[int]:
+    async with get_async_session_context() as db:
+        result = await db.execute(
+            select(ProviderRequest.record_request_id).where(ProviderRequest.id == provider_request_id)
+        )
+        return result.scalar_one_or_none()
+
+
+async def _queued_provider_requests(record_request_id: int) -> List[int]:
+    async with get_async_session_context() as db:
+        result = await db.execute(
+            select(ProviderRequest.id)
+            .where(
+                ProviderRequest.record_request_id == record_request_id,
+                ProviderRequest.status == "queued",
+            )
+            .order_by(ProviderRequest.id)
+        )
+        return result.scalars().all()
+
+
+async def send_provider_requests(provider_request_ids: List[int]) -> None:
+    """
+    Claim, build the packet for and send queued provider requests of one
+    record request, then record each outcome. More than one ID means they
+    share a generic packet and go out as a single multi-recipient fax.
+
+    Only rows this call moves from "queued" to "sending" are sent; the
+    claim is committed before the send. Requests already claimed or
+    resolved, or whose record request was cancelled, are skipped.
+    """
+    async with get_async_session_context() as db:
+        result = await db.execute(
+            select(ProviderRequest)
+            .options(
+                joinedload(ProviderRequest.provider),
+                joinedload(ProviderRequest.record_request).joinedload(RecordRequest.patient),
+            )
+            .where(ProviderRequest.id.in_(provider_request_ids))
+            .order_by(ProviderRequest.id)
+        )
+        candidates = []
+        for pr in result.scalars().all():
+            if pr.status == "sending":
+                # Another job holds it
+                continue
+            if pr.status != "queued" or pr.record_request.status == "cancelled":
+                await _unpark(db, pr.id)
+            elif not validate_fax_number(pr.fax_number_used):
+                # Fail alone rather than rejecting the whole batch
+                await _unpark(db, pr.id)
+                await transition_provider_request(
+                    db, pr.id, "fax_failed", only_if=ProviderRequest.status == "queued",
+                    failed_reason=f"Invalid fax number: {pr.fax_number_used}"
+                )
+            else:
+                candidates.append(pr)
+
+        claimed = set(await transition_provider_requests(
+            db, [pr.id for pr in candidates], "sending",
+            only_if=ProviderRequest.status == "queued", send_started_at=datetime.utcnow()
+        ))
+        await db.commit()
+
+        prs = [pr for pr in candidates if pr.id in claimed]
+        if not prs:
+            return
+
+        rr = prs[0].record_request
+        p = rr.patient
+        batched = len(prs) > 1
+        to = f"{len(prs)} providers" if batched else f"{prs[0].provider.name} (Fax: {prs[0].fax_number_used})"
+
+        # Don't build a packet for a call the breaker would refuse anyway
+        if get_client().breaker.state == "open":
+            for pr in prs:
+                await _park(db, pr, "HumbleFax circuit is open")
+            await db.commit()
+            return
+
+        cover_fields = dict(
+            patient_name=f"{p.first_name} {p.last_name}",
+            dob=p.date_of_birth.isoformat() if p.date_of_birth else "",
+            patient_phone=p.phone or "",
+            patient_email=p.email or "",
+        )
+        provider_id = None
+        if COVER_MODE != "generic":
+            prov = prs[0].provider
+            provider_id = prov.id
+            cover_fields.update(
+                provider_name=prov.name,
+                provider_fax=prov.fax or "",
+                provider_phone=prov.phone or "",
+            )
+
+        heartbeat = asyncio.create_task(_heartbeat_sends([pr.id for pr in prs]))
+        try:
+            packet_path = await asyncio.to_thread(
+                build_provider_packet,
+                rr.release_pdf_path,
+                record_request_id=rr.id,
+                provider_id=provider_id,
+                **cover_fields
+            )
+
+            res = await get_client().send_batch_fax(
+                to_numbers=[pr.fax_number_used for pr in prs],
+                file_paths=[packet_path],
+                callback_url=_callback_url()
+            )
+        except Exception as e:
+            logger.exception(f"❌ Exception sending fax to {to}: {e}")
+            await transition_provider_requests(db, [pr.id for pr in prs], "fax_failed", failed_reason=str(e))
+            for pr in prs:
+                await _unpark(db, pr.id)
+            await db.commit()
+            return
+        finally:
+            heartbeat.cancel()
+
+        if res.retryable:
+            for pr in prs:
+                await _park(db, pr, res.message or res.error or "Transient error")
+            await db.commit()
+            return
+
+        for pr in prs:
+            await _unpark(db, pr.id)
+
+        if res.success:
+            job_id = res.tmp_fax_id or ""
+            logger.info(f"✅ Fax sent successfully to {to} (Job ID: {job_id})")
+            sent_at = datetime.utcnow()
+            for pr in prs:
+                await transition_provider_request(
+                    db, pr.id, "fax_sent",
+                    outbound_job_id=job_id,
+                    # HumbleFax uses the same ID unless it reports per-recipient IDs
+                    outbound_transaction_id=res.recipient_ids.get(format_fax_number(pr.fax_number_used), job_id),
+                    sent_at=sent_at
+                )
+        else:
+            error_msg = res.message or res.error or "Unknown error"
+            logger.error(f"❌ Failed to send fax to {to}: {error_msg}")
+            await transition_provider_requests(db, [pr.id for pr in prs], "fax_failed", failed_reason=error_msg)
+
+        await db.commit()
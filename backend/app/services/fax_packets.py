@@ -0,0 +1,290 @@
+"""
+Outbound Fax Packets
+
+Each provider fax is one prebuilt packet: the provider's cover sheet
+followed by the patient's signed release, merged into a single file so a
+send uploads one attachment instead of two. The cover's page count is
+computed from the release rather than assumed.
+
+HumbleFax attachments belong to a single tmpFax and cannot be referenced
+from another, so the release cannot be uploaded once and linked to every
+provider fax. Instead the release is read and hashed once per version and
+kept in memory, the cover is rendered in memory, and both are written out
+in one pass. Packets are cached on disk under
+storage/packets/<release version>/<cover template version>/<date>/, so a
+retried or re-enqueued send reuses its packet the same day, and a
+re-signed release, a cover layout change or a send on a later day (the
+cover is dated) builds new ones. Packets contain PHI and are never reused
+after their date, so prune_packets (a worker maintenance loop) deletes
+date directories older than PACKET_RETENTION_DAYS, and a release
+version's directory (with its release.tif) once none remain. A generic packet (provider_id None, no
+provider fields on the cover) is shared by every provider of a request,
+so fax_dispatch can send it to all of them as one multi-recipient fax
+(FAX_COVER_MODE=generic). In the default per-provider mode every provider
+still gets its own packet and upload.
+
+By default packets are fax-native: every page is rasterized once at fax
+"Fine" resolution (204x196 dpi, standard 1728-pixel width), thresholded to
+bilevel and stored as a multi-page CCITT Group 4 TIFF. That is what the
+fax line carries anyway, so HumbleFax has nothing to re-rasterize, and
+the upload is a fraction of the vector PDF with its embedded signature
+PNG. The release is rasterized once per version (release.tif) and shared
+by every provider's packet. FAX_PACKET_FORMAT=pdf keeps vector PDF
+packets, which is also the fallback when poppler is not installed.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from pdf2image import convert_from_bytes
+from pdf2image.exceptions import PDFInfoNotInstalledError
+from PIL import Image, ImageSequence
+from PyPDF2 import PdfReader, PdfWriter
+
+from app.services.pdf_ops import COVER_SHEET_VERSION, write_cover_sheet
+
+logger = logging.getLogger(__name__)
+
+PACKETS_DIR = "storage/packets"
+
+# Packets dated this many days before today are kept (a send started just
+# before midnight may still be using yesterday's); older ones are deleted
+PACKET_RETENTION_DAYS = 1
+
+# "tiff" (fax-native CCITT G4) or "pdf"
+PACKET_FORMAT = os.getenv("FAX_PACKET_FORMAT", "tiff").lower()
+
+# Fax "Fine" resolution and the standard scan line width
+FAX_DPI = (204, 196)
+FAX_WIDTH = 1728
+
+# Gray level at or above which a pixel is white
+BILEVEL_THRESHOLD = 160
+
+# write_cover_sheet always renders a single page
+COVER_PAGES = 1
+
+# release path -> ((mtime, size), version, bytes)
+_releases: Dict[str, Tuple[Tuple[float, int], str, bytes]] = {}
+# release version -> page count
+_release_pages: Dict[str, int] = {}
+# Cleared when poppler turns out to be missing
+_fax_native = True
+_lock = threading.Lock()
+
+
+def load_release(release_path: str) -> Tuple[str, bytes]:
+    """
+    Release PDF bytes and their version (short sha256 of the content),
+    read from disk only when the file changed.
+    """
+    stat = os.stat(release_path)
+    stamp = (stat.st_mtime, stat.st_size)
+
+    with _lock:
+        cached = _releases.get(release_path)
+        if cached and cached[0] == stamp:
+            return cached[1], cached[2]
+
+    with open(release_path, "rb") as f:
+        data = f.read()
+    version = hashlib.sha256(data).hexdigest()[:16]
+
+    with _lock:
+        _releases[release_path] = (stamp, version, data)
+    return version, data
+
+
+def release_page_count(release_version: str, release_bytes: bytes) -> int:
+    with _lock:
+        count = _release_pages.get(release_version)
+    if count is None:
+        count = len(PdfReader(io.BytesIO(release_bytes)).pages)
+        with _lock:
+            _release_pages[release_version] = count
+    return count
+
+
+def packet_path(
+        release_version: str,
+        record_request_id: int,
+        provider_id: Optional[int],
+        cover_date: date,
+        ext: str = "pdf"
+) -> str:
+    addressee = f"prov{provider_id}" if provider_id is not None else "generic"
+    return os.path.join(
+        PACKETS_DIR,
+        release_version,
+        COVER_SHEET_VERSION,
+        cover_date.isoformat(),
+        f"rr{record_request_id}_{addressee}.{ext}",
+    )
+
+
+def _subdirs(path: str) -> List[str]:
+    return [entry.path for entry in os.scandir(path) if entry.is_dir()]
+
+
+def prune_packets(today: Optional[date] = None) -> int:
+    """
+    Delete cached packets dated more than PACKET_RETENTION_DAYS before
+    today, then any release version left without packets whose
+    release.tif is equally old. Blocking; call via asyncio.to_thread.
+
+    Returns:
+        Number of date directories deleted
+    """
+    if not os.path.isdir(PACKETS_DIR):
+        return 0
+
+    cutoff = (today or date.today()) - timedelta(days=PACKET_RETENTION_DAYS)
+    cutoff_ts = time.mktime(cutoff.timetuple())
+    pruned = 0
+
+    for version_dir in _subdirs(PACKETS_DIR):
+        remaining = 0
+        for cover_dir in _subdirs(version_dir):
+            for date_dir in _subdirs(cover_dir):
+                try:
+                    stale = date.fromisoformat(os.path.basename(date_dir)) < cutoff
+                except ValueError:
+                    stale = False
+                if stale:
+                    shutil.rmtree(date_dir, ignore_errors=True)
+                    pruned += 1
+                else:
+                    remaining += 1
+
+        release_tif = os.path.join(version_dir, "release.tif")
+        if not remaining and (not os.path.exists(release_tif) or os.path.getmtime(release_tif) < cutoff_ts):
+            shutil.rmtree(version_dir, ignore_errors=True)
+
+    return pruned
+
+
+def _write_atomic(out_path: str, write) -> None:
+    """Write via a temp file and rename, so readers never see a partial packet."""
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = f"{out_path}.tmp{threading.get_ident()}"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, out_path)
+
+
+# ============================================================================
+# FAX-NATIVE RASTERIZATION
+# ============================================================================
+
+def to_fax_image(page: Image.Image) -> Image.Image:
+    """
+    Resample one page rendered at FAX_DPI[0] to fax geometry (FAX_WIDTH
+    wide, FAX_DPI[1] vertically) and threshold it to bilevel.
+    """
+    gray = page.convert("L")
+    height = round(gray.height * FAX_DPI[1] / FAX_DPI[0])
+    gray = gray.resize((FAX_WIDTH, height), Image.LANCZOS)
+    # Plain threshold rather than dithering keeps text and signatures crisp
+    return gray.point(lambda v: 255 if v >= BILEVEL_THRESHOLD else 0).convert("1", dither=Image.Dither.NONE)
+
+
+def rasterize_pdf(pdf_bytes: bytes) -> List[Image.Image]:
+    """Render every page of a PDF as a bilevel fax image."""
+    pages = convert_from_bytes(pdf_bytes, dpi=FAX_DPI[0], grayscale=True)
+    return [to_fax_image(page) for page in pages]
+
+
+def write_fax_tiff(f, images: List[Image.Image]) -> None:
+    """Write bilevel pages as one multi-page CCITT Group 4 TIFF."""
+    images[0].save(
+        f,
+        format="TIFF",
+        compression="group4",
+        dpi=FAX_DPI,
+        save_all=True,
+        append_images=images[1:],
+    )
+
+
+def _release_images(release_version: str, release_bytes: bytes) -> List[Image.Image]:
+    """Bilevel release pages, rasterized once per release version."""
+    path = os.path.join(PACKETS_DIR, release_version, "release.tif")
+    if not os.path.exists(path):
+        images = rasterize_pdf(release_bytes)
+        _write_atomic(path, lambda f: write_fax_tiff(f, images))
+        return images
+
+    with Image.open(path) as tiff:
+        return [frame.copy() for frame in ImageSequence.Iterator(tiff)]
+
+
+def _build_tiff_packet(out_path: str, cover_pdf: bytes, release_version: str, release_bytes: bytes) -> None:
+    images = rasterize_pdf(cover_pdf) + _release_images(release_version, release_bytes)
+    _write_atomic(out_path, lambda f: write_fax_tiff(f, images))
+
+
+def _build_pdf_packet(out_path: str, cover_pdf: bytes, release_bytes: bytes) -> None:
+    writer = PdfWriter()
+    for reader in (PdfReader(io.BytesIO(cover_pdf)), PdfReader(io.BytesIO(release_bytes))):
+        for page in reader.pages:
+            writer.add_page(page)
+    _write_atomic(out_path, writer.write)
+
+
+def build_provider_packet(
+        release_path: str,
+        *,
+        record_request_id: int,
+        provider_id: Optional[int],
+        **cover_fields
+) -> str:
+    """
+    Return the cached cover+release packet for one provider, building it if
+    needed. Blocking; call via asyncio.to_thread from async code.
+
+    Args:
+        release_path: Signed release PDF
+        record_request_id: Request the cover refers to
+        provider_id: Provider the cover is addressed to, or None for a
+            generic packet (leave the provider fields out of cover_fields)
+        **cover_fields: Remaining write_cover_sheet keyword arguments
+            (total_pages is computed here)
+
+    Returns:
+        Path of the packet (TIFF, or PDF with FAX_PACKET_FORMAT=pdf)
+    """
+    global _fax_native
+    version, release_bytes = load_release(release_path)
+    total_pages = COVER_PAGES + release_page_count(version, release_bytes)
+
+    # The cover is dated, so the date is part of the cache key
+    today = date.today()
+    fax_native = PACKET_FORMAT == "tiff" and _fax_native
+    out_path = packet_path(version, record_request_id, provider_id, today, "tif" if fax_native else "pdf")
+    if os.path.exists(out_path):
+        return out_path
+
+    cover = io.BytesIO()
+    write_cover_sheet(
+        cover, request_id=record_request_id, total_pages=total_pages, cover_date=today, **cover_fields
+    )
+    cover_pdf = cover.getvalue()
+
+    if fax_native:
+        try:
+            _build_tiff_packet(out_path, cover_pdf, version, release_bytes)
+            return out_path
+        except PDFInfoNotInstalledError:
+            logger.warning("⚠️ poppler not installed; building PDF packets instead of fax-native TIFF")
+            _fax_native = False
+            out_path = packet_path(version, record_request_id, provider_id, today)
+
+    _build_pdf_packet(out_path, cover_pdf, release_bytes)
+    return out_path
@@ -2,33 +2,206 @@
 Incoming Fax Processor
 
 Handles the complete processing pipeline for incoming faxes:
-1. Parse patient information (name, DOB)
-2. Match to patient records
+1. Classify pages by document type (page index)
+2. Route by sender fax number to an open request, or parse patient
+   information (name, DOB) and match to patient records
 3. Parse encounter date
 4. Match to provider requests
 5. Update request status
 """
 
 import logging
-from typing import Optional, Tuple
-from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime
+
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, insert, update, delete, and_, or_, extract
 
+from app.database.db import engine
 from app.models.fax_file import FaxFile
+from app.models.fax_page import FaxPage
 from app.models.patient import Patient
 from app.models.provider import Provider
 from app.models.record_request import RecordRequest, ProviderRequest
+from app.models.unmatched_fax import UnmatchedFax
+from app.services.page_classifier import index_fax_pages, split_ocr_pages, classify_page
+from app.services.provider_name_index import best_name_matches, MATCH_THRESHOLD as NAME_MATCH_THRESHOLD
+from app.services.request_progress import OPEN_REQUEST_STATUSES, transition_provider_requests
 from app.utils.parsing import (
     parse_name_and_dob,
     parse_encounter_date,
     extract_hospital_names,
-    normalize_phone_number
+    normalize_phone_number,
+    phonetic_key,
+    swap_day_month
 )
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
 
 logger = logging.getLogger(__name__)
 
+# ProviderRequest statuses still waiting on a response fax
+AWAITING_RESPONSE_STATUSES = ['fax_sent', 'fax_delivered']
+
+# Upper bound on patient candidates scored per fax
+MAX_PATIENT_BLOCK = 500
+
+# Minimum name score and confidence weight by how well the DOB agrees.
+# Weaker DOB evidence needs a stronger name match.
+NAME_THRESHOLDS = {
+    "exact": (80, 1.0),
+    "swapped": (85, 0.95),
+    "one_digit": (90, 0.9),
+    "missing": (95, 0.85),
+}
+
+
+def _dob_agreement(parsed: Optional[date], actual: Optional[date]) -> Optional[str]:
+    """
+    Classify how a parsed DOB agrees with a patient's DOB.
+
+    Returns "exact", "swapped", "one_digit" (YYYYMMDD differs in one digit),
+    "missing" (nothing parsed) or None (disagrees).
+    """
+    if parsed is None:
+        return "missing"
+    if actual is None:
+        return None
+    if parsed == actual:
+        return "exact"
+    if swap_day_month(parsed) == actual:
+        return "swapped"
+    diffs = sum(a != b for a, b in zip(parsed.strftime("%Y%m%d"), actual.strftime("%Y%m%d")))
+    return "one_digit" if diffs == 1 else None
+
+
+def _block_clause(dob: Optional[date], name_key: Optional[str]):
+    """
+    SQL clause selecting the patient candidate block for a parsed identity:
+    - exact DOB, or DOB with day/month swapped
+    - phonetic key of the last name, within the parsed birth year or on the
+      parsed month/day (a single wrong digit changes only one of the two)
+    - phonetic key alone when no DOB was parsed
+    """
+    clauses = []
+
+    if dob:
+        dobs = {dob}
+        swapped = swap_day_month(dob)
+        if swapped:
+            dobs.add(swapped)
+        clauses.append(Patient.date_of_birth.in_(dobs))
+
+    if name_key and dob:
+        clauses.append(and_(
+            Patient.last_name_key == name_key,
+            or_(
+                Patient.date_of_birth.between(date(dob.year, 1, 1), date(dob.year, 12, 31)),
+                and_(
+                    extract("month", Patient.date_of_birth) == dob.month,
+                    extract("day", Patient.date_of_birth) == dob.day
+                )
+            )
+        ))
+    elif name_key:
+        clauses.append(Patient.last_name_key == name_key)
+
+    return or_(*clauses) if clauses else None
+
+
+def _in_block(candidate, dob: Optional[date], name_key: Optional[str]) -> bool:
+    """In-memory equivalent of _block_clause for one loaded candidate row."""
+    actual = candidate.date_of_birth
+    if dob and actual in (dob, swap_day_month(dob)):
+        return True
+    if not name_key or candidate.last_name_key != name_key:
+        return False
+    if not dob:
+        return True
+    return actual is not None and (
+        actual.year == dob.year or (actual.month, actual.day) == (dob.month, dob.day)
+    )
+
+
+def _pick_patient(
+        first_name: Optional[str],
+        last_name: Optional[str],
+        dob: Optional[date],
+        candidates: list
+) -> Optional[Tuple[int, float]]:
+    """
+    Choose the patient for a parsed identity from its candidate block.
+
+    Every candidate name is scored against the parsed name in one rapidfuzz
+    cdist call; the DOB agreement decides the name score required.
+    """
+    has_name = bool(first_name and last_name)
+
+    if not candidates:
+        logger.warning(f"No patient candidates for DOB {dob} / last name {last_name}")
+        return None
+
+    logger.info(f"Found {len(candidates)} patient candidate(s)")
+
+    # If no name parsed, but only one patient with this DOB
+    if not has_name:
+        exact = [c for c in candidates if c.date_of_birth == dob]
+        if len(exact) == 1:
+            logger.info(f"Only one patient with DOB {dob}, using that match")
+            return (exact[0].id, 0.9)
+        logger.warning("Could not parse patient name and multiple DOB matches exist")
+        return None
+
+    # Score every candidate name against the parsed name in one call
+    parsed_full_name = f"{first_name} {last_name}".lower()
+    choices = [f"{c.first_name} {c.last_name}".lower() for c in candidates]
+    scores = np.maximum.reduce([
+        process.cdist([parsed_full_name], choices, scorer=scorer)[0]
+        for scorer in (fuzz.ratio, fuzz.token_sort_ratio, fuzz.partial_ratio)
+    ])
+
+    best_match = None
+    best_confidence = 0.0
+    qualifying = 0
+
+    for candidate, score in zip(candidates, scores):
+        dob_kind = _dob_agreement(dob, candidate.date_of_birth)
+        threshold, weight = NAME_THRESHOLDS.get(dob_kind, (None, 0.0))
+
+        logger.debug(
+            f"Patient #{candidate.id} ({candidate.first_name} {candidate.last_name}): "
+            f"name={score:.0f}, dob={dob_kind}"
+        )
+
+        if threshold is None or score < threshold:
+            continue
+
+        qualifying += 1
+        confidence = float(score) / 100.0 * weight
+        if confidence > best_confidence:
+            best_confidence = confidence
+            best_match = candidate
+
+    if best_match and not dob and qualifying > 1:
+        logger.warning(
+            f"No DOB parsed and {qualifying} patients match the name - ambiguous"
+        )
+        return None
+
+    if best_match:
+        logger.info(
+            f"Best match: Patient #{best_match.id} "
+            f"({best_match.first_name} {best_match.last_name}) "
+            f"with confidence {best_confidence:.2f}"
+        )
+        return (best_match.id, best_confidence)
+
+    logger.warning(
+        f"Best name score {scores.max():.0f} did not meet the threshold "
+        "for its DOB agreement. No confident patient match."
+    )
+    return None
+
 
 class IncomingFaxProcessor:
     """
@@ -46,69 +219,193 @@ class IncomingFaxProcessor:
         """
         Process an incoming fax through the complete pipeline.
 
+        All steps run in one unit of work with a savepoint per step, so a
+        failing step is rolled back on its own and the rest still apply
+        (on SQLite a failing step rolls back the whole fax; see _run_step).
+        The fax is committed once at the end with processing_stage set to
+        "processed"; if that commit never happens the fax stays "acquired"
+        and is picked up again on resume. A fax without usable OCR text is
+        marked "failed" instead, like in process_many.
+
         Args:
             job_id: Fax job ID
             fax_file: FaxFile database record
 
         Returns:
-            True if processing succeeded, False otherwise
+            True if the fax was matched to a patient, False otherwise
+
+        Raises:
+            Exception: after rolling back, so the ingest job retries the fax
         """
         logger.info(f"🔍 Processing fax {job_id} (FaxFile #{fax_file.id})")
 
-        # Validate OCR text exists
-        if not fax_file.ocr_text or len(fax_file.ocr_text.strip()) == 0:
-            logger.error(f"❌ No OCR text available for fax {job_id}")
-            return False
-
-        if fax_file.ocr_text.startswith("[OCR"):
-            logger.error(f"❌ OCR failed for fax {job_id}: {fax_file.ocr_text}")
+        # Without usable OCR text there is nothing to match; fail the fax
+        # (as process_many does) so it is not resumed again
+        if not _has_usable_text(fax_file.ocr_text):
+            logger.error(f"❌ No usable OCR text for fax {job_id}: {(fax_file.ocr_text or '')[:100]!r}")
+            fax_file.processing_stage = "failed"
+            await self.db.commit()
             return False
 
         try:
-            # Step 1: Parse patient info
-            logger.info("Step 1: Parsing patient information...")
-            patient_match = await self._match_patient(fax_file)
+            # Step 0: Index pages by document type (independent of matching)
+            await self._run_step("page index", index_fax_pages(self.db, fax_file), fax_file)
+
+            # Step 1-2: Identify patient and parse encounter date
+            logger.info("Step 1: Identifying patient...")
+            patient_match = await self._run_step(
+                "patient match", self._identify_patient(fax_file), fax_file
+            )
 
-            if not patient_match:
+            if patient_match:
+                patient_id, confidence = patient_match
+                logger.info(f"✅ Matched to Patient #{patient_id} (confidence: {confidence:.2f})")
+
+                # Step 3: Match to provider requests
+                logger.info("Step 3: Matching to provider requests...")
+                matched_requests = await self._run_step(
+                    "provider match", self._link_provider_requests(fax_file), fax_file
+                )
+                if not matched_requests:
+                    logger.info("ℹ️ No provider requests matched (fax may be unsolicited)")
+            else:
                 logger.warning(f"⚠️ Could not match fax {job_id} to any patient")
-                return False
 
-            patient_id, confidence = patient_match
-            logger.info(f"✅ Matched to Patient #{patient_id} (confidence: {confidence:.2f})")
+            # Keep the re-match queue in step with the outcome
+            unmatched = [] if patient_match else [_queue_row(
+                fax_file.id, fax_file.sender, fax_file.parsed_last_name, fax_file.parsed_dob
+            )]
+            await self._run_step(
+                "unmatched queue", self._sync_unmatched_queue([fax_file.id], unmatched), fax_file
+            )
 
-            # Update fax record with patient
-            fax_file.patient_id = patient_id
+            fax_file.processing_stage = "processed"
             await self.db.commit()
 
-            # Step 2: Parse encounter date
-            logger.info("Step 2: Parsing encounter date...")
-            encounter_date = parse_encounter_date(fax_file.ocr_text)
+            if patient_match:
+                logger.info(f"✅ Successfully processed fax {job_id}")
+            return bool(patient_match)
 
-            if encounter_date:
-                logger.info(f"✅ Found encounter date: {encounter_date}")
-                fax_file.encounter_date = encounter_date
-                await self.db.commit()
-            else:
-                logger.info("ℹ️ No encounter date found (using received time for sorting)")
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"❌ Error processing fax {job_id}: {str(e)}", exc_info=True)
+            raise
 
-            # Step 3: Match to provider requests
-            logger.info("Step 3: Matching to provider requests...")
-            matched_requests = await self._match_provider_requests(fax_file)
+    async def _run_step(self, name: str, step, fax_file: FaxFile):
+        """
+        Await one pipeline step inside a savepoint.
 
-            if matched_requests:
-                logger.info(f"✅ Matched to {len(matched_requests)} provider request(s)")
+        Returns the step's result, or None if it raised. Its changes are
+        rolled back to the savepoint, which expires fax_file, so fax_file
+        is reloaded before the next step reads it.
 
-                # Check if any record requests are now complete
-                await self._check_request_completion(patient_id)
-            else:
-                logger.info("ℹ️ No provider requests matched (fax may be unsolicited)")
+        pysqlite does not open its implicit transaction before a SAVEPOINT,
+        so there each RELEASE commits on its own. On SQLite steps therefore
+        run without savepoints and a failing step aborts the whole fax.
+        """
+        if engine.dialect.name == "sqlite":
+            return await step
+        try:
+            async with self.db.begin_nested():
+                return await step
+        except Exception as e:
+            logger.error(f"❌ Step '{name}' failed: {e}", exc_info=True)
+            await self.db.refresh(fax_file)
+            return None
 
-            logger.info(f"✅ Successfully processed fax {job_id}")
-            return True
+    async def _sync_unmatched_queue(self, fax_ids: List[int], unmatched_rows: List[Dict]) -> None:
+        """Replace the queue entries of these faxes with the still-unmatched ones."""
+        await self.db.execute(delete(UnmatchedFax).where(UnmatchedFax.fax_file_id.in_(fax_ids)))
+        if unmatched_rows:
+            await self.db.execute(insert(UnmatchedFax), unmatched_rows)
 
-        except Exception as e:
-            logger.error(f"❌ Error processing fax {job_id}: {str(e)}", exc_info=True)
-            return False
+    async def _identify_patient(
+            self,
+            fax_file: FaxFile
+    ) -> Optional[Tuple[int, float]]:
+        """
+        Route by sender number, else parse patient info; link the patient
+        and encounter date to the fax.
+        """
+        patient_match = await self._route_by_sender(fax_file)
+
+        if not patient_match:
+            logger.info("Parsing patient information...")
+            patient_match = await self._match_patient(fax_file)
+
+        if not patient_match:
+            return None
+
+        fax_file.patient_id = patient_match[0]
+
+        # Step 2: Parse encounter date
+        logger.info("Step 2: Parsing encounter date...")
+        encounter_date = parse_encounter_date(fax_file.ocr_text)
+
+        if encounter_date:
+            logger.info(f"✅ Found encounter date: {encounter_date}")
+            fax_file.encounter_date = encounter_date
+        else:
+            logger.info("ℹ️ No encounter date found (using received time for sorting)")
+
+        return patient_match
+
+    async def _link_provider_requests(self, fax_file: FaxFile) -> list:
+        """
+        Match provider requests and record the responses. Record requests
+        complete through their counters in the same transition.
+        """
+        matched_requests = await self._match_provider_requests(fax_file)
+
+        if matched_requests:
+            logger.info(f"✅ Matched to {len(matched_requests)} provider request(s)")
+
+        return matched_requests
+
+    async def _route_by_sender(
+            self,
+            fax_file: FaxFile
+    ) -> Optional[Tuple[int, float]]:
+        """
+        Identify the patient from the sender's fax number alone.
+
+        Looks up open provider requests whose fax key equals the sender's
+        normalized number. If they all belong to one patient, that patient
+        is used without parsing the OCR text, so a fax with an unreadable
+        name or DOB still links to the request it answers.
+
+        Returns:
+            Tuple of (patient_id, confidence) or None if not routable
+        """
+        sender_key = normalize_phone_number(fax_file.sender)
+        if not sender_key:
+            return None
+
+        result = await self.db.execute(
+            select(RecordRequest.patient_id)
+            .join(ProviderRequest, ProviderRequest.record_request_id == RecordRequest.id)
+            .where(
+                and_(
+                    ProviderRequest.fax_key == sender_key,
+                    ProviderRequest.status.in_(AWAITING_RESPONSE_STATUSES),
+                    RecordRequest.status.in_(OPEN_REQUEST_STATUSES)
+                )
+            )
+            .distinct()
+            .limit(2)
+        )
+        patient_ids = result.scalars().all()
+
+        if len(patient_ids) != 1:
+            if patient_ids:
+                logger.info(
+                    f"Sender {sender_key} has open requests for several patients; "
+                    "falling back to content matching"
+                )
+            return None
+
+        logger.info(f"📠 Routed by sender {sender_key} to Patient #{patient_ids[0]}")
+        return (patient_ids[0], 1.0)
 
     async def _match_patient(
             self,
@@ -117,6 +414,12 @@ class IncomingFaxProcessor:
         """
         Match fax to a patient based on name and DOB.
 
+        Candidates are blocked by indexed lookups rather than scanned:
+        - exact DOB, or DOB with day/month swapped
+        - phonetic key of the last name, within the parsed birth year or
+          on the parsed month/day (covers a single misread DOB digit)
+        The block is then scored in one rapidfuzz cdist call.
+
         Returns:
             Tuple of (patient_id, confidence) or None if no match
         """
@@ -127,74 +430,49 @@ class IncomingFaxProcessor:
         last_name = parsed.get("last_name")
         dob = parsed.get("dob")
 
-        if not dob:
-            logger.warning("❌ Could not parse DOB from fax - cannot match patient")
-            return None
+        # Keep the parsed identity on the fax for later re-matching/backfills
+        fax_file.parsed_first_name = first_name
+        fax_file.parsed_last_name = last_name
+        fax_file.parsed_dob = dob
 
-        logger.info(f"Parsed info - Name: {first_name} {last_name}, DOB: {dob}")
+        has_name = bool(first_name and last_name)
 
-        # Find all patients with matching DOB
-        result = await self.db.execute(
-            select(Patient).where(Patient.date_of_birth == dob)
-        )
-        candidates = result.scalars().all()
-
-        if not candidates:
-            logger.warning(f"No patients found with DOB {dob}")
+        if not dob and not has_name:
+            logger.warning("❌ Could not parse DOB or name from fax - cannot match patient")
             return None
 
-        logger.info(f"Found {len(candidates)} patient(s) with DOB {dob}")
-
-        # If no name parsed, but only one patient with this DOB
-        if (not first_name or not last_name) and len(candidates) == 1:
-            logger.info(f"Only one patient with DOB {dob}, using that match")
-            return (candidates[0].id, 0.9)
-
-        if not first_name or not last_name:
-            logger.warning("Could not parse patient name and multiple DOB matches exist")
-            return None
-
-        # Fuzzy match names
-        parsed_full_name = f"{first_name} {last_name}".lower()
-        best_match = None
-        best_score = 0
-
-        for patient in candidates:
-            patient_full_name = f"{patient.first_name} {patient.last_name}".lower()
+        logger.info(f"Parsed info - Name: {first_name} {last_name}, DOB: {dob}")
 
-            # Use multiple matching strategies
-            ratio_score = fuzz.ratio(parsed_full_name, patient_full_name)
-            token_sort_score = fuzz.token_sort_ratio(parsed_full_name, patient_full_name)
-            partial_score = fuzz.partial_ratio(parsed_full_name, patient_full_name)
+        name_key = phonetic_key(last_name) if has_name else None
+        candidates = await self._load_patient_block([(dob, name_key)])
 
-            # Take the best score
-            score = max(ratio_score, token_sort_score, partial_score)
+        return _pick_patient(first_name, last_name, dob, candidates)
 
-            logger.debug(
-                f"Patient #{patient.id} ({patient_full_name}): "
-                f"ratio={ratio_score}, token_sort={token_sort_score}, "
-                f"partial={partial_score} → best={score}"
-            )
+    async def _load_patient_block(
+            self,
+            blocks: List[Tuple[Optional[date], Optional[str]]]
+    ) -> list:
+        """
+        Load the candidate block (id, names, DOB only) for one or more parsed
+        identities, given as (dob, last name phonetic key) pairs.
+        """
+        clauses = [clause for clause in (_block_clause(*b) for b in blocks) if clause is not None]
 
-            if score > best_score:
-                best_score = score
-                best_match = patient
+        if not clauses:
+            return []
 
-        # Require minimum score of 80
-        if best_match and best_score >= 80:
-            confidence = best_score / 100.0
-            logger.info(
-                f"Best match: Patient #{best_match.id} "
-                f"({best_match.first_name} {best_match.last_name}) "
-                f"with score {best_score}"
+        result = await self.db.execute(
+            select(
+                Patient.id,
+                Patient.first_name,
+                Patient.last_name,
+                Patient.last_name_key,
+                Patient.date_of_birth
             )
-            return (best_match.id, confidence)
-
-        logger.warning(
-            f"Best match score {best_score} below threshold (80). "
-            "No confident patient match."
+            .where(or_(*clauses))
+            .limit(MAX_PATIENT_BLOCK * len(clauses))
         )
-        return None
+        return result.all()
 
     async def _match_provider_requests(
             self,
@@ -203,7 +481,8 @@ class IncomingFaxProcessor:
         """
         Match fax to provider requests.
 
-        Tries two strategies:
+        Loads the patient's open provider requests (with their providers) in
+        a single joined query, then tries two strategies against them:
         1. Match by fax number
         2. Match by hospital name (content-based)
 
@@ -214,94 +493,86 @@ class IncomingFaxProcessor:
             logger.warning("Cannot match provider requests - no patient linked")
             return []
 
+        candidates = await self._load_open_provider_requests(fax_file.patient_id)
+
+        if not candidates:
+            logger.info(f"No open provider requests for Patient #{fax_file.patient_id}")
+            return []
+
         matched_requests = []
 
         # Strategy 1: Match by fax number
         if fax_file.sender:
             logger.info(f"Trying fax number match: {fax_file.sender}")
-            matches = await self._match_by_fax_number(fax_file)
+            matches = self._match_by_fax_number(fax_file, candidates)
             matched_requests.extend(matches)
 
         # Strategy 2: Match by hospital name (if no fax match)
         if not matched_requests:
             logger.info("Trying hospital name match...")
-            matches = await self._match_by_hospital_name(fax_file)
+            matches = self._match_by_hospital_name(fax_file, candidates)
             matched_requests.extend(matches)
 
-        return matched_requests
+        return await self._record_responses(fax_file, matched_requests)
 
-    async def _match_by_fax_number(
+    async def _load_open_provider_requests(
             self,
-            fax_file: FaxFile
-    ) -> list:
+            patient_id: int
+    ) -> List[Tuple[ProviderRequest, Provider]]:
         """
-        Match fax to provider requests by comparing fax numbers.
-        """
-        sender_normalized = normalize_phone_number(fax_file.sender)
-
-        if not sender_normalized:
-            logger.debug("Could not normalize sender fax number")
-            return []
-
-        logger.debug(f"Normalized sender fax: {sender_normalized}")
+        Load every provider request still awaiting a response for a patient,
+        together with its provider, in one round trip.
 
-        # Get all record requests for this patient
+        record_requests ⋈ provider_requests ⋈ providers, filtered by patient,
+        open request status and awaiting-response provider request status.
+        """
         result = await self.db.execute(
-            select(RecordRequest).where(
+            select(ProviderRequest, Provider)
+            .join(RecordRequest, ProviderRequest.record_request_id == RecordRequest.id)
+            .join(Provider, ProviderRequest.provider_id == Provider.id)
+            .where(
                 and_(
-                    RecordRequest.patient_id == fax_file.patient_id,
-                    RecordRequest.status.in_(['pending', 'in_progress'])
+                    RecordRequest.patient_id == patient_id,
+                    RecordRequest.status.in_(OPEN_REQUEST_STATUSES),
+                    ProviderRequest.status.in_(AWAITING_RESPONSE_STATUSES)
                 )
             )
+            .order_by(ProviderRequest.id)
         )
-        record_requests = result.scalars().all()
-
-        matched_provider_requests = []
-
-        for record_request in record_requests:
-            # Get provider requests for this record request
-            result = await self.db.execute(
-                select(ProviderRequest).where(
-                    and_(
-                        ProviderRequest.record_request_id == record_request.id,
-                        ProviderRequest.status.in_(['fax_sent', 'fax_delivered'])
-                    )
-                )
-            )
-            provider_requests = result.scalars().all()
-
-            for pr in provider_requests:
-                # Get the provider
-                if pr.provider_id:
-                    result = await self.db.execute(
-                        select(Provider).where(Provider.id == pr.provider_id)
-                    )
-                    provider = result.scalar_one_or_none()
+        return [tuple(row) for row in result.all()]
 
-                    if provider and provider.fax:
-                        provider_fax_normalized = normalize_phone_number(provider.fax)
+    def _match_by_fax_number(
+            self,
+            fax_file: FaxFile,
+            candidates: List[Tuple[ProviderRequest, Provider]]
+    ) -> list:
+        """
+        Match fax to provider requests by comparing fax numbers.
+        """
+        sender_key = normalize_phone_number(fax_file.sender)
 
-                        if provider_fax_normalized == sender_normalized:
-                            logger.info(
-                                f"✅ Fax number match! ProviderRequest #{pr.id} "
-                                f"({provider.name})"
-                            )
+        if not sender_key:
+            logger.debug("Could not normalize sender fax number")
+            return []
 
-                            # Update provider request
-                            pr.status = "response_received"
-                            pr.inbound_fax_id = fax_file.id
-                            pr.responded_at = datetime.utcnow()
+        logger.debug(f"Normalized sender fax: {sender_key}")
 
-                            matched_provider_requests.append(pr.id)
+        matched_provider_requests = []
 
-        if matched_provider_requests:
-            await self.db.commit()
+        for pr, provider in candidates:
+            if sender_key in (pr.fax_key, provider.fax_key):
+                logger.info(
+                    f"✅ Fax number match! ProviderRequest #{pr.id} "
+                    f"({provider.name})"
+                )
+                matched_provider_requests.append(pr.id)
 
         return matched_provider_requests
 
-    async def _match_by_hospital_name(
+    def _match_by_hospital_name(
             self,
-            fax_file: FaxFile
+            fax_file: FaxFile,
+            candidates: List[Tuple[ProviderRequest, Provider]]
     ) -> list:
         """
         Match fax to provider requests by extracting and matching hospital names.
@@ -315,116 +586,276 @@ class IncomingFaxProcessor:
 
         logger.info(f"Extracted hospital names: {hospital_names}")
 
-        # Get all record requests for this patient
-        result = await self.db.execute(
-            select(RecordRequest).where(
-                and_(
-                    RecordRequest.patient_id == fax_file.patient_id,
-                    RecordRequest.status.in_(['pending', 'in_progress'])
+        matched_provider_requests = []
+
+        # Score all (extracted name, provider) pairs at once on normalized names
+        matches = best_name_matches(hospital_names, [provider for _, provider in candidates])
+
+        for (pr, provider), (_, hospital_name, score) in zip(candidates, matches):
+            if score >= NAME_MATCH_THRESHOLD:
+                logger.info(
+                    f"✅ Hospital name match! ProviderRequest #{pr.id} "
+                    f"({provider.name}) matched '{hospital_name}' "
+                    f"(score: {score:.0f})"
                 )
-            )
+                matched_provider_requests.append(pr.id)
+
+        return matched_provider_requests
+
+    async def _record_responses(self, fax_file: FaxFile, provider_request_ids: List[int]) -> List[int]:
+        """Mark provider requests as answered by this fax (counters included)."""
+        return await transition_provider_requests(
+            self.db,
+            provider_request_ids,
+            "response_received",
+            inbound_fax_id=fax_file.id,
+            responded_at=datetime.utcnow()
         )
-        record_requests = result.scalars().all()
 
-        matched_provider_requests = []
+    # ------------------------------------------------------------------
+    # Batch processing
+    # ------------------------------------------------------------------
 
-        for record_request in record_requests:
-            # Get provider requests
-            result = await self.db.execute(
-                select(ProviderRequest).where(
-                    and_(
-                        ProviderRequest.record_request_id == record_request.id,
-                        ProviderRequest.status.in_(['fax_sent', 'fax_delivered'])
-                    )
-                )
-            )
-            provider_requests = result.scalars().all()
+    async def process_many(self, fax_ids: List[int], reparse: bool = True) -> Dict[int, bool]:
+        """
+        Process a batch of acquired faxes (OCR text already stored).
 
-            for pr in provider_requests:
-                if pr.provider_id:
-                    result = await self.db.execute(
-                        select(Provider).where(Provider.id == pr.provider_id)
-                    )
-                    provider = result.scalar_one_or_none()
+        Same steps as process_incoming_fax, but the sender routes and
+        candidate patients for the whole batch are preloaded in a few
+        queries, every fax is matched to a patient in memory, then the open
+        requests of just the matched patients are loaded in one more query.
+        Results are written with bulk statements and a single commit. Used
+        for catch-up after outages and for reprocessing.
 
-                    if provider:
-                        # Fuzzy match provider name against extracted hospital names
-                        provider_name_lower = provider.name.lower()
+        Faxes without usable OCR text are marked "failed" so they are not
+        resumed again.
 
-                        for hospital_name in hospital_names:
-                            hospital_name_lower = hospital_name.lower()
+        With reparse=False the persisted parsed identity is used as-is and
+        pages are not re-indexed; this is the re-match path for faxes that
+        were already processed once (see app.services.fax_rematch).
 
-                            score = fuzz.token_sort_ratio(
-                                provider_name_lower,
-                                hospital_name_lower
-                            )
+        Returns:
+            {fax_id: matched_to_patient} for every fax in the batch
 
-                            if score >= 70:
-                                logger.info(
-                                    f"✅ Hospital name match! ProviderRequest #{pr.id} "
-                                    f"({provider.name}) matched '{hospital_name}' "
-                                    f"(score: {score})"
-                                )
+        Raises:
+            Exception: after rolling back the whole batch, so the caller
+                (a job or the resume loop) can retry it
+        """
+        results = {fax_id: False for fax_id in fax_ids}
+        if not fax_ids:
+            return results
 
-                                # Update provider request
-                                pr.status = "response_received"
-                                pr.inbound_fax_id = fax_file.id
-                                pr.responded_at = datetime.utcnow()
+        try:
+            faxes = (await self.db.execute(
+                select(
+                    FaxFile.id,
+                    FaxFile.job_id,
+                    FaxFile.sender,
+                    FaxFile.ocr_text,
+                    FaxFile.parsed_first_name,
+                    FaxFile.parsed_last_name,
+                    FaxFile.parsed_dob
+                )
+                .where(FaxFile.id.in_(fax_ids))
+                .order_by(FaxFile.id)
+            )).all()
+
+            usable = [fax for fax in faxes if _has_usable_text(fax.ocr_text)]
+            unusable = [fax for fax in faxes if not _has_usable_text(fax.ocr_text)]
+            logger.info(f"📦 Batch processing {len(usable)} of {len(fax_ids)} fax(es)")
+
+            # Parse every fax up front (or reuse the persisted identity)
+            parsed = {}
+            for fax in usable:
+                if reparse:
+                    identity = parse_name_and_dob(fax.ocr_text)
+                    first_name, last_name, dob = (
+                        identity.get("first_name"), identity.get("last_name"), identity.get("dob")
+                    )
+                else:
+                    first_name, last_name, dob = (
+                        fax.parsed_first_name, fax.parsed_last_name, fax.parsed_dob
+                    )
+                has_name = bool(first_name and last_name)
+                parsed[fax.id] = (
+                    first_name,
+                    last_name,
+                    dob,
+                    phonetic_key(last_name) if has_name else None,
+                )
 
-                                matched_provider_requests.append(pr.id)
-                                break  # Don't match same provider multiple times
+            # Preload: patients routable by sender number (one query), candidate patients (one query)
+            sender_keys = {normalize_phone_number(fax.sender) for fax in usable} - {None}
+            patients_by_key = await self._load_sender_routes(sender_keys)
+
+            blocks = [(dob, name_key) for _, _, dob, name_key in parsed.values() if dob or name_key]
+            candidates = await self._load_patient_block(blocks) if blocks else []
+
+            usable_ids = [fax.id for fax in usable]
+            fax_updates = [{"id": fax.id, "processing_stage": "failed"} for fax in unusable]
+            page_rows = []
+            unmatched_rows = []
+            matches = []
+
+            for fax in usable:
+                first_name, last_name, dob, name_key = parsed[fax.id]
+                update_row = {"id": fax.id, "processing_stage": "processed"}
+
+                if reparse:
+                    update_row.update({
+                        "parsed_first_name": first_name,
+                        "parsed_last_name": last_name,
+                        "parsed_dob": dob,
+                    })
+                    for page_number, text in split_ocr_pages(fax.ocr_text):
+                        doc_type, score = classify_page(text)
+                        page_rows.append({
+                            "fax_file_id": fax.id,
+                            "page_number": page_number,
+                            "doc_type": doc_type,
+                            "score": score,
+                        })
+
+                # Route by sender number, else pick from the candidate block
+                sender_key = normalize_phone_number(fax.sender)
+                routed = patients_by_key.get(sender_key, set()) if sender_key else set()
+                if len(routed) == 1:
+                    patient_match = (next(iter(routed)), 1.0)
+                elif dob or name_key:
+                    block = [c for c in candidates if _in_block(c, dob, name_key)]
+                    patient_match = _pick_patient(first_name, last_name, dob, block)
+                else:
+                    patient_match = None
+
+                if patient_match:
+                    patient_id = patient_match[0]
+                    update_row["patient_id"] = patient_id
+                    encounter_date = parse_encounter_date(fax.ocr_text)
+                    if encounter_date:
+                        update_row["encounter_date"] = encounter_date
+                    results[fax.id] = True
+                    matches.append((fax, patient_id))
+                else:
+                    unmatched_rows.append(_queue_row(fax.id, fax.sender, last_name, dob))
+
+                fax_updates.append(update_row)
+
+            # Open requests of the matched patients only (one query)
+            by_patient = {}
+            if matches:
+                open_requests = await self._load_open_provider_requests_for(
+                    {patient_id for _, patient_id in matches}
+                )
+                for pr, provider, patient_id in open_requests:
+                    by_patient.setdefault(patient_id, []).append((pr, provider))
+
+            responses = []
+            answered = set()
+            for fax, patient_id in matches:
+                # Requests answered by an earlier fax in this batch are no longer open
+                still_open = [
+                    (pr, provider) for pr, provider in by_patient.get(patient_id, [])
+                    if pr.id not in answered
+                ]
+                matched = self._match_by_fax_number(fax, still_open) if fax.sender else []
+                if not matched:
+                    matched = self._match_by_hospital_name(fax, still_open)
+                if matched:
+                    answered.update(matched)
+                    responses.append((fax, matched))
+
+            # Bulk writes: pages, fax rows, re-match queue, provider request transitions
+            if usable_ids and reparse:
+                await self.db.execute(delete(FaxPage).where(FaxPage.fax_file_id.in_(usable_ids)))
+            if page_rows:
+                await self.db.execute(insert(FaxPage), page_rows)
+            if usable_ids:
+                await self._sync_unmatched_queue(usable_ids, unmatched_rows)
+            for _, rows in _group_by_columns(fax_updates):
+                await self.db.execute(update(FaxFile), rows)
+            for fax, matched in responses:
+                await self._record_responses(fax, matched)
 
-        if matched_provider_requests:
             await self.db.commit()
 
-        return matched_provider_requests
+            logger.info(
+                f"✅ Batch complete: {sum(results.values())} of {len(fax_ids)} "
+                f"fax(es) matched to a patient"
+            )
+            return results
 
-    async def _check_request_completion(self, patient_id: int):
-        """
-        Check if any record requests for this patient are now complete.
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"❌ Error batch processing faxes: {str(e)}", exc_info=True)
+            raise
 
-        A request is complete when all provider requests have either:
-        - response_received
-        - fax_failed
+    async def _load_sender_routes(self, sender_keys: set) -> Dict[str, set]:
         """
+        Patients with requests awaiting a response from each sender fax key;
+        the batch equivalent of _route_by_sender.
+        """
+        if not sender_keys:
+            return {}
         result = await self.db.execute(
-            select(RecordRequest).where(
+            select(ProviderRequest.fax_key, RecordRequest.patient_id)
+            .join(RecordRequest, ProviderRequest.record_request_id == RecordRequest.id)
+            .where(
                 and_(
-                    RecordRequest.patient_id == patient_id,
-                    RecordRequest.status.in_(['pending', 'in_progress'])
+                    ProviderRequest.fax_key.in_(sender_keys),
+                    ProviderRequest.status.in_(AWAITING_RESPONSE_STATUSES),
+                    RecordRequest.status.in_(OPEN_REQUEST_STATUSES)
                 )
             )
+            .distinct()
         )
-        record_requests = result.scalars().all()
+        routes = {}
+        for fax_key, patient_id in result.all():
+            routes.setdefault(fax_key, set()).add(patient_id)
+        return routes
 
-        for rr in record_requests:
-            # Get all provider requests
-            result = await self.db.execute(
-                select(ProviderRequest).where(
-                    ProviderRequest.record_request_id == rr.id
+    async def _load_open_provider_requests_for(
+            self,
+            patient_ids: set
+    ) -> List[Tuple[ProviderRequest, Provider, int]]:
+        """
+        Load the open provider requests (with provider and patient id) of
+        several patients in one joined query; the batch equivalent of
+        _load_open_provider_requests.
+        """
+        result = await self.db.execute(
+            select(ProviderRequest, Provider, RecordRequest.patient_id)
+            .join(RecordRequest, ProviderRequest.record_request_id == RecordRequest.id)
+            .join(Provider, ProviderRequest.provider_id == Provider.id)
+            .where(
+                and_(
+                    RecordRequest.patient_id.in_(patient_ids),
+                    RecordRequest.status.in_(OPEN_REQUEST_STATUSES),
+                    ProviderRequest.status.in_(AWAITING_RESPONSE_STATUSES)
                 )
             )
-            provider_requests = result.scalars().all()
+            .order_by(ProviderRequest.id)
+        )
+        return [tuple(row) for row in result.all()]
 
-            if not provider_requests:
-                continue
 
-            # Check if all are in terminal state
-            terminal_states = ['response_received', 'fax_failed']
-            all_complete = all(
-                pr.status in terminal_states
-                for pr in provider_requests
-            )
+def _has_usable_text(ocr_text: Optional[str]) -> bool:
+    """True if OCR produced text worth matching (not empty or an OCR error marker)."""
+    return bool(ocr_text and ocr_text.strip() and not ocr_text.startswith("[OCR"))
 
-            if all_complete:
-                logger.info(
-                    f"✅ RecordRequest #{rr.id} is now complete "
-                    f"(all providers responded or failed)"
-                )
 
-                # We could compile PDFs here, but for now just mark complete
-                # The compilation happens on-demand in the portal
-                rr.status = "complete"
-                rr.completed_at = datetime.utcnow()
+def _queue_row(fax_id: int, sender: Optional[str], last_name: Optional[str], dob: Optional[date]) -> Dict:
+    """Re-match queue row for an unmatched fax."""
+    return {
+        "fax_file_id": fax_id,
+        "parsed_dob": dob,
+        "last_name_key": phonetic_key(last_name) if last_name else None,
+        "sender_fax_key": normalize_phone_number(sender),
+    }
+
 
-        await self.db.commit()
\ No newline at end of file
+def _group_by_columns(rows: List[Dict]) -> List[Tuple[Tuple[str, ...], List[Dict]]]:
+    """Group bulk-update parameter dicts by their key set (executemany needs uniform keys)."""
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    return list(groups.items())
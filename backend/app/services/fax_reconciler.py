@@ -0,0 +1,184 @@
+"""
+Inbound Fax Reconciliation
+
+Safety net for missed /humblefax/receive webhooks. Each run lists incoming
+faxes from HumbleFax from a persisted high-watermark (SyncCursor) up to a
+little before now, one time window at a time. Each window is written with
+one INSERT ... ON CONFLICT (job_id) DO NOTHING (stage "received"), so faxes
+already stored, or stored concurrently by the webhook, are skipped by the
+unique job_id index. The caller's enqueue callback queues the ingest jobs
+for the inserted rows and the watermark moves forward, all in the same
+transaction, so a fax is never stored without its job or skipped past.
+
+/incomingFaxes is filtered by startDate/endDate and capped by limit, and
+has no offset, so a full window is split in half until each part fits
+under the limit.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.db import engine, get_async_session_context
+from app.models.fax_file import FaxFile
+from app.models.sync_cursor import SyncCursor
+from app.services.humblefax_client import HumbleFaxClient, get_client
+
+logger = logging.getLogger(__name__)
+
+CURSOR_NAME = "humblefax_incoming"
+
+# Time span requested per /incomingFaxes call
+RECONCILE_WINDOW = timedelta(hours=6)
+
+# Smallest window to split down to when a window fills the page
+MIN_WINDOW = timedelta(minutes=1)
+
+# Re-scanned before the watermark on each run, for faxes indexed late
+OVERLAP = timedelta(minutes=10)
+
+# Not reconciled yet; the webhook for these is normally still in flight
+SETTLE_DELAY = timedelta(minutes=2)
+
+# How far back the first run looks when there is no watermark yet
+INITIAL_LOOKBACK = timedelta(days=1)
+
+PAGE_LIMIT = 100
+
+# Queues the inbound pipeline for inserted (FaxFile ID, HumbleFax ID) rows,
+# in the session's transaction
+EnqueueInserted = Callable[[AsyncSession, List[Tuple[int, str]]], Awaitable[None]]
+
+
+class ReconcileError(Exception):
+    """Listing failed; the watermark is left where it was."""
+
+
+async def _fetch_window(client: HumbleFaxClient, start: datetime, end: datetime) -> List[Dict]:
+    """List every incoming fax in [start, end), splitting full windows."""
+    result = await client.get_incoming_faxes(since=start, until=end, limit=PAGE_LIMIT)
+    if not result.success:
+        raise ReconcileError(result.message or result.error)
+
+    if len(result.faxes) < PAGE_LIMIT:
+        return result.faxes
+
+    if end - start <= MIN_WINDOW:
+        logger.warning(
+            f"⚠️ {len(result.faxes)} faxes between {start} and {end} "
+            f"fill the page; some may be missed"
+        )
+        return result.faxes
+
+    middle = start + (end - start) / 2
+    return await _fetch_window(client, start, middle) + await _fetch_window(client, middle, end)
+
+
+def _received_time(fax: Dict) -> datetime:
+    try:
+        return datetime.fromtimestamp(int(fax.get("time")))
+    except (TypeError, ValueError):
+        return datetime.utcnow()
+
+
+async def insert_fax_files(db: AsyncSession, rows: List[Dict]) -> List[Tuple[int, str]]:
+    """
+    Insert fax_files rows in one statement, skipping any whose job_id is
+    already stored. Two writers racing on the same HumbleFax ID (webhook
+    retries, webhook vs. reconciler) get exactly one row between them.
+
+    Returns:
+        (FaxFile ID, HumbleFax ID) for each row actually inserted
+    """
+    if not rows:
+        return []
+    insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+    result = await db.execute(
+        insert(FaxFile)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=[FaxFile.job_id])
+        .returning(FaxFile.id, FaxFile.job_id)
+    )
+    return [(fax_id, job_id) for fax_id, job_id in result.all()]
+
+
+async def _record_window(
+        faxes: List[Dict],
+        window_end: datetime,
+        enqueue: EnqueueInserted
+) -> List[Tuple[int, str]]:
+    """
+    Insert rows for faxes we have never seen, enqueue their ingest jobs and
+    advance the watermark, in one transaction.
+
+    Returns:
+        (FaxFile ID, HumbleFax ID) for each inserted fax
+    """
+    by_id = {str(fax["id"]): fax for fax in faxes if fax.get("id") is not None}
+
+    async with get_async_session_context() as db:
+        inserted = await insert_fax_files(db, [
+            dict(
+                job_id=job_id,
+                transaction_id=job_id,
+                sender=fax.get("fromNumber") or fax.get("from") or "",
+                receiver=fax.get("toNumber") or fax.get("to") or "",
+                received_time=_received_time(fax),
+                file_path="",
+                ocr_text="",
+            )
+            for job_id, fax in by_id.items()
+        ])
+
+        if inserted:
+            await enqueue(db, inserted)
+
+        cursor = await db.get(SyncCursor, CURSOR_NAME)
+        if cursor is None:
+            db.add(SyncCursor(name=CURSOR_NAME, watermark=window_end))
+        else:
+            cursor.watermark = window_end
+
+        await db.commit()
+
+        return inserted
+
+
+async def reconcile_incoming_faxes(
+        enqueue: EnqueueInserted,
+        now: Optional[datetime] = None
+) -> List[Tuple[int, str]]:
+    """
+    Fetch incoming faxes since the watermark and insert the missing ones.
+
+    Stops at the first failed listing; windows already recorded stay
+    recorded and the next run resumes from the last one.
+
+    Args:
+        enqueue: Awaited with each window's inserted rows before its commit
+        now: Current time (for tests)
+
+    Returns:
+        (FaxFile ID, HumbleFax ID) for each newly inserted fax
+    """
+    now = now or datetime.utcnow()
+    horizon = now - SETTLE_DELAY
+
+    async with get_async_session_context() as db:
+        cursor = await db.get(SyncCursor, CURSOR_NAME)
+        start = cursor.watermark - OVERLAP if cursor else now - INITIAL_LOOKBACK
+
+    client = get_client()
+    inserted = []
+    while start < horizon:
+        end = min(start + RECONCILE_WINDOW, horizon)
+        faxes = await _fetch_window(client, start, end)
+        inserted += await _record_window(faxes, end, enqueue)
+        start = end
+
+    if inserted:
+        logger.warning(f"📥 Reconciler found {len(inserted)} fax(es) with no webhook delivery")
+    return inserted
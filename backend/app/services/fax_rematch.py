@@ -0,0 +1,112 @@
+"""
+Unmatched Fax Re-matching
+
+Faxes that could not be linked to a patient wait in the unmatched_faxes
+queue with their parsed identity keys. When a patient registers or a record
+request is created, only the queue entries those new keys can explain are
+looked up (by DOB, last-name phonetic key, or sender fax key) and re-run
+through IncomingFaxProcessor.process_many using the persisted parsed
+identity - no OCR and no scan of fax_files.
+
+The web app only enqueues a rematch job (enqueue_rematch) in the same
+transaction as the registration or record request; the worker runs it.
+A failed re-match raises out of the job, which is retried with backoff,
+so the faxes are not left orphaned.
+"""
+
+import logging
+from datetime import date
+from typing import Iterable, Optional
+
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.db import get_async_session_context
+from app.models.unmatched_fax import UnmatchedFax
+from app.services.fax_processor import IncomingFaxProcessor
+from app.services.job_queue import enqueue_job, job_handler
+from app.utils.parsing import phonetic_key, swap_day_month
+
+logger = logging.getLogger(__name__)
+
+REMATCH_JOB = "rematch_faxes"
+
+
+async def rematch_unmatched_faxes(
+        dobs: Iterable[Optional[date]] = (),
+        last_names: Iterable[Optional[str]] = (),
+        fax_keys: Iterable[Optional[str]] = ()
+) -> int:
+    """
+    Re-match queued faxes whose keys overlap the given identities.
+
+    DOBs also match their day/month-swapped form; last names are compared
+    by phonetic key, which covers a misread DOB digit.
+
+    Returns:
+        Number of faxes now matched to a patient
+    """
+    dob_set = set()
+    for dob in dobs:
+        if dob:
+            dob_set.add(dob)
+            swapped = swap_day_month(dob)
+            if swapped:
+                dob_set.add(swapped)
+    name_keys = {key for key in (phonetic_key(name) for name in last_names if name) if key}
+    fax_key_set = {key for key in fax_keys if key}
+
+    clauses = []
+    if dob_set:
+        clauses.append(UnmatchedFax.parsed_dob.in_(dob_set))
+    if name_keys:
+        clauses.append(UnmatchedFax.last_name_key.in_(name_keys))
+    if fax_key_set:
+        clauses.append(UnmatchedFax.sender_fax_key.in_(fax_key_set))
+
+    if not clauses:
+        return 0
+
+    async with get_async_session_context() as db:
+        result = await db.execute(
+            select(UnmatchedFax.fax_file_id).where(or_(*clauses)).order_by(UnmatchedFax.fax_file_id)
+        )
+        fax_ids = result.scalars().all()
+
+        if not fax_ids:
+            return 0
+
+        logger.info(f"🔁 Re-matching {len(fax_ids)} queued unmatched fax(es)")
+        results = await IncomingFaxProcessor(db).process_many(fax_ids, reparse=False)
+
+    matched = sum(results.values())
+    if matched:
+        logger.info(f"✅ Re-matched {matched} previously unmatched fax(es)")
+    return matched
+
+
+async def enqueue_rematch(
+        db: AsyncSession,
+        dobs: Iterable[Optional[date]] = (),
+        last_names: Iterable[Optional[str]] = (),
+        fax_keys: Iterable[Optional[str]] = ()
+) -> Optional[int]:
+    """Queue rematch_unmatched_faxes for these identities; the caller commits."""
+    payload = {
+        "dobs": [dob.isoformat() for dob in dobs if dob],
+        "last_names": [name for name in last_names if name],
+        "fax_keys": [key for key in fax_keys if key],
+    }
+    if not any(payload.values()):
+        return None
+    return await enqueue_job(db, REMATCH_JOB, payload)
+
+
+@job_handler(REMATCH_JOB)
+async def _rematch_job(payload: dict) -> None:
+    """Errors from process_many propagate so JobRunner retries the job."""
+    await rematch_unmatched_faxes(
+        dobs=[date.fromisoformat(dob) for dob in payload["dobs"]],
+        last_names=payload["last_names"],
+        fax_keys=payload["fax_keys"],
+    )
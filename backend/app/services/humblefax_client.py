@@ -0,0 +1,1010 @@
+"""
+Async HumbleFax API Client
+
+Pooled, keep-alive HTTP client for the HumbleFax API, for use from async
+code (routers, background tasks, workers). One shared httpx.AsyncClient
+per process reuses TLS connections across calls instead of opening a new
+connection per request, and never blocks the event loop. Every call draws
+from a per-endpoint token bucket shared by all processes on the host
+(app.services.rate_limiter), and transient failures are retried with
+jittered exponential backoff, honoring Retry-After.
+
+The blocking functions in app.services.humblefax_service are thin wrappers
+around this client for scripts.
+
+Usage:
+    client = get_client()
+    result = await client.send_fax(to_number="+15551234567", file_paths=[...])
+    if result.success:
+        job_id = result.tmp_fax_id
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import re
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.services.rate_limiter import get_bucket
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# HumbleFax credentials from environment
+HUMBLEFAX_ACCESS_KEY = os.getenv("HUMBLEFAX_ACCESS_KEY")
+HUMBLEFAX_SECRET_KEY = os.getenv("HUMBLEFAX_SECRET_KEY")
+
+# Base URL for HumbleFax API (overridable for staging / local fakes)
+BASE_URL = os.getenv("HUMBLEFAX_BASE_URL", "https://api.humblefax.com").rstrip("/")
+
+# Timeouts (seconds)
+DOWNLOAD_TIMEOUT = 60
+UPLOAD_TIMEOUT = 120
+LIST_TIMEOUT = 30
+CONTROL_TIMEOUT = 30
+CONNECT_TIMEOUT = 10
+
+# Per-endpoint timeouts; connect is kept short so a dead host fails fast
+TIMEOUTS = {
+    "list": httpx.Timeout(LIST_TIMEOUT, connect=CONNECT_TIMEOUT),
+    "download": httpx.Timeout(DOWNLOAD_TIMEOUT, connect=CONNECT_TIMEOUT),
+    "upload": httpx.Timeout(UPLOAD_TIMEOUT, connect=CONNECT_TIMEOUT),
+    "control": httpx.Timeout(CONTROL_TIMEOUT, connect=CONNECT_TIMEOUT),
+}
+
+# Streamed download chunk size (bytes)
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Where inbound fax PDFs are saved
+RECEIVED_DIR = "received_faxes"
+
+# Retries for transient failures (429, 5xx, timeouts, connection errors)
+MAX_RETRIES = int(os.getenv("HUMBLEFAX_MAX_RETRIES", "4"))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+RETRY_AFTER_CAP = 120.0
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Circuit breaker: consecutive failed calls (after retries) that open the
+# circuit, and how long it stays open before a probe call is let through
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("HUMBLEFAX_BREAKER_THRESHOLD", "5"))
+BREAKER_OPEN_SECONDS = float(os.getenv("HUMBLEFAX_BREAKER_OPEN_SECONDS", "60"))
+
+# Connection pool
+MAX_CONNECTIONS = int(os.getenv("HUMBLEFAX_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HUMBLEFAX_MAX_KEEPALIVE", "10"))
+KEEPALIVE_EXPIRY = 60
+
+
+# ============================================================================
+# RESULT TYPES
+# ============================================================================
+
+@dataclass
+class FaxListResult:
+    """Result of listing incoming faxes."""
+    success: bool
+    faxes: List[Dict] = field(default_factory=list)
+    error: Optional[str] = None
+    message: str = ""
+    status: Optional[int] = None
+
+
+@dataclass
+class DownloadResult:
+    """Result of downloading an incoming fax PDF."""
+    success: bool
+    file_path: Optional[str] = None
+    sha256: Optional[str] = None
+    size: int = 0
+    error: Optional[str] = None
+    message: str = ""
+    status: Optional[int] = None
+    # True when the failure was transient (throttling, server error, outage),
+    # so the same download is worth trying again later
+    retryable: bool = False
+
+    def to_dict(self) -> Dict:
+        """Legacy dict shape returned by humblefax_service.download_incoming_fax."""
+        return {k: v for k, v in asdict(self).items() if v is not None and k != "retryable"}
+
+
+@dataclass
+class SendResult:
+    """Result of sending an outbound fax."""
+    success: bool
+    tmp_fax_id: Optional[str] = None
+    recipient: Optional[str] = None
+    error: Optional[str] = None
+    message: str = ""
+    status: Optional[int] = None
+    # True when the failure was transient and the fax was certainly not sent,
+    # so the same send can safely be tried again later
+    retryable: bool = False
+    # Formatted recipient number -> HumbleFax per-recipient ID, when reported
+    recipient_ids: Dict[int, str] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        """Legacy dict shape returned by humblefax_service.send_fax."""
+        result = {"success": self.success, "message": self.message}
+        if self.tmp_fax_id is not None:
+            result["tmpFaxId"] = self.tmp_fax_id
+        if self.recipient is not None:
+            result["recipient"] = self.recipient
+        if self.error is not None:
+            result["error"] = self.error
+        if self.status is not None:
+            result["status"] = self.status
+        return result
+
+
+@dataclass
+class SentFaxStatus:
+    """Delivery status of a sent fax (delivered|failed|in_progress)."""
+    success: bool
+    status: Optional[str] = None
+    error: Optional[str] = None
+    message: str = ""
+    http_status: Optional[int] = None
+    # Per-recipient (status, error) by recipient ID or formatted number,
+    # for multi-recipient faxes
+    recipients: Dict[str, Tuple[str, Optional[str]]] = field(default_factory=dict)
+
+
+# HumbleFax sentFax statuses -> our delivery status. Shared by the status
+# poller and the outbound-status webhook. "sent" only means HumbleFax
+# accepted the fax for transmission, so it stays in progress.
+SENT_FAX_STATUSES = {
+    "delivered": "delivered",
+    "success": "delivered",
+    "sent": "in_progress",
+    "failed": "failed",
+    "failure": "failed",
+    "cancelled": "failed",
+}
+
+
+def delivery_status(raw_status: Optional[str]) -> str:
+    """Our delivery status (delivered|failed|in_progress) for a HumbleFax status."""
+    return SENT_FAX_STATUSES.get(str(raw_status or "").lower(), "in_progress")
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def get_auth() -> Optional[tuple]:
+    """
+    Get HTTP Basic Auth tuple for requests.
+
+    Returns:
+        Tuple of (username, password) or None if not configured
+    """
+    if not HUMBLEFAX_ACCESS_KEY or not HUMBLEFAX_SECRET_KEY:
+        logger.error("❌ HumbleFax credentials not configured in environment")
+        return None
+    return (HUMBLEFAX_ACCESS_KEY, HUMBLEFAX_SECRET_KEY)
+
+
+def validate_fax_number(fax: str) -> bool:
+    """
+    Validate fax number format.
+
+    Args:
+        fax: Fax number string
+
+    Returns:
+        True if valid, False otherwise
+    """
+    if not fax:
+        return False
+    # Remove all non-digits
+    digits = re.sub(r'\D', '', fax)
+    # Should be 10-15 digits
+    return 10 <= len(digits) <= 15
+
+
+def format_fax_number(fax: str) -> int:
+    """
+    Format fax number for HumbleFax API.
+
+    HumbleFax expects fax numbers as integers (no formatting).
+
+    Args:
+        fax: Fax number in any format (e.g., "+1 555-123-4567")
+
+    Returns:
+        Integer fax number (e.g., 15551234567)
+
+    Example:
+        format_fax_number("+1 (555) 123-4567")  # Returns: 15551234567
+    """
+    # Remove all non-digits
+    digits = re.sub(r'\D', '', fax)
+
+    # If it's 10 digits, assume US and add country code 1
+    if len(digits) == 10:
+        digits = f"1{digits}"
+
+    return int(digits)
+
+
+def _extract_faxes(data) -> List[Dict]:
+    """Pull the incoming fax list out of the (loosely specified) response body."""
+    # HumbleFax likely returns: {"data": {"incomingFaxes": [...]}}
+    if isinstance(data, dict):
+        inner = data.get('data')
+        faxes = inner.get('incomingFaxes', []) if isinstance(inner, dict) else []
+        if not faxes:
+            # Try flat structure
+            faxes = data.get('incomingFaxes', [])
+        if not faxes and isinstance(inner, list):
+            # Maybe data is the array itself
+            faxes = inner
+        return faxes
+    if isinstance(data, list):
+        # Direct array response
+        return data
+    logger.error(f"Unexpected response format: {type(data)}")
+    return []
+
+
+def _recipient_number(recipient: Dict) -> Optional[int]:
+    number = recipient.get("toNumber") or recipient.get("faxNumber") or recipient.get("number")
+    return format_fax_number(str(number)) if number else None
+
+
+def _extract_recipient_ids(data) -> Dict[int, str]:
+    """
+    Per-recipient IDs from a /send response, by formatted number. HumbleFax
+    may list recipients as objects with an ID or as bare numbers; only the
+    former carry an ID.
+    """
+    inner = data.get("data") if isinstance(data, dict) else None
+    sent_fax = inner.get("sentFax") if isinstance(inner, dict) else None
+    if not isinstance(sent_fax, dict):
+        return {}
+
+    recipient_ids = {}
+    for recipient in sent_fax.get("recipients") or []:
+        if isinstance(recipient, dict) and recipient.get("id") is not None:
+            number = _recipient_number(recipient)
+            if number:
+                recipient_ids[number] = str(recipient["id"])
+    return recipient_ids
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling HumbleFax while the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed: calls go through; BREAKER_FAILURE_THRESHOLD failures in a row
+    open it. open: calls fail fast with CircuitOpenError for
+    BREAKER_OPEN_SECONDS. half-open: one probe call is let through; success
+    closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 open_seconds: float = BREAKER_OPEN_SECONDS):
+        self.threshold = threshold
+        self.open_seconds = open_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        # monotonic start of the in-flight half-open probe, if any
+        self._probe_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.open_seconds:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> bool:
+        """
+        Raise CircuitOpenError unless a call may go through.
+
+        Returns:
+            True if this call is the half-open probe
+        """
+        state = self.state
+        if state == "closed":
+            return False
+
+        now = time.monotonic()
+        # A probe that never reported back (e.g. cancelled) expires
+        probing = self._probe_started is not None and now - self._probe_started < self.open_seconds
+        if state == "open" or probing:
+            raise CircuitOpenError("HumbleFax circuit is open")
+
+        self._probe_started = now
+        return True
+
+    def check(self) -> None:
+        """Raise CircuitOpenError if the circuit is open (no probe taken)."""
+        if self.state == "open":
+            raise CircuitOpenError("HumbleFax circuit is open")
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("✅ HumbleFax circuit closed")
+        self.failures = 0
+        self.opened_at = None
+        self._probe_started = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_started = None
+        if self.opened_at is not None or self.failures >= self.threshold:
+            if self.state != "open":
+                logger.error(
+                    f"🚫 HumbleFax circuit opened after {self.failures} failure(s); "
+                    f"failing fast for {self.open_seconds:.0f}s"
+                )
+            self.opened_at = time.monotonic()
+
+
+# ============================================================================
+# CLIENT
+# ============================================================================
+
+class HumbleFaxClient:
+    """
+    Async HumbleFax API client over a shared, keep-alive connection pool.
+
+    The underlying httpx.AsyncClient is created lazily on first use and is
+    bound to the running event loop; call aclose() on shutdown.
+    """
+
+    def __init__(
+            self,
+            base_url: str = BASE_URL,
+            access_key: Optional[str] = HUMBLEFAX_ACCESS_KEY,
+            secret_key: Optional[str] = HUMBLEFAX_SECRET_KEY,
+            max_connections: int = MAX_CONNECTIONS,
+            max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS
+    ):
+        self.base_url = base_url
+        self.auth = (access_key, secret_key) if access_key and secret_key else None
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        )
+        self._http: Optional[httpx.AsyncClient] = None
+        self.breaker = CircuitBreaker()
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                auth=self.auth,
+                limits=self.limits,
+                timeout=TIMEOUTS["control"],
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+
+    async def __aenter__(self) -> "HumbleFaxClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def _request(
+            self,
+            kind: str,
+            method: str,
+            url: str,
+            *,
+            idempotent: bool = True,
+            stream: bool = False,
+            **kwargs
+    ) -> httpx.Response:
+        """
+        Send one API request through the shared rate limiter, retrying
+        transient failures with exponential backoff and full jitter.
+
+        A Retry-After header is honored as the minimum wait. Non-idempotent
+        calls (sending a fax) are only retried when the request certainly
+        had no effect: a 429, or a failure to connect. A timeout
+        or 5xx there is returned/raised as is rather than risking a second
+        fax.
+
+        Args:
+            kind: Endpoint kind for timeouts and rate budgets
+                  (list|download|upload|control)
+            method: HTTP method
+            url: Path relative to the base URL
+            idempotent: Whether the call may be safely repeated
+            stream: Return an unread streaming response (caller closes it)
+
+        The circuit breaker is checked before every attempt, so an open
+        circuit stops retries at once, and the final outcome (transport
+        error or 5xx vs anything else) is recorded on it.
+
+        Returns:
+            The final response; raises the last httpx error if every
+            attempt failed without one, or CircuitOpenError
+        """
+        kwargs.setdefault("timeout", TIMEOUTS[kind])
+        bucket = get_bucket(kind)
+
+        try:
+            response = await self._request_with_retries(kind, method, url, bucket, idempotent, stream, kwargs)
+        except CircuitOpenError:
+            raise
+        except httpx.HTTPError:
+            self.breaker.record_failure()
+            raise
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    async def _request_with_retries(self, kind, method, url, bucket, idempotent, stream, kwargs):
+        # The half-open probe gets a single attempt
+        attempts = 1 if self.breaker.before_call() else MAX_RETRIES + 1
+
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            if attempt:
+                self.breaker.check()
+            await bucket.acquire()
+
+            try:
+                request = self.http.build_request(method, url, **kwargs)
+                response = await self.http.send(request, stream=stream)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                if last:
+                    raise
+                delay = _backoff(attempt)
+                logger.warning(f"🔁 {method} {url} could not connect ({e}); retry in {delay:.1f}s")
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                if last or not idempotent:
+                    raise
+                delay = _backoff(attempt)
+                logger.warning(f"🔁 {method} {url} failed ({e}); retry in {delay:.1f}s")
+            else:
+                status = response.status_code
+                retryable = status == 429 or (idempotent and status in RETRYABLE_STATUSES)
+                if last or not retryable:
+                    return response
+
+                delay = max(_backoff(attempt), _retry_after(response))
+                if stream:
+                    await response.aclose()
+                logger.warning(f"🔁 {method} {url} returned {status}; retry in {delay:.1f}s")
+
+            await asyncio.sleep(delay)
+
+    # ------------------------------------------------------------------
+    # Incoming faxes
+    # ------------------------------------------------------------------
+
+    async def get_incoming_faxes(
+            self,
+            since: Optional[datetime] = None,
+            until: Optional[datetime] = None,
+            limit: int = 100
+    ) -> FaxListResult:
+        """
+        List incoming faxes.
+
+        Endpoint: GET /incomingFaxes
+
+        Args:
+            since: Start datetime (defaults to 24 hours ago)
+            until: End datetime (defaults to now)
+            limit: Maximum number of results (default 100)
+        """
+        if not self.auth:
+            logger.error("Cannot fetch incoming faxes - missing credentials")
+            return FaxListResult(False, error="missing_credentials",
+                                 message="HumbleFax credentials not configured")
+
+        # Set defaults
+        if since is None:
+            since = datetime.utcnow() - timedelta(hours=24)
+        if until is None:
+            until = datetime.utcnow()
+
+        # Format dates for API (ISO 8601 with Z suffix)
+        start_date = since.strftime("%Y-%m-%dT%H:%M:%S") + "Z"
+        end_date = until.strftime("%Y-%m-%dT%H:%M:%S") + "Z"
+
+        logger.info(f"🔍 Fetching incoming faxes: {start_date} to {end_date}")
+
+        try:
+            response = await self._request(
+                "list", "GET", "/incomingFaxes",
+                params={"startDate": start_date, "endDate": end_date, "limit": limit},
+            )
+
+            if response.status_code != 200:
+                logger.error(
+                    f"❌ Failed to fetch incoming faxes: "
+                    f"{response.status_code} - {response.text}"
+                )
+                return FaxListResult(False, error="list_failed", status=response.status_code,
+                                     message=f"HTTP {response.status_code}: {response.text[:200]}")
+
+            faxes = _extract_faxes(response.json())
+            logger.info(f"✅ Retrieved {len(faxes)} incoming faxes")
+
+            # Log sample for debugging (first fax only)
+            if faxes:
+                logger.debug(f"Sample fax structure: {faxes[0]}")
+
+            return FaxListResult(True, faxes=faxes, message=f"Retrieved {len(faxes)} faxes")
+
+        except CircuitOpenError as e:
+            return FaxListResult(False, error="circuit_open", message=str(e))
+        except httpx.TimeoutException:
+            logger.error("⏱️ Request timeout while fetching incoming faxes")
+            return FaxListResult(False, error="timeout", message="Request timed out")
+        except httpx.HTTPError as e:
+            logger.error(f"❌ Request failed: {e}")
+            return FaxListResult(False, error="request_failed", message=f"HTTP request failed: {e}")
+        except Exception as e:
+            logger.exception(f"❌ Unexpected error fetching incoming faxes: {e}")
+            return FaxListResult(False, error="unexpected_error", message=str(e))
+
+    async def download_incoming_fax(self, fax_id: str, out_dir: str = RECEIVED_DIR) -> DownloadResult:
+        """
+        Stream a specific incoming fax PDF to disk.
+
+        Endpoint: GET /incomingFax/{id}/download
+
+        The body is written in chunks to a temp file next to the final path
+        and hashed as it arrives, then renamed into place, so memory use does
+        not grow with the fax size and a partial download never appears at
+        <out_dir>/<fax_id>.pdf.
+
+        Args:
+            fax_id: The HumbleFax fax ID
+            out_dir: Directory to save the PDF in (default received_faxes/)
+        """
+        if not self.auth:
+            return DownloadResult(False, error="missing_credentials",
+                                  message="HumbleFax credentials not configured")
+
+        logger.info(f"📥 Downloading incoming fax: {fax_id}")
+
+        os.makedirs(out_dir, exist_ok=True)
+        out_path = os.path.join(out_dir, f"{fax_id}.pdf")
+        tmp_path = f"{out_path}.part"
+
+        try:
+            response = await self._request(
+                "download", "GET", f"/incomingFax/{fax_id}/download", stream=True
+            )
+            try:
+                if response.status_code != 200:
+                    body = (await response.aread()).decode(errors="replace")
+                    logger.error(f"❌ Download failed: {response.status_code} - {body}")
+                    return DownloadResult(False, error="download_failed", status=response.status_code,
+                                          message=f"HTTP {response.status_code}: {body[:200]}",
+                                          retryable=_transient(response.status_code))
+
+                digest = hashlib.sha256()
+                size = 0
+                head = b""
+                with open(tmp_path, "wb") as f:
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+                        if len(head) < 4:
+                            head += chunk[:4]
+            finally:
+                await response.aclose()
+
+            # Validate PDF data
+            if size < 100:
+                logger.error("❌ Downloaded data is too small to be a valid PDF")
+                os.remove(tmp_path)
+                return DownloadResult(False, error="invalid_pdf",
+                                      message=f"Downloaded data is only {size} bytes")
+
+            # Check if it's actually a PDF (starts with %PDF)
+            if not head.startswith(b'%PDF'):
+                # Don't fail - some PDFs might be wrapped differently
+                logger.warning("⚠️ Downloaded data doesn't start with PDF signature")
+
+            os.replace(tmp_path, out_path)
+            logger.info(f"✅ Saved {size} bytes to: {out_path}")
+
+            return DownloadResult(True, file_path=out_path, sha256=digest.hexdigest(), size=size,
+                                  message=f"Downloaded {size} bytes")
+
+        except CircuitOpenError as e:
+            return DownloadResult(False, error="circuit_open", message=str(e), retryable=True)
+        except httpx.TimeoutException:
+            logger.error(f"⏱️ Download timeout for fax {fax_id}")
+            return DownloadResult(False, error="timeout",
+                                  message=f"Download timed out after {DOWNLOAD_TIMEOUT}s", retryable=True)
+        except httpx.HTTPError as e:
+            logger.error(f"❌ Request failed: {e}")
+            return DownloadResult(False, error="request_failed", message=f"HTTP request failed: {e}",
+                                  retryable=True)
+        except Exception as e:
+            logger.exception(f"❌ Unexpected error downloading fax: {e}")
+            return DownloadResult(False, error="unexpected_error", message=str(e), retryable=True)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    # ------------------------------------------------------------------
+    # Outbound faxes
+    # ------------------------------------------------------------------
+
+    async def send_fax(
+            self,
+            *,
+            to_number: str,
+            file_paths: List[str],
+            cover_text: Optional[str] = None,
+            from_name: Optional[str] = None,
+            to_name: Optional[str] = None,
+            callback_url: Optional[str] = None
+    ) -> SendResult:
+        """
+        Send a fax using the multi-step process:
+        1. Create temporary fax
+        2. Upload attachments
+        3. Send the fax
+
+        Args:
+            to_number: Recipient fax number (e.g., "+1 555-123-4567")
+            file_paths: List of file paths to send (PDFs, DOCs, etc.)
+            cover_text: Optional cover page message
+            from_name: Optional sender name for cover page
+            to_name: Optional recipient name for cover page
+            callback_url: Optional webhook URL for status updates
+        """
+        result = await self.send_batch_fax(
+            to_numbers=[to_number],
+            file_paths=file_paths,
+            cover_text=cover_text,
+            from_name=from_name,
+            to_name=to_name,
+            callback_url=callback_url,
+        )
+        result.recipient = to_number if result.success else None
+        return result
+
+    async def send_batch_fax(
+            self,
+            *,
+            to_numbers: List[str],
+            file_paths: List[str],
+            cover_text: Optional[str] = None,
+            from_name: Optional[str] = None,
+            to_name: Optional[str] = None,
+            callback_url: Optional[str] = None
+    ) -> SendResult:
+        """
+        Send one document to several recipients as a single tmpFax, so the
+        create/upload/send calls are made once rather than per recipient.
+
+        Per-recipient IDs reported by HumbleFax are returned in
+        SendResult.recipient_ids, keyed by formatted fax number. Duplicate
+        numbers are sent once.
+
+        Args:
+            to_numbers: Recipient fax numbers; all must be valid
+            file_paths, cover_text, from_name, to_name, callback_url: As for send_fax
+        """
+        if not self.auth:
+            return SendResult(False, error="missing_credentials",
+                              message="HumbleFax API credentials not configured")
+
+        # Validate and format fax numbers
+        invalid = [number for number in to_numbers if not validate_fax_number(number)]
+        if invalid or not to_numbers:
+            logger.error(f"❌ Invalid fax number format: {', '.join(invalid)}")
+            return SendResult(False, error="invalid_fax_number",
+                              message=f"Invalid fax number: {', '.join(invalid)}")
+
+        formatted_faxes = list(dict.fromkeys(format_fax_number(number) for number in to_numbers))
+        to_number = ", ".join(to_numbers)
+        logger.info(f"📤 Sending fax to: {to_number} (formatted: {formatted_faxes})")
+
+        # Validate files exist
+        for path in file_paths:
+            if not os.path.exists(path):
+                logger.error(f"❌ File not found: {path}")
+                return SendResult(False, error="file_not_found", message=f"File not found: {path}")
+
+        sending = False
+        try:
+            # ===============================================================
+            # STEP 1: Create temporary fax
+            # ===============================================================
+            logger.info("📋 Step 1: Creating temporary fax")
+
+            tmp_fax_payload = {
+                "recipients": formatted_faxes,
+                "resolution": "Fine",
+                "pageSize": "Letter",
+                "includeCoversheet": bool(cover_text)
+            }
+
+            # Add cover page details if provided
+            if cover_text:
+                tmp_fax_payload["message"] = cover_text
+            if from_name:
+                tmp_fax_payload["fromName"] = from_name
+            if to_name:
+                tmp_fax_payload["toName"] = to_name
+
+            # A duplicate tmpFax is never sent, so creation is safe to retry
+            response = await self._request("control", "POST", "/tmpFax", json=tmp_fax_payload)
+
+            if response.status_code != 200:
+                logger.error(f"❌ Failed to create temp fax: {response.status_code} - {response.text}")
+                return SendResult(False, error="create_tmpfax_failed", status=response.status_code,
+                                  message=f"Failed to create temp fax: {response.text[:200]}",
+                                  retryable=_transient(response.status_code))
+
+            tmp_fax_data = response.json()
+
+            # Extract tmpFax ID from response
+            if 'data' not in tmp_fax_data or 'tmpFax' not in tmp_fax_data['data']:
+                logger.error(f"❌ Invalid tmpFax response: {tmp_fax_data}")
+                return SendResult(False, error="invalid_response",
+                                  message="Invalid response from tmpFax creation")
+
+            tmp_fax_id = str(tmp_fax_data['data']['tmpFax']['id'])
+            logger.info(f"✅ Created temp fax: {tmp_fax_id}")
+
+            # ===============================================================
+            # STEP 2: Upload attachments
+            # ===============================================================
+            logger.info(f"📎 Step 2: Uploading {len(file_paths)} attachment(s)")
+
+            for file_path in file_paths:
+                file_name = os.path.basename(file_path)
+                logger.info(f"  Uploading: {file_name}")
+
+                try:
+                    content = await asyncio.to_thread(Path(file_path).read_bytes)
+                    # Re-uploading to an unsent tmpFax is harmless, so uploads retry
+                    upload_response = await self._request(
+                        "upload", "POST", f"/attachment/{tmp_fax_id}",
+                        files={file_name: (file_name, content)},
+                    )
+                except (CircuitOpenError, httpx.HTTPError) as e:
+                    logger.error(f"❌ Error uploading {file_name}: {e}")
+                    return SendResult(False, error="upload_exception", tmp_fax_id=tmp_fax_id,
+                                      message=f"Error uploading {file_name}: {str(e)}", retryable=True)
+                except Exception as e:
+                    logger.exception(f"❌ Error uploading {file_name}: {e}")
+                    return SendResult(False, error="upload_exception", tmp_fax_id=tmp_fax_id,
+                                      message=f"Error uploading {file_name}: {str(e)}")
+
+                if upload_response.status_code != 200:
+                    logger.error(
+                        f"❌ Failed to upload {file_name}: "
+                        f"{upload_response.status_code} - {upload_response.text}"
+                    )
+                    return SendResult(False, error="upload_failed", tmp_fax_id=tmp_fax_id,
+                                      status=upload_response.status_code,
+                                      message=f"Failed to upload {file_name}",
+                                      retryable=_transient(upload_response.status_code))
+
+                logger.info(f"  ✅ Uploaded: {file_name}")
+
+            # ===============================================================
+            # STEP 3: Send the fax
+            # ===============================================================
+            logger.info("📨 Step 3: Sending fax")
+            sending = True
+
+            send_response = await self._request(
+                "control", "POST", f"/tmpFax/{tmp_fax_id}/send", idempotent=False
+            )
+
+            if send_response.status_code != 200:
+                logger.error(f"❌ Failed to send fax: {send_response.status_code} - {send_response.text}")
+                # A 5xx here may still have sent the fax; only a 429 certainly did not
+                return SendResult(False, error="send_failed", tmp_fax_id=tmp_fax_id,
+                                  status=send_response.status_code,
+                                  message=f"Failed to send fax: {send_response.text[:200]}",
+                                  retryable=send_response.status_code == 429)
+
+            try:
+                recipient_ids = _extract_recipient_ids(send_response.json())
+            except ValueError:
+                recipient_ids = {}
+
+            logger.info(f"✅ Fax sent successfully: {tmp_fax_id}")
+            return SendResult(True, tmp_fax_id=tmp_fax_id, recipient=to_number,
+                              message=f"Fax sent to {to_number}", recipient_ids=recipient_ids)
+
+        except CircuitOpenError as e:
+            # Raised before any request is made, so nothing was sent
+            logger.warning(f"🚫 Not sending fax to {to_number}: {e}")
+            return SendResult(False, error="circuit_open", message=str(e), retryable=True)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            logger.error(f"❌ Could not connect during fax send: {e}")
+            return SendResult(False, error="request_failed", message=f"HTTP request failed: {str(e)}",
+                              retryable=True)
+        except httpx.TimeoutException as e:
+            logger.error(f"⏱️ Timeout during fax send: {e}")
+            return SendResult(False, error="timeout", message=f"Request timed out: {str(e)}",
+                              retryable=not sending)
+        except httpx.HTTPError as e:
+            logger.error(f"❌ Request error during fax send: {e}")
+            return SendResult(False, error="request_failed", message=f"HTTP request failed: {str(e)}",
+                              retryable=not sending)
+        except Exception as e:
+            logger.exception(f"❌ Unexpected error sending fax: {e}")
+            return SendResult(False, error="unexpected_error", message=str(e))
+
+    async def get_sent_fax_status(self, fax_id: str) -> SentFaxStatus:
+        """
+        Look up the delivery status of a sent fax.
+
+        Endpoint: GET /sentFax/{id}
+
+        Args:
+            fax_id: HumbleFax ID recorded as ProviderRequest.outbound_job_id
+        """
+        if not self.auth:
+            return SentFaxStatus(False, error="missing_credentials",
+                                 message="HumbleFax credentials not configured")
+
+        try:
+            response = await self._request("control", "GET", f"/sentFax/{fax_id}")
+
+            if response.status_code != 200:
+                return SentFaxStatus(False, error="status_failed", http_status=response.status_code,
+                                     message=f"HTTP {response.status_code}: {response.text[:200]}")
+
+            data = response.json().get("data") or {}
+            sent_fax = data.get("sentFax") or data
+            raw_status = str(sent_fax.get("status") or "").lower()
+
+            recipients = {}
+            for recipient in sent_fax.get("recipients") or []:
+                if not isinstance(recipient, dict) or not recipient.get("status"):
+                    continue
+                outcome = (
+                    delivery_status(recipient["status"]),
+                    recipient.get("error") or recipient.get("failureReason"),
+                )
+                if recipient.get("id") is not None:
+                    recipients[str(recipient["id"])] = outcome
+                number = _recipient_number(recipient)
+                if number:
+                    recipients[str(number)] = outcome
+
+            return SentFaxStatus(
+                True,
+                status=delivery_status(raw_status),
+                error=sent_fax.get("error") or sent_fax.get("failureReason"),
+                message=raw_status,
+                recipients=recipients,
+            )
+
+        except CircuitOpenError as e:
+            return SentFaxStatus(False, error="circuit_open", message=str(e))
+        except httpx.HTTPError as e:
+            logger.error(f"❌ Status lookup failed for fax {fax_id}: {e}")
+            return SentFaxStatus(False, error="request_failed", message=f"HTTP request failed: {e}")
+        except Exception as e:
+            logger.exception(f"❌ Unexpected error looking up fax {fax_id}: {e}")
+            return SentFaxStatus(False, error="unexpected_error", message=str(e))
+
+    # ------------------------------------------------------------------
+    # Utility
+    # ------------------------------------------------------------------
+
+    async def health_check(self) -> bool:
+        """
+        Minimal authenticated call used to probe the API while the circuit
+        is open (it is the half-open probe, so success closes the circuit).
+        """
+        try:
+            response = await self._request("list", "GET", "/incomingFaxes", params={"limit": 1})
+        except (CircuitOpenError, httpx.HTTPError):
+            return False
+        return response.status_code < 500
+
+    async def test_credentials(self) -> Dict:
+        """
+        Test API credentials with a minimal list call.
+
+        Returns:
+            Dict with valid (bool) and message (str)
+        """
+        if not self.auth:
+            return {"valid": False, "message": "Credentials not configured"}
+
+        try:
+            response = await self.http.get("/incomingFaxes", params={"limit": 1},
+                                           timeout=httpx.Timeout(10))
+        except Exception as e:
+            return {"valid": False, "message": f"Error testing credentials: {str(e)}"}
+
+        if response.status_code == 401:
+            return {"valid": False, "message": "Invalid credentials (401 Unauthorized)"}
+        if response.status_code == 200:
+            return {"valid": True, "message": "Credentials valid"}
+        return {"valid": False, "message": f"Unexpected response: {response.status_code}"}
+
+
+def _transient(status: int) -> bool:
+    """HTTP status worth retrying later (throttled or server-side error)."""
+    return status == 429 or status >= 500
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given (0-based) attempt."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def _retry_after(response: httpx.Response) -> float:
+    """Seconds requested by a Retry-After header (delta or HTTP date), capped."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return 0.0
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return 0.0
+        seconds = when.timestamp() - datetime.now(timezone.utc).timestamp()
+    return min(max(seconds, 0.0), RETRY_AFTER_CAP)
+
+
+# ============================================================================
+# SHARED INSTANCE
+# ============================================================================
+
+_client: Optional[HumbleFaxClient] = None
+
+
+def get_client() -> HumbleFaxClient:
+    """Process-wide client sharing one connection pool."""
+    global _client
+    if _client is None:
+        _client = HumbleFaxClient()
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client's connections (application shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,405 @@
+"""
+Durable Job Queue
+
+Background work (inbound fax ingest, unmatched-fax re-matching, outbound
+sends) is stored as rows in the jobs table instead of FastAPI
+BackgroundTasks, so it survives restarts and redeploys, is retried with
+backoff, and can be run by any number of processes against the same
+database.
+
+- enqueue_job() inserts a job in the caller's transaction, so it is
+  committed atomically with the rows it refers to. At most one unfinished
+  job per (kind, dedupe_key) exists: a partial unique index backs the key
+  and a duplicate insert is skipped with ON CONFLICT DO NOTHING.
+- claim_jobs() leases runnable jobs to one worker. On Postgres candidates
+  are selected with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+  workers never block on or double-claim a row. SQLite has no row locks
+  and a single writer: claims are serialized per process and each claim is
+  a conditional UPDATE that only succeeds while the row is still claimable,
+  so a second process loses the race instead of running the job twice.
+- JobRunner executes claimed jobs with the handler registered for their
+  kind (@job_handler), renewing each lease every JOB_LEASE / 3 while the
+  handler runs. A job whose lease lapses (crashed worker) is claimed again;
+  a failed attempt is requeued with exponential backoff, and after
+  max_attempts the job is dead-lettered (state "dead", last_error kept)
+  and the kind's on_dead callback, if any, is run. That includes jobs
+  whose lease lapsed on their final attempt.
+
+Handlers must be idempotent: a job can run again after a crash part-way
+through.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import select, update, and_, or_, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.db import engine, get_async_session_context
+from app.models.job import Job, JOB_OPEN_CONDITION
+
+logger = logging.getLogger(__name__)
+
+# How long a claimed job stays leased without renewal
+JOB_LEASE = timedelta(seconds=int(os.getenv("JOB_LEASE_SECONDS", "120")))
+
+# Jobs run at once by one JobRunner
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "4"))
+
+# Seconds an idle runner waits before looking for new jobs
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+
+DEFAULT_MAX_ATTEMPTS = 5
+
+# Retry backoff: RETRY_BASE * 2^(attempt - 1), capped
+RETRY_BASE = timedelta(seconds=10)
+RETRY_CAP = timedelta(hours=1)
+
+OPEN_STATES = ["queued", "running"]
+
+LEASE_EXPIRED_ERROR = "Lease expired on final attempt"
+
+JobHandler = Callable[[Dict], Awaitable[None]]
+
+_handlers: Dict[str, JobHandler] = {}
+_dead_handlers: Dict[str, Callable[[Dict, str], Awaitable[None]]] = {}
+
+# Serializes claims within a process on SQLite
+_claim_lock = asyncio.Lock()
+
+
+def job_handler(kind: str, on_dead: Optional[Callable[[Dict, str], Awaitable[None]]] = None):
+    """
+    Register an async handler taking the job payload for one job kind.
+
+    on_dead(payload, error) is awaited once when a job of this kind is
+    dead-lettered, to record the permanent failure on the rows it refers to.
+    """
+    def register(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        if on_dead is not None:
+            _dead_handlers[kind] = on_dead
+        return func
+    return register
+
+
+async def enqueue_job(
+        db: AsyncSession,
+        kind: str,
+        payload: Dict,
+        *,
+        priority: int = 0,
+        delay: Optional[timedelta] = None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        dedupe_key: Optional[str] = None
+) -> Optional[int]:
+    """
+    Insert a job in one statement. Does not commit; the caller owns the
+    transaction, so the job is only visible once the rows it refers to are.
+
+    Args:
+        db: Database session
+        kind: Registered handler kind
+        payload: JSON-serializable handler arguments
+        priority: Higher runs first
+        delay: Run no earlier than this from now
+        max_attempts: Attempts before the job is dead-lettered
+        dedupe_key: Skip the insert if an unfinished job of this kind has
+            this key (enforced by ix_jobs_kind_dedupe_key_open)
+
+    Returns:
+        The new job's ID, or None if a duplicate was skipped
+    """
+    insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(Job).values(
+        kind=kind,
+        payload=payload,
+        priority=priority,
+        max_attempts=max_attempts,
+        dedupe_key=dedupe_key,
+        run_after=datetime.utcnow() + (delay or timedelta(0)),
+    )
+    if dedupe_key:
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=[Job.kind, Job.dedupe_key],
+            # Literal SQL, so it matches the partial index predicate exactly
+            index_where=text(JOB_OPEN_CONDITION),
+        )
+    result = await db.execute(stmt.returning(Job.id))
+    return result.scalar_one_or_none()
+
+
+async def _run_on_dead(job_id: int, kind: str, payload: Optional[Dict], error: str) -> None:
+    """Await the kind's on_dead callback, if any, for a dead-lettered job."""
+    on_dead = _dead_handlers.get(kind)
+    if on_dead is None:
+        return
+    try:
+        await on_dead(payload or {}, error)
+    except Exception as e:
+        logger.exception(f"❌ on_dead for job #{job_id} ({kind}) failed: {e}")
+
+
+def _claimable(now: datetime):
+    return or_(
+        and_(Job.state == "queued", Job.run_after <= now),
+        and_(Job.state == "running", Job.lease_expires_at < now, Job.attempts < Job.max_attempts),
+    )
+
+
+async def _claim(worker_id: str, limit: int, kinds: Optional[List[str]], now: datetime) -> List[Job]:
+    async with get_async_session_context() as db:
+        # Jobs that kept losing their lease (e.g. crashing their worker)
+        # have no attempts left: dead-letter them
+        result = await db.execute(
+            update(Job)
+            .where(Job.state == "running", Job.lease_expires_at < now, Job.attempts >= Job.max_attempts)
+            .values(state="dead", leased_by=None, finished_at=now, last_error=LEASE_EXPIRED_ERROR)
+            .returning(Job.id, Job.kind, Job.payload)
+            .execution_options(synchronize_session=False)
+        )
+        expired = result.all()
+        if expired:
+            await db.commit()
+            for job_id, kind, payload in expired:
+                logger.error(f"☠️ Job #{job_id} ({kind}) dead: {LEASE_EXPIRED_ERROR}")
+                await _run_on_dead(job_id, kind, payload, LEASE_EXPIRED_ERROR)
+
+        query = (
+            select(Job.id)
+            .where(_claimable(now))
+            .order_by(Job.priority.desc(), Job.run_after, Job.id)
+            .limit(limit)
+        )
+        if kinds:
+            query = query.where(Job.kind.in_(kinds))
+        if engine.dialect.name == "postgresql":
+            query = query.with_for_update(skip_locked=True)
+        candidates = (await db.execute(query)).scalars().all()
+
+        claimed = []
+        for job_id in candidates:
+            result = await db.execute(
+                update(Job)
+                .where(Job.id == job_id, _claimable(now))
+                .values(
+                    state="running",
+                    leased_by=worker_id,
+                    lease_expires_at=now + JOB_LEASE,
+                    attempts=Job.attempts + 1,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                claimed.append(job_id)
+        await db.commit()
+
+        if not claimed:
+            return []
+        result = await db.execute(select(Job).where(Job.id.in_(claimed)).order_by(Job.id))
+        return result.scalars().all()
+
+
+async def claim_jobs(worker_id: str, limit: int = 1, kinds: Optional[Iterable[str]] = None) -> List[Job]:
+    """
+    Lease up to `limit` runnable jobs to `worker_id`, highest priority
+    first. Includes running jobs whose lease has lapsed.
+    """
+    kinds = list(kinds) if kinds else None
+    now = datetime.utcnow()
+    if engine.dialect.name == "postgresql":
+        return await _claim(worker_id, limit, kinds, now)
+    async with _claim_lock:
+        return await _claim(worker_id, limit, kinds, now)
+
+
+async def renew_lease(job_id: int, worker_id: str) -> bool:
+    """Extend a running job's lease; False if the worker no longer owns it."""
+    async with get_async_session_context() as db:
+        result = await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.state == "running", Job.leased_by == worker_id)
+            .values(lease_expires_at=datetime.utcnow() + JOB_LEASE)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return bool(result.rowcount)
+
+
+async def complete_job(job_id: int, worker_id: str) -> None:
+    async with get_async_session_context() as db:
+        await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.leased_by == worker_id)
+            .values(state="done", leased_by=None, lease_expires_at=None, finished_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+
+async def fail_job(job: Job, worker_id: str, error: str) -> bool:
+    """
+    Requeue a failed attempt with backoff, or dead-letter the job.
+
+    Returns:
+        True if the job was dead-lettered by this call
+    """
+    now = datetime.utcnow()
+    dead = job.attempts >= job.max_attempts
+    if dead:
+        values = dict(state="dead", finished_at=now)
+        logger.error(f"☠️ Job #{job.id} ({job.kind}) dead after {job.attempts} attempt(s): {error}")
+    else:
+        backoff = min(RETRY_CAP, RETRY_BASE * 2 ** (job.attempts - 1))
+        values = dict(state="queued", run_after=now + backoff)
+        logger.warning(
+            f"🔁 Job #{job.id} ({job.kind}) attempt {job.attempts}/{job.max_attempts} failed; "
+            f"retry in {backoff.total_seconds():.0f}s: {error}"
+        )
+
+    async with get_async_session_context() as db:
+        result = await db.execute(
+            update(Job)
+            .where(Job.id == job.id, Job.leased_by == worker_id)
+            .values(leased_by=None, lease_expires_at=None, last_error=error[:2000], **values)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+    return dead and result.rowcount == 1
+
+
+async def release_jobs(job_ids: List[int], worker_id: str) -> None:
+    """Hand unfinished jobs back to the queue (shutdown), without a retry delay."""
+    if not job_ids:
+        return
+    async with get_async_session_context() as db:
+        await db.execute(
+            update(Job)
+            .where(Job.id.in_(job_ids), Job.state == "running", Job.leased_by == worker_id)
+            .values(state="queued", leased_by=None, lease_expires_at=None,
+                    run_after=datetime.utcnow(), attempts=Job.attempts - 1)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+
+class JobRunner:
+    """
+    Claims jobs and runs up to `concurrency` of them at once, renewing each
+    lease while its handler runs.
+    """
+
+    def __init__(
+            self,
+            concurrency: int = JOB_CONCURRENCY,
+            kinds: Optional[Iterable[str]] = None,
+            worker_id: Optional[str] = None
+    ):
+        self.concurrency = max(1, concurrency)
+        self.kinds = list(kinds) if kinds else None
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._loop_task: Optional[asyncio.Task] = None
+        self._running: Dict[int, asyncio.Task] = {}
+        self._wake = asyncio.Event()
+
+    async def start(self) -> None:
+        if self._loop_task is None:
+            logger.info(f"🧰 Job runner {self.worker_id} started ({self.concurrency} slot(s))")
+            self._loop_task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop claiming, cancel running jobs and hand them back to the queue."""
+        if self._loop_task is None:
+            return
+        self._loop_task.cancel()
+        job_ids = list(self._running)
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(self._loop_task, *tasks, return_exceptions=True)
+        await release_jobs(job_ids, self.worker_id)
+        self._loop_task = None
+
+    def wake(self) -> None:
+        """Look for jobs now rather than after the poll interval."""
+        self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            # Cleared before claiming, so a wake-up during the claim is kept
+            self._wake.clear()
+
+            jobs = []
+            free = self.concurrency - len(self._running)
+            if free > 0:
+                try:
+                    jobs = await claim_jobs(self.worker_id, free, self.kinds)
+                except Exception as e:
+                    logger.exception(f"❌ Claiming jobs failed: {e}")
+
+            for job in jobs:
+                self._running[job.id] = asyncio.create_task(self._execute(job))
+
+            # A full batch may mean more are waiting; otherwise sleep until a
+            # slot frees up, a job is enqueued in-process, or the next poll
+            if jobs and len(self._running) < self.concurrency:
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _execute(self, job: Job) -> None:
+        handler = _handlers.get(job.kind)
+        heartbeat = asyncio.create_task(self._heartbeat(job, asyncio.current_task()))
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{job.kind}'")
+            await handler(job.payload or {})
+            await complete_job(job.id, self.worker_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"❌ Job #{job.id} ({job.kind}) failed: {e}")
+            error = f"{type(e).__name__}: {e}"
+            if await fail_job(job, self.worker_id, error):
+                await _run_on_dead(job.id, job.kind, job.payload, error)
+        finally:
+            heartbeat.cancel()
+            self._running.pop(job.id, None)
+            self._wake.set()
+
+    async def _heartbeat(self, job: Job, task: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(JOB_LEASE.total_seconds() / 3)
+            try:
+                renewed = await renew_lease(job.id, self.worker_id)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not renew lease on job #{job.id}: {e}")
+                continue
+            if not renewed:
+                # Another worker may be running it now; stop this copy
+                logger.error(f"❌ Lost lease on job #{job.id} ({job.kind}); cancelling")
+                task.cancel()
+                return
+
+
+# ============================================================================
+# SHARED INSTANCE
+# ============================================================================
+
+_runner: Optional[JobRunner] = None
+
+
+def get_job_runner() -> JobRunner:
+    """Process-wide job runner, started and stopped by the app lifespan."""
+    global _runner
+    if _runner is None:
+        _runner = JobRunner()
+    return _runner
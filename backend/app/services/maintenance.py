@@ -0,0 +1,35 @@
+"""
+Pipeline Maintenance Loops
+
+The periodic fax pipeline tasks that run beside the job runner: the
+startup resume of interrupted inbound faxes and outbound sends, the
+inbound reconciler, the outbound status poller, the outbox drainer and
+the fax packet pruner. The worker starts them unless run with
+--no-maintenance; the web process starts them only with
+RUN_JOBS_IN_WEB=true. Exactly one process should run them.
+"""
+
+import asyncio
+from typing import List
+
+from app.routers import humblefax
+from app.services import fax_dispatch
+from app.services.outbound_poller import run_outbound_status_poller
+
+
+def start_maintenance() -> List[asyncio.Task]:
+    """Start the periodic pipeline loops; cancel the returned tasks to stop them."""
+    return [
+        # Finish inbound faxes and outbound sends interrupted by the last
+        # shutdown
+        asyncio.create_task(humblefax.resume_incomplete_faxes()),
+        asyncio.create_task(fax_dispatch.resume_queued_sends()),
+        # Catch incoming faxes whose webhook was never delivered
+        asyncio.create_task(humblefax.run_inbound_reconciler()),
+        # Resolve outbound faxes whose status callback never arrived
+        asyncio.create_task(run_outbound_status_poller()),
+        # Re-send parked faxes after an outage; fail sends cut off mid-flight
+        asyncio.create_task(fax_dispatch.run_outbox_drainer()),
+        # Delete cached (PHI-bearing) fax packets once they are past reuse
+        asyncio.create_task(fax_dispatch.run_packet_pruner()),
+    ]
@@ -3,24 +3,38 @@ Medical Records Compilation Service
 
 Service for compiling all medical records for a patient into a single PDF,
 ordered chronologically by clinical encounter date.
+
+Category compiles ("just the labs") use the fax_pages index to pull only the
+matching pages instead of rescanning OCR text or compiling everything.
 """
 
 import os
 import asyncio
 import tempfile
 import logging
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
 
 from app.models.fax_file import FaxFile
+from app.models.fax_page import FaxPage
 from app.models.patient import Patient
-from app.services.pdf_ops import ocr_to_searchable_pdf, merge_pdfs
+from app.services.pdf_ops import ocr_to_searchable_pdf, merge_pdfs, extract_pdf_pages
 
 logger = logging.getLogger(__name__)
 
 
+def _chronological_sort_key(fax: FaxFile):
+    """Order by encounter date, falling back to received time after dated records."""
+    if fax.encounter_date:
+        # Use encounter date if available (preferred)
+        return (0, fax.encounter_date, fax.received_time)
+    # Fallback to received_time if no encounter date
+    # Use a high priority (1) so these come after dated records
+    return (1, fax.received_time.date() if fax.received_time else datetime.now().date(), fax.received_time)
+
+
 async def compile_all_patient_records(
     patient_id: int,
     db: AsyncSession,
@@ -67,16 +81,7 @@ async def compile_all_patient_records(
     
     # Sort by encounter date (oldest first), with fallback to received_time
     # This ensures records are in chronological order by when services were provided
-    def sort_key(fax):
-        if fax.encounter_date:
-            # Use encounter date if available (preferred)
-            return (0, fax.encounter_date, fax.received_time)
-        else:
-            # Fallback to received_time if no encounter date
-            # Use a high priority (1) so these come after dated records
-            return (1, fax.received_time.date() if fax.received_time else datetime.now().date(), fax.received_time)
-    
-    sorted_faxes = sorted(fax_files, key=sort_key)
+    sorted_faxes = sorted(fax_files, key=_chronological_sort_key)
     
     # Log the sorting order for debugging
     logger.info("📅 Records will be compiled in this order:")
@@ -151,6 +156,73 @@ async def compile_all_patient_records(
             logger.warning(f"Failed to cleanup temp directory {tmpdir}: {e}")
 
 
+async def compile_patient_records_by_type(
+    patient_id: int,
+    db: AsyncSession,
+    doc_types: List[str],
+    output_filename: Optional[str] = None
+) -> Optional[str]:
+    """
+    Compile only the pages of the given document types (e.g. ["lab"]) for a
+    patient into a single PDF, ordered chronologically.
+
+    Pages are selected with one lookup against the fax_pages index; no OCR
+    text is rescanned and unrelated pages are never copied.
+
+    Args:
+        patient_id: ID of the patient
+        db: Database session
+        doc_types: Page labels to include (see page_classifier.DOC_TYPES)
+        output_filename: Optional custom filename
+
+    Returns:
+        Absolute path to compiled PDF, or None if no pages matched
+    """
+    logger.info(f"📚 Compiling {doc_types} pages for patient {patient_id}")
+
+    result = await db.execute(
+        select(FaxFile, FaxPage.page_number)
+        .join(FaxPage, FaxPage.fax_file_id == FaxFile.id)
+        .where(
+            FaxFile.patient_id == patient_id,
+            FaxPage.doc_type.in_(doc_types)
+        )
+        .order_by(FaxFile.id, FaxPage.page_number)
+    )
+
+    pages_by_fax: Dict[int, Tuple[FaxFile, List[int]]] = {}
+    for fax, page_number in result.all():
+        pages_by_fax.setdefault(fax.id, (fax, []))[1].append(page_number)
+
+    selections = [
+        (fax.file_path, pages)
+        for fax, pages in sorted(pages_by_fax.values(), key=lambda item: _chronological_sort_key(item[0]))
+        if fax.file_path and os.path.exists(fax.file_path)
+    ]
+
+    if not selections:
+        logger.warning(f"No {doc_types} pages found for patient {patient_id}")
+        return None
+
+    if not output_filename:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_filename = f"patient_{patient_id}_{'_'.join(doc_types)}_{timestamp}.pdf"
+
+    os.makedirs("storage", exist_ok=True)
+    final_path = os.path.join("storage", output_filename)
+
+    try:
+        await asyncio.to_thread(extract_pdf_pages, selections, final_path)
+    except Exception as e:
+        logger.exception(f"Failed to compile {doc_types} pages: {e}")
+        return None
+
+    total_pages = sum(len(pages) for _, pages in selections)
+    logger.info(f"✅ Compiled {total_pages} {doc_types} page(s) from {len(selections)} fax(es): {final_path}")
+
+    return os.path.abspath(final_path)
+
+
 async def get_patient_records_summary(
     patient_id: int,
     db: AsyncSession
@@ -163,6 +235,7 @@ async def get_patient_records_summary(
         - total_records: Number of fax files
         - records_with_encounter_date: Number with encounter date
         - date_range: Earliest and latest encounter dates
+        - page_types: Page count per document type (from the page index)
         - records: List of record summaries
     """
     result = await db.execute(
@@ -175,10 +248,20 @@ async def get_patient_records_summary(
             "total_records": 0,
             "records_with_encounter_date": 0,
             "date_range": None,
+            "page_types": {},
             "records": []
         }
     
     records_with_dates = [f for f in fax_files if f.encounter_date]
+
+    # Page counts per document type from the page index
+    page_counts = await db.execute(
+        select(FaxPage.doc_type, func.count(FaxPage.id))
+        .join(FaxFile, FaxPage.fax_file_id == FaxFile.id)
+        .where(FaxFile.patient_id == patient_id)
+        .group_by(FaxPage.doc_type)
+    )
+    page_types = dict(page_counts.all())
     
     # Find date range
     date_range = None
@@ -204,6 +287,7 @@ async def get_patient_records_summary(
         "total_records": len(fax_files),
         "records_with_encounter_date": len(records_with_dates),
         "date_range": date_range,
+        "page_types": page_types,
         "records": records
     }
 
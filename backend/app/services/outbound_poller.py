@@ -0,0 +1,188 @@
+"""
+Outbound Status Polling
+
+Fallback for lost /humblefax/outbound-status callbacks, and for deployments
+without BASE_EXTERNAL_URL, where no callback is registered at all.
+
+Each pass selects fax_sent provider requests that have gone quiet (sent
+more than STALE_AFTER ago and not polled within RECHECK_AFTER) in keyset
+batches. It looks up their HumbleFax status with at most POLL_CONCURRENCY
+calls in flight, once per job ID (a batched multi-recipient fax is looked
+up once and resolved per recipient), and applies the outcomes per batch with one bulk
+transition per (status, reason) group through request_progress, so the
+request counters stay exact. Rows that never resolve (or have no job ID to
+look up) fail after GIVE_UP_AFTER, so every request reaches a terminal
+state.
+"""
+
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update, or_
+
+from app.database.db import get_async_session_context
+from app.models.record_request import ProviderRequest
+from app.services.humblefax_client import get_client, format_fax_number, validate_fax_number
+from app.services.request_progress import transition_provider_requests
+
+logger = logging.getLogger(__name__)
+
+# A fax_sent row with no callback for this long is polled
+STALE_AFTER = timedelta(minutes=15)
+
+# Minimum time between polls of the same row
+RECHECK_AFTER = timedelta(minutes=30)
+
+# A fax still unresolved this long after sending is marked failed
+GIVE_UP_AFTER = timedelta(hours=48)
+
+POLL_BATCH_SIZE = 200
+POLL_CONCURRENCY = 5
+
+# Seconds between polling passes
+POLL_INTERVAL = int(os.getenv("FAX_STATUS_POLL_INTERVAL", "300"))
+
+GIVE_UP_REASON = "No delivery confirmation from HumbleFax"
+
+
+def _recipient_keys(transaction_id: Optional[str], fax_number: Optional[str]) -> List[str]:
+    """Keys a row may appear under in SentFaxStatus.recipients."""
+    keys = [transaction_id] if transaction_id else []
+    if fax_number and validate_fax_number(fax_number):
+        keys.append(str(format_fax_number(fax_number)))
+    return keys
+
+
+async def _fetch_statuses(rows: List[Tuple]) -> Dict[int, Tuple[str, Optional[str]]]:
+    """
+    HumbleFax status per provider request ID, with bounded concurrency.
+
+    Args:
+        rows: (ProviderRequest ID, job ID, transaction ID, fax number)
+    """
+    client = get_client()
+    semaphore = asyncio.Semaphore(POLL_CONCURRENCY)
+
+    async def lookup(job_id: str):
+        async with semaphore:
+            result = await client.get_sent_fax_status(job_id)
+        return job_id, result
+
+    results = dict(await asyncio.gather(*(lookup(job_id) for job_id in {row[1] for row in rows})))
+
+    statuses = {}
+    for pr_id, job_id, transaction_id, fax_number in rows:
+        result = results[job_id]
+        if not result.success:
+            logger.warning(f"⚠️ Status lookup failed for ProviderRequest #{pr_id}: {result.message}")
+            continue
+        outcome = (result.status, result.error)
+        for key in _recipient_keys(transaction_id, fax_number):
+            if key in result.recipients:
+                outcome = result.recipients[key]
+                break
+        statuses[pr_id] = outcome
+    return statuses
+
+
+async def poll_outbound_statuses(now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Run one polling pass over stale fax_sent provider requests.
+
+    Returns:
+        Counts of rows checked, delivered, failed and given up
+    """
+    now = now or datetime.utcnow()
+    counts = {"checked": 0, "delivered": 0, "failed": 0, "given_up": 0}
+    last_id = 0
+
+    while True:
+        async with get_async_session_context() as db:
+            result = await db.execute(
+                select(
+                    ProviderRequest.id,
+                    ProviderRequest.outbound_job_id,
+                    ProviderRequest.sent_at,
+                    ProviderRequest.outbound_transaction_id,
+                    ProviderRequest.fax_number_used,
+                )
+                .where(
+                    ProviderRequest.status == "fax_sent",
+                    ProviderRequest.id > last_id,
+                    or_(ProviderRequest.sent_at.is_(None), ProviderRequest.sent_at < now - STALE_AFTER),
+                    or_(
+                        ProviderRequest.status_checked_at.is_(None),
+                        ProviderRequest.status_checked_at < now - RECHECK_AFTER
+                    ),
+                )
+                .order_by(ProviderRequest.id)
+                .limit(POLL_BATCH_SIZE)
+            )
+            batch = result.all()
+            if not batch:
+                break
+            last_id = batch[-1][0]
+
+            pollable = [
+                (pr_id, job_id, transaction_id, fax_number)
+                for pr_id, job_id, _, transaction_id, fax_number in batch if job_id
+            ]
+            statuses = await _fetch_statuses(pollable)
+
+            delivered = []
+            failed = defaultdict(list)
+            for pr_id, job_id, sent_at, _, _ in batch:
+                status, error = statuses.get(pr_id, (None, None))
+                if status == "delivered":
+                    delivered.append(pr_id)
+                elif status == "failed":
+                    failed[error or "Fax delivery failed"].append(pr_id)
+                elif sent_at is None or sent_at.replace(tzinfo=None) < now - GIVE_UP_AFTER:
+                    failed[GIVE_UP_REASON].append(pr_id)
+                    counts["given_up"] += 1
+
+            if delivered:
+                changed = await transition_provider_requests(db, delivered, "fax_delivered", delivered_at=now)
+                counts["delivered"] += len(changed)
+            for reason, pr_ids in failed.items():
+                changed = await transition_provider_requests(db, pr_ids, "fax_failed", failed_reason=reason)
+                counts["failed"] += len(changed)
+
+            await db.execute(
+                update(ProviderRequest)
+                .where(ProviderRequest.id.in_([row[0] for row in batch]))
+                .values(status_checked_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+        counts["checked"] += len(batch)
+        if len(batch) < POLL_BATCH_SIZE:
+            break
+
+    if counts["checked"]:
+        logger.info(
+            f"📡 Outbound status poll: {counts['checked']} checked, "
+            f"{counts['delivered']} delivered, {counts['failed']} failed "
+            f"({counts['given_up']} given up)"
+        )
+    return counts
+
+
+async def run_outbound_status_poller(interval: int = POLL_INTERVAL) -> None:
+    """Poll for missed outbound status callbacks every `interval` seconds."""
+    if not get_client().auth:
+        logger.info("ℹ️ HumbleFax credentials not configured; outbound status poller disabled")
+        return
+
+    while True:
+        try:
+            await poll_outbound_statuses()
+        except Exception as e:
+            logger.exception(f"❌ Outbound status poll failed: {e}")
+
+        await asyncio.sleep(interval)
@@ -0,0 +1,190 @@
+"""
+Page Document-Type Classifier
+
+Lightweight keyword-scoring classifier that labels each OCR page of a received
+fax with a document type:
+- lab: laboratory results
+- imaging: radiology / imaging reports
+- notes: clinic and progress notes
+- discharge: discharge summaries
+- billing: statements and itemized bills
+- other: anything that does not score high enough
+
+Labels are stored in the fax_pages index at ingest so the portal and compiler
+can serve a single category ("just the labs") by page lookup instead of
+rescanning OCR text.
+"""
+
+import logging
+import re
+from typing import Dict, List, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.fax_file import FaxFile
+from app.models.fax_page import FaxPage
+
+logger = logging.getLogger(__name__)
+
+DOC_TYPES = ["lab", "imaging", "notes", "discharge", "billing"]
+OTHER = "other"
+
+# Human-readable labels for the portal
+DOC_TYPE_LABELS = {
+    "lab": "Lab Results",
+    "imaging": "Imaging & Radiology",
+    "notes": "Clinical Notes",
+    "discharge": "Discharge Summaries",
+    "billing": "Billing Records",
+    OTHER: "Other",
+}
+
+# Minimum score for a page to get a non-"other" label
+MIN_SCORE = 3.0
+
+# Each keyword counts at most this many times per page
+MAX_HITS_PER_KEYWORD = 3
+
+# (pattern, weight) per document type
+_KEYWORDS: Dict[str, List[Tuple[str, float]]] = {
+    "lab": [
+        (r"laboratory", 2.0),
+        (r"lab(?:oratory)?\s+results?", 3.0),
+        (r"specimen", 2.0),
+        (r"collected", 1.0),
+        (r"reference\s+(?:range|interval)", 3.0),
+        (r"hemoglobin|hematocrit|platelets?|wbc|rbc", 1.5),
+        (r"glucose|creatinine|sodium|potassium|cholesterol", 1.5),
+        (r"cbc|cmp|bmp|lipid\s+panel|a1c|urinalysis", 2.0),
+        (r"mg/dl|mmol/l|g/dl|u/l", 1.5),
+    ],
+    "imaging": [
+        (r"radiology", 3.0),
+        (r"radiologist", 2.0),
+        (r"impression", 2.0),
+        (r"findings", 1.0),
+        (r"technique", 1.5),
+        (r"contrast", 1.5),
+        (r"x-?ray|radiograph|ct\s+(?:scan|abdomen|chest|head)|mri|ultrasound|mammogra\w*", 2.5),
+        (r"imaging", 2.0),
+    ],
+    "notes": [
+        (r"chief\s+complaint", 3.0),
+        (r"history\s+of\s+present\s+illness|hpi", 3.0),
+        (r"review\s+of\s+systems|ros", 2.0),
+        (r"physical\s+exam(?:ination)?", 2.0),
+        (r"assessment(?:\s+and\s+plan)?", 1.5),
+        (r"progress\s+note|office\s+visit|clinic\s+note", 3.0),
+        (r"subjective|objective", 1.0),
+        (r"vital\s+signs", 1.0),
+    ],
+    "discharge": [
+        (r"discharge\s+summary", 5.0),
+        (r"hospital\s+course", 3.0),
+        (r"discharge\s+(?:diagnos[ie]s|medications|instructions|disposition)", 3.0),
+        (r"admission\s+date|date\s+of\s+admission", 1.5),
+        (r"discharge\s+date|date\s+of\s+discharge", 1.5),
+        (r"disposition", 1.0),
+    ],
+    "billing": [
+        (r"itemized\s+(?:statement|bill)", 5.0),
+        (r"statement", 1.5),
+        (r"balance\s+(?:due|forward)|amount\s+due", 3.0),
+        (r"charges?", 1.0),
+        (r"cpt|hcpcs|revenue\s+code", 2.0),
+        (r"insurance\s+(?:payment|adjustment)|patient\s+responsibility", 2.5),
+        (r"invoice|account\s+(?:number|#)", 1.5),
+        (r"\$\s?\d+", 0.5),
+    ],
+}
+
+# Keywords must be whole words on both ends, or short terms ("ros", "hpi",
+# "cbc") fire inside names like "Rosa Ross". Lookarounds rather than \b so
+# patterns starting or ending in a non-word character ("$") still match.
+_COMPILED = {
+    doc_type: [
+        (re.compile(rf"(?<!\w)(?:{pattern})(?!\w)", re.IGNORECASE), weight)
+        for pattern, weight in keywords
+    ]
+    for doc_type, keywords in _KEYWORDS.items()
+}
+
+# Page separators written by ocr_service._process_pdf_with_tesseract
+_PAGE_MARKER = re.compile(r"^--- Page (\d+) ---$", re.MULTILINE)
+
+
+def split_ocr_pages(ocr_text: str) -> List[Tuple[int, str]]:
+    """
+    Split OCR text into (page_number, text) pairs using the OCR page markers.
+
+    Text without markers is treated as a single page 1.
+    """
+    if not ocr_text:
+        return []
+
+    markers = list(_PAGE_MARKER.finditer(ocr_text))
+    if not markers:
+        return [(1, ocr_text)]
+
+    pages = []
+    for i, marker in enumerate(markers):
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(ocr_text)
+        pages.append((int(marker.group(1)), ocr_text[marker.end():end].strip()))
+    return pages
+
+
+def score_page(text: str) -> Dict[str, float]:
+    """Return the keyword score of a page for every document type."""
+    scores = {}
+    for doc_type, keywords in _COMPILED.items():
+        total = 0.0
+        for regex, weight in keywords:
+            hits = len(regex.findall(text))
+            if hits:
+                total += weight * min(hits, MAX_HITS_PER_KEYWORD)
+        scores[doc_type] = total
+    return scores
+
+
+def classify_page(text: str) -> Tuple[str, float]:
+    """
+    Classify a single OCR page.
+
+    Returns:
+        Tuple of (doc_type, score); doc_type is "other" below MIN_SCORE
+    """
+    scores = score_page(text)
+    doc_type, best = max(scores.items(), key=lambda item: item[1])
+    if best < MIN_SCORE:
+        return OTHER, best
+    return doc_type, best
+
+
+async def index_fax_pages(db: AsyncSession, fax_file: FaxFile) -> List[FaxPage]:
+    """
+    Classify every OCR page of a fax and (re)write its fax_pages rows.
+
+    Does not commit; the caller owns the transaction.
+    """
+    await db.execute(delete(FaxPage).where(FaxPage.fax_file_id == fax_file.id))
+
+    pages = []
+    for page_number, text in split_ocr_pages(fax_file.ocr_text or ""):
+        doc_type, score = classify_page(text)
+        pages.append(FaxPage(
+            fax_file_id=fax_file.id,
+            page_number=page_number,
+            doc_type=doc_type,
+            score=score,
+        ))
+
+    db.add_all(pages)
+
+    if pages:
+        counts = {}
+        for page in pages:
+            counts[page.doc_type] = counts.get(page.doc_type, 0) + 1
+        logger.info(f"🏷️ Indexed {len(pages)} page(s) for FaxFile #{fax_file.id}: {counts}")
+
+    return pages
@@ -15,7 +15,7 @@ import os
 import subprocess
 import shutil
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 from reportlab.lib.pagesizes import LETTER
 from reportlab.pdfgen import canvas as pdf_canvas
 from reportlab.lib.units import inch
@@ -341,8 +341,12 @@ def generate_release_pdf(
     return output_path
 
 
+# Bump when the cover sheet layout changes so cached fax packets are rebuilt
+COVER_SHEET_VERSION = "2.0"
+
+
 def write_cover_sheet(
-        path: str,
+        path,
         *,
         patient_name: str,
         dob: str,
@@ -353,12 +357,16 @@ def write_cover_sheet(
         provider_fax: str = "",
         provider_phone: str = "",
         total_pages: int = 2,
+        cover_date: Optional[date] = None,
 ) -> str:
     """
     Generate a professional HIPAA-compliant fax cover sheet.
 
     This creates a cover sheet that matches the Veritas One Fax Cover Template
     with all required information for medical records requests.
+
+    path may be a filename or a writable binary file object. cover_date
+    defaults to today.
     """
     c = pdf_canvas.Canvas(path, pagesize=LETTER)
     width, height = LETTER
@@ -369,7 +377,7 @@ def write_cover_sheet(
     text_color = HexColor('#333333')
     highlight_color = HexColor('#f0f0f0')
 
-    current_date = datetime.now().strftime("%B %d, %Y")
+    current_date = (cover_date or datetime.now().date()).strftime("%B %d, %Y")
 
     # Header with company branding
     c.setFillColor(header_color)
@@ -615,4 +623,27 @@ def merge_pdfs(pdf_paths: List[str], output_path: str) -> str:
     merger.write(output_path)
     merger.close()
 
-    return output_path
\ No newline at end of file
+    return output_path
+
+
+def extract_pdf_pages(selections: List[tuple], output_path: str) -> str:
+    """
+    Write selected pages from several PDFs into one PDF.
+
+    Args:
+        selections: List of (pdf_path, [1-based page numbers]) in output order
+        output_path: Destination PDF path
+    """
+    from PyPDF2 import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    for pdf_path, page_numbers in selections:
+        reader = PdfReader(pdf_path)
+        for page_number in page_numbers:
+            if 1 <= page_number <= len(reader.pages):
+                writer.add_page(reader.pages[page_number - 1])
+
+    with open(output_path, "wb") as f:
+        writer.write(f)
+
+    return output_path
@@ -0,0 +1,147 @@
+"""
+Provider Name Index
+
+Normalized provider names for content-based (hospital name) fax matching.
+
+Names are lowercased, split into tokens, common abbreviations are expanded
+("MGH", "Med Ctr", "St.") and filler words are dropped, so that
+"Mass General Hosp." and "Massachusetts General Hospital" compare equal.
+Normalized provider names are cached per provider id; the cache entry is
+dropped when a Provider row is updated or deleted through the ORM, and is
+recomputed if the stored name no longer matches.
+"""
+
+import logging
+import re
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+from sqlalchemy import event
+
+from app.models.provider import Provider
+
+logger = logging.getLogger(__name__)
+
+# Whole-name abbreviations: only applied when the entire name is the key,
+# since tokens like "va" are also state codes ("Arlington, VA")
+NAME_ABBREVIATIONS = {
+    "mgh": "massachusetts general hospital",
+    "bwh": "brigham and womens hospital",
+    "bidmc": "beth israel deaconess medical center",
+    "ucsf": "university of california san francisco",
+    "ucla": "university of california los angeles",
+    "nyu": "new york university",
+    "va": "veterans affairs",
+}
+
+# Token abbreviations
+TOKEN_ABBREVIATIONS = {
+    "hosp": "hospital",
+    "med": "medical",
+    "ctr": "center",
+    "cntr": "center",
+    "centre": "center",
+    "gen": "general",
+    "mass": "massachusetts",
+    "univ": "university",
+    "st": "saint",
+    "mem": "memorial",
+    "reg": "regional",
+    "comm": "community",
+    "hlth": "health",
+    "sys": "system",
+    "childrens": "children",
+    "vamc": "veterans affairs medical center",
+}
+
+STOPWORDS = {"the", "of", "and", "at", "for", "inc", "llc", "pc", "corp", "dept", "department"}
+
+# Minimum token_sort_ratio for a provider to match an extracted name
+MATCH_THRESHOLD = 70
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# provider id -> (name the entry was built from, normalized name)
+_cache: Dict[int, Tuple[str, str]] = {}
+
+
+def normalize_provider_name(name: str) -> str:
+    """
+    Normalize a provider or hospital name for fuzzy comparison.
+
+    Examples:
+    - "MGH" -> "massachusetts general hospital"
+    - "Arlington VA" -> "arlington va" (whole-name abbreviations only
+      apply to the whole name)
+    - "St. Mary's Med Ctr" -> "saint marys medical center"
+    - "The Children's Hospital of Philadelphia" -> "children hospital philadelphia"
+    """
+    if not name:
+        return ""
+
+    raw_tokens = _TOKEN.findall(name.lower().replace("'", ""))
+    whole_name = NAME_ABBREVIATIONS.get(" ".join(raw_tokens))
+    if whole_name:
+        raw_tokens = whole_name.split()
+
+    tokens = []
+    for token in raw_tokens:
+        expanded = TOKEN_ABBREVIATIONS.get(token, token)
+        tokens.extend(t for t in expanded.split() if t not in STOPWORDS)
+
+    return " ".join(tokens)
+
+
+def normalized_provider_name(provider: Provider) -> str:
+    """Cached normalized name for a provider."""
+    name = provider.name or ""
+    cached = _cache.get(provider.id)
+    if cached and cached[0] == name:
+        return cached[1]
+
+    normalized = normalize_provider_name(name)
+    if provider.id is not None:
+        _cache[provider.id] = (name, normalized)
+    return normalized
+
+
+def invalidate(provider_id: int = None) -> None:
+    """Drop one cached provider (or the whole cache when no id is given)."""
+    if provider_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(provider_id, None)
+
+
+def best_name_matches(
+        extracted_names: Sequence[str],
+        providers: Sequence[Provider]
+) -> List[Tuple[int, str, float]]:
+    """
+    Score every extracted hospital name against every provider in one
+    rapidfuzz cdist call.
+
+    Returns:
+        For each provider (same order): (best extracted-name index, that
+        name, score). Score is 0 when nothing was extracted.
+    """
+    if not extracted_names or not providers:
+        return [(-1, "", 0.0) for _ in providers]
+
+    queries = [normalize_provider_name(name) for name in extracted_names]
+    choices = [normalized_provider_name(provider) for provider in providers]
+
+    scores = process.cdist(queries, choices, scorer=fuzz.token_sort_ratio)
+    best_rows = np.argmax(scores, axis=0)
+
+    return [
+        (int(row), extracted_names[row], float(scores[row, col]))
+        for col, row in enumerate(best_rows)
+    ]
+
+
+@event.listens_for(Provider, "after_update")
+@event.listens_for(Provider, "after_delete")
+def _invalidate_provider(mapper, connection, target):
+    invalidate(target.id)
@@ -0,0 +1,110 @@
+"""
+Shared Token-Bucket Rate Limiter
+
+Keeps HumbleFax calls inside the provider's request budgets across every
+worker on the host (uvicorn workers, job workers, scripts), not just
+within one process. Each bucket's state (tokens, last refill time) lives in
+a small file under RATE_LIMIT_DIR that is updated under an exclusive
+fcntl lock, so all processes draw from the same bucket.
+
+Where fcntl is unavailable (Windows) the bucket falls back to a
+per-process lock.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_DIR = os.getenv("RATE_LIMIT_DIR", "storage/ratelimit")
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens per second up to `burst`, with
+    its state in a lock-protected file shared by all processes.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, directory: str = RATE_LIMIT_DIR):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.path = os.path.join(directory, f"{name}.json")
+        self._local = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _take(self) -> float:
+        """
+        Take a token if one is available.
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one will be
+        """
+        with self._local, open(self.path, "a+") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+
+                now = time.time()
+                tokens = state.get("tokens", float(self.burst))
+                elapsed = max(0.0, now - state.get("updated", now))
+                tokens = min(float(self.burst), tokens + elapsed * self.rate)
+
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps({"tokens": tokens, "updated": now}))
+                f.flush()
+                return wait
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        while True:
+            wait = await asyncio.to_thread(self._take)
+            if wait <= 0:
+                return
+            logger.debug(f"⏳ Rate limit '{self.name}': waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
+
+
+# Per-endpoint budgets: kind -> (tokens per second, burst)
+DEFAULT_BUDGETS: Dict[str, Tuple[float, int]] = {
+    "list": (float(os.getenv("HUMBLEFAX_RATE_LIST", "1")), 5),
+    "download": (float(os.getenv("HUMBLEFAX_RATE_DOWNLOAD", "5")), 10),
+    "upload": (float(os.getenv("HUMBLEFAX_RATE_UPLOAD", "5")), 10),
+    "control": (float(os.getenv("HUMBLEFAX_RATE_CONTROL", "5")), 10),
+}
+
+_buckets: Dict[str, TokenBucket] = {}
+
+
+def get_bucket(kind: str, budgets: Optional[Dict[str, Tuple[float, int]]] = None) -> TokenBucket:
+    """Shared bucket for one HumbleFax endpoint kind."""
+    bucket = _buckets.get(kind)
+    if bucket is None:
+        rate, burst = (budgets or DEFAULT_BUDGETS)[kind]
+        bucket = _buckets[kind] = TokenBucket(f"humblefax_{kind}", rate, burst)
+    return bucket
@@ -0,0 +1,160 @@
+"""
+Request Progress Counters
+
+RecordRequest keeps two counters over its provider requests:
+- outstanding_count: provider requests not yet in a terminal state
+- terminal_count: provider requests that got a response or failed
+
+Every ProviderRequest status change goes through this module. It takes two
+statements in one transaction: the status UPDATE, conditional on the row
+not already being terminal, returns the rows that actually changed; then
+one counter UPDATE per record request shifts exactly those rows from
+outstanding to terminal and completes the request when nothing is left
+outstanding. The conditional UPDATE row-locks what it changes until
+commit, so a racing webhook either waits and then sees the row terminal,
+or changes nothing. Each provider request is therefore counted exactly
+once. Folding both into one statement would need a data-modifying CTE,
+which SQLite lacks. Completion and progress are then read from the
+RecordRequest row alone.
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import case, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement
+
+from app.models.record_request import RecordRequest, ProviderRequest
+
+logger = logging.getLogger(__name__)
+
+# ProviderRequest statuses that count as answered for completion
+TERMINAL_STATUSES = ['response_received', 'fax_failed']
+
+# RecordRequest statuses that can still complete
+OPEN_REQUEST_STATUSES = ['pending', 'in_progress']
+
+
+def add_new_provider_requests(rr: RecordRequest, provider_requests: Iterable[ProviderRequest]) -> None:
+    """
+    Count newly created provider requests on their record request.
+
+    Assigns SQL increments (not Python values) so the counters stay correct
+    even if another transaction changed them since rr was loaded.
+    """
+    statuses = [pr.status or "queued" for pr in provider_requests]
+    terminal = sum(1 for status in statuses if status in TERMINAL_STATUSES)
+    outstanding = len(statuses) - terminal
+
+    rr.outstanding_count = RecordRequest.outstanding_count + outstanding
+    rr.terminal_count = RecordRequest.terminal_count + terminal
+
+
+async def transition_provider_requests(
+        db: AsyncSession,
+        provider_request_ids: List[int],
+        status: str,
+        only_if: Optional[ColumnElement] = None,
+        **values
+) -> List[int]:
+    """
+    Move provider requests to a new status and update their request counters.
+
+    Rows already in a terminal state are left untouched, so a late or
+    duplicate webhook can never move a request backwards or count twice.
+    Does not commit; the caller owns the transaction.
+
+    Args:
+        db: Database session
+        provider_request_ids: ProviderRequest IDs to transition
+        status: New ProviderRequest status
+        only_if: Further condition a row must meet to change, e.g.
+            status == "queued" to claim rows for sending
+        **values: Extra columns to set (e.g. delivered_at, failed_reason)
+
+    Returns:
+        IDs of the provider requests that actually changed
+    """
+    if not provider_request_ids:
+        return []
+
+    conditions = [
+        ProviderRequest.id.in_(provider_request_ids),
+        ProviderRequest.status.notin_(TERMINAL_STATUSES),
+    ]
+    if only_if is not None:
+        conditions.append(only_if)
+
+    result = await db.execute(
+        update(ProviderRequest)
+        .where(*conditions)
+        .values(status=status, **values)
+        .returning(ProviderRequest.id, ProviderRequest.record_request_id)
+        .execution_options(synchronize_session="fetch")
+    )
+    changed = result.all()
+
+    if status in TERMINAL_STATUSES and changed:
+        await _count_terminal(db, Counter(rr_id for _, rr_id in changed))
+
+    return [pr_id for pr_id, _ in changed]
+
+
+async def transition_provider_request(
+        db: AsyncSession,
+        provider_request_id: int,
+        status: str,
+        only_if: Optional[ColumnElement] = None,
+        **values
+) -> bool:
+    """Single-row form of transition_provider_requests; True if it changed."""
+    changed = await transition_provider_requests(db, [provider_request_id], status, only_if, **values)
+    return bool(changed)
+
+
+async def _count_terminal(db: AsyncSession, newly_terminal: Dict[int, int]) -> None:
+    """
+    Shift counters from outstanding to terminal and complete the request if
+    nothing is left outstanding, in one statement per record request.
+    """
+    for rr_id, n in newly_terminal.items():
+        remaining = RecordRequest.outstanding_count - n
+        completes = (remaining <= 0) & RecordRequest.status.in_(OPEN_REQUEST_STATUSES)
+
+        result = await db.execute(
+            update(RecordRequest)
+            .where(RecordRequest.id == rr_id)
+            .values(
+                outstanding_count=remaining,
+                terminal_count=RecordRequest.terminal_count + n,
+                status=case((completes, "complete"), else_=RecordRequest.status),
+                completed_at=case((completes, datetime.utcnow()), else_=RecordRequest.completed_at),
+            )
+            .returning(RecordRequest.status, RecordRequest.outstanding_count)
+            .execution_options(synchronize_session="fetch")
+        )
+        status, outstanding = result.one()
+
+        if status == "complete" and outstanding <= 0:
+            logger.info(f"✅ RecordRequest #{rr_id} is now complete (all providers responded or failed)")
+
+
+def request_progress(rr: RecordRequest) -> Dict[str, float]:
+    """
+    Progress summary for a record request, from its counters only.
+
+    percent is the share of provider requests resolved (responded or
+    failed), not only those that responded.
+    """
+    outstanding = rr.outstanding_count or 0
+    terminal = rr.terminal_count or 0
+    total = outstanding + terminal
+    return {
+        "total": total,
+        "outstanding": outstanding,
+        "terminal": terminal,
+        "percent": (terminal / total * 100) if total else 0,
+    }
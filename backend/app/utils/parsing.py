@@ -6,6 +6,7 @@ Functions for extracting structured information from OCR text:
 - Encounter/service dates
 - Hospital names
 - Phone number normalization
+- Phonetic name keys for candidate blocking
 """
 
 import re
@@ -264,6 +265,58 @@ def normalize_phone_number(phone: str) -> Optional[str]:
     return None
 
 
+def swap_day_month(d: date) -> Optional[date]:
+    """
+    Return the date with day and month swapped, if that is a different valid
+    date (DD/MM vs MM/DD ambiguity on faxed forms).
+    """
+    if d.day > 12 or d.day == d.month:
+        return None
+    return date(d.year, d.day, d.month)
+
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys("BFPV", "1"),
+    **dict.fromkeys("CGJKQSXZ", "2"),
+    **dict.fromkeys("DT", "3"),
+    "L": "4",
+    **dict.fromkeys("MN", "5"),
+    "R": "6",
+}
+
+
+def phonetic_key(name: str) -> Optional[str]:
+    """
+    American Soundex key for a name, used to block patient candidates.
+
+    Examples:
+    - "Smith" / "Smyth" -> "S530"
+    - "Robert" / "Rupert" -> "R163"
+    - "O'Brien" -> "O165"
+    """
+    if not name:
+        return None
+
+    letters = re.sub(r'[^A-Z]', '', name.upper())
+    if not letters:
+        return None
+
+    key = letters[0]
+    previous = _SOUNDEX_CODES.get(letters[0], "")
+
+    for ch in letters[1:]:
+        if ch in "HW":
+            continue  # H and W do not separate equal codes
+        code = _SOUNDEX_CODES.get(ch, "")
+        if code and code != previous:
+            key += code
+            if len(key) == 4:
+                break
+        previous = code
+
+    return key.ljust(4, "0")
+
+
 def format_fax_number(fax: str) -> str:
     """
     Format fax number in E.164 format (+1XXXXXXXXXX).
@@ -0,0 +1,84 @@
+"""
+Veritas One - Background Worker
+
+Consumes the durable job queue (app.services.job_queue) outside the web
+server: inbound fax ingest (download, OCR, matching), unmatched-fax
+re-matching and outbound fax sends. OCR runs in this worker's own process
+pool, so uvicorn only receives webhooks and enqueues jobs and page latency
+does not depend on fax inflow. Web and worker tiers scale independently:
+claims are safe across any number of workers sharing the database.
+
+Unless started with --no-maintenance, the worker also runs the periodic
+pipeline loops (app.services.maintenance).
+
+The web process does not consume jobs unless RUN_JOBS_IN_WEB=true
+(single-process development).
+
+Usage:
+    python -m app.worker
+    python -m app.worker --concurrency 8 --ocr-processes 4
+    python -m app.worker --kinds ingest_fax --no-maintenance
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+
+from app.routers import humblefax  # noqa: F401 - registers the ingest_fax handler
+from app.services import fax_dispatch, fax_rematch  # noqa: F401 - register the send_fax and rematch_faxes handlers
+from app.services.cpu_pool import configure_process_pool, shutdown_process_pool
+from app.services.humblefax_client import close_client
+from app.services.job_queue import JobRunner, JOB_CONCURRENCY
+from app.services.maintenance import start_maintenance
+
+logger = logging.getLogger("app.worker")
+
+
+async def run(args) -> None:
+    configure_process_pool(args.ocr_processes)
+    runner = JobRunner(concurrency=args.concurrency, kinds=args.kinds)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await runner.start()
+
+    tasks = start_maintenance() if args.maintenance else []
+
+    logger.info(f"👷 Worker {runner.worker_id} running; Ctrl+C or SIGTERM to stop")
+    await stop.wait()
+
+    logger.info("👋 Worker shutting down (running jobs are handed back to the queue)...")
+    for task in tasks:
+        task.cancel()
+    await runner.stop()
+    await close_client()
+    shutdown_process_pool()
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    ocr_default = os.cpu_count() or 2
+    parser = argparse.ArgumentParser(description="Veritas One background job worker")
+    parser.add_argument("--concurrency", type=int, default=max(JOB_CONCURRENCY, ocr_default),
+                        help="jobs run at once (default: max(JOB_CONCURRENCY, CPU count))")
+    parser.add_argument("--ocr-processes", type=int, default=ocr_default,
+                        help="OCR processes in the pool (default: CPU count)")
+    parser.add_argument("--kinds", nargs="*",
+                        help="only consume these job kinds (default: all)")
+    parser.add_argument("--no-maintenance", dest="maintenance", action="store_false",
+                        help="skip the startup resume and the periodic loops "
+                             "(for extra workers beyond the first)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
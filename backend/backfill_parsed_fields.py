@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Backfill Parsed Fields
+
+Re-derives parsed fields (encounter date, patient name, DOB) for faxes that
+already have OCR text, without re-running OCR. Use this after improving
+parse_encounter_date or the name/DOB patterns in app/utils/parsing.py.
+
+How it works:
+- Streams fax_files in keyset-paginated batches (WHERE id > last_id)
+- Parses each batch across a process pool
+- Writes changed rows back with one bulk UPDATE per batch, and re-keys
+  their unmatched_faxes queue rows (DOB, phonetic last name) in the same
+  transaction so re-matching sees the new identity
+- Records the last committed id in a checkpoint file so runs can resume
+
+Usage:
+    python backfill_parsed_fields.py [--dry-run] [--report PATH]
+                                     [--batch-size N] [--workers N]
+                                     [--checkpoint PATH] [--restart]
+                                     [--allow-clear]
+
+Options:
+    --dry-run          Parse and diff only; write nothing to the database
+    --report PATH      Write a CSV diff report (id, field, old, new)
+    --batch-size N     Rows fetched per keyset page (default 2000)
+    --workers N        Parser processes (default: CPU count)
+    --checkpoint PATH  Checkpoint file (default .backfill_parsed_fields.json)
+    --restart          Ignore an existing checkpoint and start from the beginning
+    --allow-clear      Also clear fields when the parser no longer finds a value
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, select, update
+
+from app.database.db import AsyncSessionLocal
+from app.models.fax_file import FaxFile
+from app.models.unmatched_fax import UnmatchedFax
+from app.utils.parsing import parse_name_and_dob, parse_encounter_date, phonetic_key
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT = ".backfill_parsed_fields.json"
+
+# Fields re-derived from OCR text, in report order
+PARSED_FIELDS = ("encounter_date", "parsed_first_name", "parsed_last_name", "parsed_dob")
+
+
+# ============================================================================
+# PARSING (runs inside worker processes)
+# ============================================================================
+
+def _init_worker():
+    """Silence per-document parser logging inside worker processes."""
+    logging.getLogger("app.utils.parsing").setLevel(logging.ERROR)
+
+
+def _parse_chunk(rows: List[Tuple[int, str]]) -> List[Tuple[int, Dict]]:
+    """
+    Parse a chunk of (fax_id, ocr_text) pairs.
+
+    Returns:
+        List of (fax_id, {field: value}) for every input row
+    """
+    results = []
+    for fax_id, ocr_text in rows:
+        identity = parse_name_and_dob(ocr_text)
+        results.append((fax_id, {
+            "encounter_date": parse_encounter_date(ocr_text),
+            "parsed_first_name": identity.get("first_name"),
+            "parsed_last_name": identity.get("last_name"),
+            "parsed_dob": identity.get("dob"),
+        }))
+    return results
+
+
+# ============================================================================
+# CHECKPOINTS
+# ============================================================================
+
+def load_checkpoint(path: str) -> int:
+    """Return the last committed fax id from the checkpoint file (0 if none)."""
+    if not os.path.exists(path):
+        return 0
+    try:
+        with open(path) as f:
+            return int(json.load(f).get("last_id", 0))
+    except (ValueError, OSError) as e:
+        logger.warning(f"⚠️ Ignoring unreadable checkpoint {path}: {e}")
+        return 0
+
+
+def save_checkpoint(path: str, last_id: int, stats: Dict) -> None:
+    """Atomically write the checkpoint file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"last_id": last_id, "stats": stats, "updated_at": time.time()}, f)
+    os.replace(tmp_path, path)
+
+
+# ============================================================================
+# BACKFILL
+# ============================================================================
+
+async def fetch_batch(after_id: int, batch_size: int) -> List[Tuple]:
+    """
+    Fetch the next keyset page of faxes with usable OCR text.
+
+    Only the columns needed for parsing and diffing are loaded (never pdf_data).
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(
+                FaxFile.id,
+                FaxFile.ocr_text,
+                FaxFile.encounter_date,
+                FaxFile.parsed_first_name,
+                FaxFile.parsed_last_name,
+                FaxFile.parsed_dob,
+            )
+            .where(
+                FaxFile.id > after_id,
+                FaxFile.ocr_text.isnot(None),
+                FaxFile.ocr_text != "",
+                FaxFile.ocr_text.notlike("[OCR%"),
+                FaxFile.ocr_text.notlike("[ERROR%"),
+            )
+            .order_by(FaxFile.id)
+            .limit(batch_size)
+        )
+        return result.all()
+
+
+def diff_row(current: Dict, parsed: Dict, allow_clear: bool) -> Dict:
+    """Return {field: (old, new)} for fields whose value would change."""
+    changes = {}
+    for field in PARSED_FIELDS:
+        old, new = current[field], parsed[field]
+        if new is None and not allow_clear:
+            continue
+        if old != new:
+            changes[field] = (old, new)
+    return changes
+
+
+def queue_key_update(fax_id: int, current: Dict, changes: Dict) -> Optional[Dict]:
+    """
+    Re-match queue keys for a fax whose parsed DOB or last name changed,
+    or None when neither changed.
+    """
+    if "parsed_dob" not in changes and "parsed_last_name" not in changes:
+        return None
+    dob = changes["parsed_dob"][1] if "parsed_dob" in changes else current["parsed_dob"]
+    last_name = (
+        changes["parsed_last_name"][1] if "parsed_last_name" in changes
+        else current["parsed_last_name"]
+    )
+    return {
+        "fax_id": fax_id,
+        "dob": dob,
+        "name_key": phonetic_key(last_name) if last_name else None,
+    }
+
+
+async def write_updates(params: List[Dict], queue_params: List[Dict]) -> None:
+    """
+    Apply one bulk UPDATE (executemany keyed on primary key), and re-key
+    the faxes' unmatched_faxes rows (if queued) in the same transaction.
+    """
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(FaxFile), params)
+        if queue_params:
+            await db.execute(
+                update(UnmatchedFax.__table__)
+                .where(UnmatchedFax.fax_file_id == bindparam("fax_id"))
+                .values(parsed_dob=bindparam("dob"), last_name_key=bindparam("name_key")),
+                queue_params,
+            )
+        await db.commit()
+
+
+async def run_backfill(
+        *,
+        batch_size: int,
+        workers: int,
+        dry_run: bool,
+        report_path: Optional[str],
+        checkpoint_path: str,
+        restart: bool,
+        allow_clear: bool
+) -> Dict:
+    """Stream, parse and update all faxes after the checkpoint."""
+    last_id = 0 if (restart or dry_run) else load_checkpoint(checkpoint_path)
+    if last_id:
+        logger.info(f"▶️ Resuming after FaxFile #{last_id}")
+
+    stats = {"scanned": 0, "changed": 0, "field_changes": {f: 0 for f in PARSED_FIELDS}}
+    report_file = open(report_path, "w", newline="") if report_path else None
+    report = csv.writer(report_file) if report_file else None
+    if report:
+        report.writerow(["fax_id", "field", "old", "new"])
+
+    loop = asyncio.get_running_loop()
+    started = time.monotonic()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            next_batch = asyncio.ensure_future(fetch_batch(last_id, batch_size))
+
+            while True:
+                rows = await next_batch
+                if not rows:
+                    break
+
+                # Prefetch the following page while this one is parsed
+                next_batch = asyncio.ensure_future(fetch_batch(rows[-1].id, batch_size))
+
+                current = {
+                    row.id: {field: getattr(row, field) for field in PARSED_FIELDS}
+                    for row in rows
+                }
+                work = [(row.id, row.ocr_text) for row in rows]
+                chunk_size = max(1, len(work) // (workers * 4))
+                chunks = [work[i:i + chunk_size] for i in range(0, len(work), chunk_size)]
+
+                parsed_chunks = await asyncio.gather(*[
+                    loop.run_in_executor(pool, _parse_chunk, chunk) for chunk in chunks
+                ])
+
+                params = []
+                queue_params = []
+                for fax_id, parsed in (item for chunk in parsed_chunks for item in chunk):
+                    changes = diff_row(current[fax_id], parsed, allow_clear)
+                    if not changes:
+                        continue
+                    params.append({"id": fax_id, **{f: new for f, (_, new) in changes.items()}})
+                    queue_update = queue_key_update(fax_id, current[fax_id], changes)
+                    if queue_update:
+                        queue_params.append(queue_update)
+                    for field, (old, new) in changes.items():
+                        stats["field_changes"][field] += 1
+                        if report:
+                            report.writerow([fax_id, field, old, new])
+
+                if params and not dry_run:
+                    await write_updates(params, queue_params)
+
+                last_id = rows[-1].id
+                stats["scanned"] += len(rows)
+                stats["changed"] += len(params)
+
+                if not dry_run:
+                    save_checkpoint(checkpoint_path, last_id, stats)
+
+                elapsed = time.monotonic() - started
+                rate = stats["scanned"] / elapsed * 60 if elapsed > 0 else 0
+                logger.info(
+                    f"📦 Through FaxFile #{last_id}: {stats['scanned']} scanned, "
+                    f"{stats['changed']} changed ({rate:,.0f} faxes/min)"
+                )
+    finally:
+        if report_file:
+            report_file.close()
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-derive parsed fields for existing faxes")
+    parser.add_argument("--dry-run", action="store_true", help="Diff only; write nothing")
+    parser.add_argument("--report", help="Write a CSV diff report to this path")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Rows per keyset page")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parser processes")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file path")
+    parser.add_argument("--restart", action="store_true", help="Ignore existing checkpoint")
+    parser.add_argument("--allow-clear", action="store_true",
+                        help="Clear fields the parser no longer finds")
+    args = parser.parse_args()
+
+    mode = "DRY RUN" if args.dry_run else "WRITE"
+    logger.info(f"🔄 Backfilling parsed fields ({mode}, {args.workers} workers)")
+
+    stats = asyncio.run(run_backfill(
+        batch_size=args.batch_size,
+        workers=args.workers,
+        dry_run=args.dry_run,
+        report_path=args.report,
+        checkpoint_path=args.checkpoint,
+        restart=args.restart,
+        allow_clear=args.allow_clear,
+    ))
+
+    logger.info(f"\n{'=' * 70}")
+    logger.info("SUMMARY")
+    logger.info(f"{'=' * 70}")
+    logger.info(f"Faxes scanned: {stats['scanned']}")
+    logger.info(f"Faxes {'that would change' if args.dry_run else 'updated'}: {stats['changed']}")
+    for field, count in stats["field_changes"].items():
+        logger.info(f"  {field}: {count}")
+    if args.report:
+        logger.info(f"Diff report: {args.report}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
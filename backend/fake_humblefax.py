@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Fake HumbleFax Server - Offline Load Testing
+
+A local stand-in for the HumbleFax API, so the whole fax pipeline (webhook
+ingest, download, OCR, matching, outbound dispatch, status webhooks) can be
+exercised and stress-tested without sending real faxes.
+
+Implements:
+    POST /tmpFax                    create a temporary outbound fax
+    POST /attachment/{id}           upload an attachment (multipart)
+    POST /tmpFax/{id}/send          send it; fires one outbound-status webhook per recipient later
+    GET  /sentFax/{id}              delivery status of a sent fax
+    GET  /incomingFaxes             list generated inbound faxes (startDate/endDate/limit)
+    GET  /incomingFax/{id}/download inbound fax PDF
+    GET  /_stats                    counters for the run
+
+Inbound faxes are generated at --inbound-rate per minute. Each is a small
+PDF with a patient name and DOB (from --identities, or built-in samples)
+and is announced to <target>/humblefax/receive. Every API call can be
+slowed (--latency-ms, --jitter-ms) or failed (--error-rate 5xx,
+--throttle-rate 429 with Retry-After). Webhooks can be dropped
+(--webhook-drop-rate) to exercise the reconciliation paths.
+
+Usage:
+    python fake_humblefax.py --port 8100 --target http://localhost:8000 --inbound-rate 30
+
+    # then point the app at it
+    HUMBLEFAX_BASE_URL=http://localhost:8100 HUMBLEFAX_ACCESS_KEY=x HUMBLEFAX_SECRET_KEY=x \\
+        uvicorn app.main:app --port 8000
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from reportlab.lib.pagesizes import LETTER
+from reportlab.pdfgen import canvas as pdf_canvas
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("fake_humblefax")
+
+SAMPLE_IDENTITIES = [
+    {"first": "John", "last": "Smith", "dob": "03/15/1980"},
+    {"first": "Maria", "last": "Garcia", "dob": "07/04/1975"},
+    {"first": "Wei", "last": "Chen", "dob": "11/23/1990"},
+    {"first": "Aisha", "last": "Johnson", "dob": "01/09/1962"},
+    {"first": "Robert", "last": "O'Brien", "dob": "05/30/1948"},
+]
+
+SAMPLE_SENDERS = ["16175551000", "16175552000", "12125553000", "13105554000"]
+
+OUR_NUMBER = "18885550100"
+
+
+class FakeState:
+    """In-memory state of the fake service."""
+
+    def __init__(self, args):
+        self.args = args
+        self.identities: List[Dict] = SAMPLE_IDENTITIES
+        self.next_id = 100000
+        self.tmp_faxes: Dict[int, Dict] = {}
+        self.sent_faxes: Dict[int, Dict] = {}
+        self.incoming: Dict[int, Dict] = {}
+        self.stats = Counter()
+
+    def new_id(self) -> int:
+        self.next_id += 1
+        return self.next_id
+
+
+def build_fax_pdf(identity: Dict, sender: str, pages: int) -> bytes:
+    """Small medical-records-style PDF the app's OCR and parser can read."""
+    buf = io.BytesIO()
+    c = pdf_canvas.Canvas(buf, pagesize=LETTER)
+    for page in range(1, pages + 1):
+        text = c.beginText(72, 700)
+        text.setFont("Helvetica", 14)
+        for line in (
+            "MEDICAL RECORDS RELEASE",
+            f"From fax: {sender}",
+            "",
+            f"Patient Name: {identity['first']} {identity['last']}",
+            f"Date of Birth: {identity['dob']}",
+            f"Date of Service: {datetime.utcnow():%m/%d/%Y}",
+            "",
+            f"Page {page} of {pages}",
+        ):
+            text.textLine(line)
+        c.drawText(text)
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def create_app(args) -> FastAPI:
+    state = FakeState(args)
+    if args.identities:
+        with open(args.identities) as f:
+            state.identities = json.load(f)
+
+    app = FastAPI(title="Fake HumbleFax")
+    http = httpx.AsyncClient(timeout=30)
+
+    async def fire_webhook(path: str, payload: Dict, delay: float = 0.0) -> None:
+        if delay:
+            await asyncio.sleep(delay)
+        if random.random() < args.webhook_drop_rate:
+            state.stats["webhooks_dropped"] += 1
+            return
+        try:
+            response = await http.post(f"{args.target}{path}", json=payload)
+            state.stats[f"webhook_{response.status_code}"] += 1
+        except httpx.HTTPError as e:
+            state.stats["webhook_errors"] += 1
+            logger.warning(f"Webhook to {path} failed: {e}")
+
+    @app.middleware("http")
+    async def chaos(request: Request, call_next):
+        """Latency and injected failures for every API call."""
+        if request.url.path.startswith("/_"):
+            return await call_next(request)
+
+        state.stats["requests"] += 1
+        latency = max(0.0, random.gauss(args.latency_ms, args.jitter_ms)) / 1000
+        await asyncio.sleep(latency)
+
+        roll = random.random()
+        if roll < args.throttle_rate:
+            state.stats["injected_429"] += 1
+            return JSONResponse({"error": "Too Many Requests"}, status_code=429,
+                                headers={"Retry-After": str(args.retry_after)})
+        if roll < args.throttle_rate + args.error_rate:
+            state.stats["injected_5xx"] += 1
+            return JSONResponse({"error": "Internal Server Error"}, status_code=503)
+
+        return await call_next(request)
+
+    # ------------------------------------------------------------------
+    # Outbound
+    # ------------------------------------------------------------------
+
+    @app.post("/tmpFax")
+    async def create_tmp_fax(request: Request):
+        body = await request.json()
+        recipients = body.get("recipients") or []
+        if not recipients:
+            return JSONResponse({"error": "recipients required"}, status_code=400)
+
+        tmp_id = state.new_id()
+        state.tmp_faxes[tmp_id] = {"recipients": recipients, "attachments": [], "sent": False}
+        state.stats["tmp_faxes"] += 1
+        return {"data": {"tmpFax": {"id": tmp_id, "recipients": recipients}}}
+
+    @app.post("/attachment/{tmp_id}")
+    async def upload_attachment(tmp_id: int, request: Request):
+        tmp_fax = state.tmp_faxes.get(tmp_id)
+        if tmp_fax is None or tmp_fax["sent"]:
+            return JSONResponse({"error": "tmpFax not found"}, status_code=404)
+
+        form = await request.form()
+        for name, upload in form.multi_items():
+            content = await upload.read()
+            tmp_fax["attachments"].append({"name": name, "size": len(content)})
+            state.stats["attachments"] += 1
+            state.stats["bytes_uploaded"] += len(content)
+        return {"data": {"attachments": tmp_fax["attachments"]}}
+
+    @app.post("/tmpFax/{tmp_id}/send")
+    async def send_tmp_fax(tmp_id: int):
+        tmp_fax = state.tmp_faxes.get(tmp_id)
+        if tmp_fax is None or tmp_fax["sent"]:
+            return JSONResponse({"error": "tmpFax not found"}, status_code=404)
+        if not tmp_fax["attachments"]:
+            return JSONResponse({"error": "no attachments"}, status_code=400)
+
+        tmp_fax["sent"] = True
+        state.stats["faxes_sent"] += 1
+
+        # Each recipient gets its own ID and its own delivery outcome
+        recipients = []
+        for n, number in enumerate(tmp_fax["recipients"], start=1):
+            failed = random.random() < args.delivery_failure_rate
+            recipients.append({
+                "id": f"{tmp_id}-{n}",
+                "toNumber": number,
+                "status": "in_progress",
+                "final_status": "failed" if failed else "delivered",
+            })
+            state.stats["recipients"] += 1
+
+            payload = {
+                "id": str(tmp_id),
+                "recipientId": f"{tmp_id}-{n}",
+                "toNumber": str(number),
+                "status": "failed" if failed else "delivered",
+                "completedAt": datetime.now(timezone.utc).isoformat(),
+                "error": "No answer" if failed else None,
+            }
+            asyncio.create_task(fire_webhook("/humblefax/outbound-status", payload, args.delivery_delay))
+
+        state.sent_faxes[tmp_id] = {
+            "id": tmp_id,
+            "recipients": recipients,
+            "completes_at": time.time() + args.delivery_delay,
+        }
+
+        return {"data": {"sentFax": {
+            "id": tmp_id,
+            "status": "in_progress",
+            "recipients": [{"id": r["id"], "toNumber": r["toNumber"]} for r in recipients],
+        }}}
+
+    @app.get("/sentFax/{fax_id}")
+    async def sent_fax_status(fax_id: int):
+        sent_fax = state.sent_faxes.get(fax_id)
+        if sent_fax is None:
+            return JSONResponse({"error": "fax not found"}, status_code=404)
+
+        state.stats["status_lookups"] += 1
+        done = time.time() >= sent_fax["completes_at"]
+        recipients = []
+        for r in sent_fax["recipients"]:
+            status = r["final_status"] if done else "in_progress"
+            recipient = {"id": r["id"], "toNumber": r["toNumber"], "status": status}
+            if status == "failed":
+                recipient["error"] = "No answer"
+            recipients.append(recipient)
+
+        # The fax as a whole has failed only if every recipient failed
+        statuses = {r["status"] for r in recipients}
+        status = "in_progress" if "in_progress" in statuses else (
+            "failed" if statuses == {"failed"} else "delivered")
+        body = {"id": fax_id, "status": status, "recipients": recipients}
+        if status == "failed":
+            body["error"] = "No answer"
+        return {"data": {"sentFax": body}}
+
+    # ------------------------------------------------------------------
+    # Inbound
+    # ------------------------------------------------------------------
+
+    @app.get("/incomingFaxes")
+    async def list_incoming(startDate: Optional[str] = None, endDate: Optional[str] = None,
+                            limit: int = 100):
+        def parse(value: Optional[str], default: float) -> float:
+            if not value:
+                return default
+            return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+
+        start = parse(startDate, 0)
+        end = parse(endDate, time.time() + 1)
+        faxes = [
+            fax["meta"] for fax in state.incoming.values()
+            if start <= fax["meta"]["time"] < end
+        ]
+        faxes.sort(key=lambda fax: fax["time"])
+        return {"data": {"incomingFaxes": faxes[:limit]}}
+
+    @app.get("/incomingFax/{fax_id}/download")
+    async def download_incoming(fax_id: int):
+        fax = state.incoming.get(fax_id)
+        if fax is None:
+            return JSONResponse({"error": "fax not found"}, status_code=404)
+        state.stats["downloads"] += 1
+        return Response(fax["pdf"], media_type="application/pdf")
+
+    async def generate_inbound() -> None:
+        interval = 60.0 / args.inbound_rate
+        while True:
+            await asyncio.sleep(random.expovariate(1.0 / interval))
+
+            fax_id = state.new_id()
+            identity = random.choice(state.identities)
+            sender = random.choice(SAMPLE_SENDERS)
+            pages = random.randint(1, args.max_pages)
+            meta = {
+                "id": fax_id,
+                "status": "success",
+                "time": int(time.time()),
+                "fromNumber": sender,
+                "toNumber": OUR_NUMBER,
+                "numPages": str(pages),
+            }
+            state.incoming[fax_id] = {"meta": meta, "pdf": build_fax_pdf(identity, sender, pages)}
+            state.stats["inbound_generated"] += 1
+
+            payload = {
+                "type": "IncomingFax.SendComplete",
+                "data": {"IncomingFax": meta},
+                "time": meta["time"],
+                "numAttempts": 1,
+            }
+            asyncio.create_task(fire_webhook("/humblefax/receive", payload))
+
+    # ------------------------------------------------------------------
+    # Control
+    # ------------------------------------------------------------------
+
+    @app.get("/_stats")
+    async def stats():
+        return dict(state.stats)
+
+    tasks = []
+
+    @app.on_event("startup")
+    async def start_generator():
+        if args.inbound_rate > 0:
+            tasks.append(asyncio.create_task(generate_inbound()))
+
+    @app.on_event("shutdown")
+    async def stop_generator():
+        for task in tasks:
+            task.cancel()
+        await http.aclose()
+        logger.info(f"Final stats: {dict(state.stats)}")
+
+    app.state.fake = state
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake HumbleFax API for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--target", default="http://localhost:8000",
+                        help="Base URL of the app that receives webhooks")
+    parser.add_argument("--inbound-rate", type=float, default=0,
+                        help="Inbound faxes generated per minute (0 = off)")
+    parser.add_argument("--max-pages", type=int, default=3, help="Max pages per inbound fax")
+    parser.add_argument("--identities", help="JSON file of [{first, last, dob}] for inbound faxes")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Mean API latency")
+    parser.add_argument("--jitter-ms", type=float, default=20, help="API latency std deviation")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of calls answered 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on 429")
+    parser.add_argument("--delivery-delay", type=float, default=5.0,
+                        help="Seconds from send until the outbound-status webhook")
+    parser.add_argument("--delivery-failure-rate", type=float, default=0.05,
+                        help="Fraction of sent faxes reported failed")
+    parser.add_argument("--webhook-drop-rate", type=float, default=0.0,
+                        help="Fraction of webhooks never delivered")
+    args = parser.parse_args()
+
+    logger.info(f"📠 Fake HumbleFax on http://{args.host}:{args.port} -> webhooks to {args.target}")
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Database Migration - Fax Pipeline v3 Schema
+
+This script brings an existing database up to date with the v3 fax pipeline:
+- Creates any new tables (create_all is a no-op for existing ones)
+- Adds new columns to existing tables
+- Merges duplicate fax_files rows for the same HumbleFax job_id
+- Dead-letters duplicate unfinished jobs that share a dedupe key
+- Creates supporting indexes (including the unique fax_files.job_id and
+  open-job dedupe indexes)
+- Backfills derived columns (fax routing keys, phonetic name keys)
+- Recomputes record request progress counters
+- Seeds the unmatched-fax re-match queue
+
+Usage:
+    python migrate_pipeline_v3.py
+
+Prerequisites:
+    - Run from your backend directory
+    - Backup your database first!
+    - Virtual environment activated
+
+The script is idempotent and safe to re-run.
+"""
+
+import asyncio
+import sys
+from sqlalchemy import text
+
+try:
+    from app.database.db import AsyncSessionLocal, engine, init_models
+    from app.models.job import JOB_OPEN_CONDITION
+    from app.utils.parsing import normalize_phone_number, phonetic_key
+    from app.services.fax_processor import _queue_row
+except ImportError as e:
+    print("=" * 70)
+    print("❌ ERROR: Missing required modules")
+    print("=" * 70)
+    print()
+    print("Please make sure you're in the backend directory and")
+    print("your virtual environment is activated.")
+    print()
+    print(f"Error details: {e}")
+    print()
+    sys.exit(1)
+
+
+# New columns per table: {table: {column: SQL type}}
+NEW_COLUMNS = {
+    "fax_files": {
+        "parsed_first_name": "VARCHAR",
+        "parsed_last_name": "VARCHAR",
+        "parsed_dob": "DATE",
+        "processing_stage": "VARCHAR",
+        "pdf_sha256": "VARCHAR(64)",
+    },
+    "providers": {
+        "fax_key": "VARCHAR(10)",
+    },
+    "provider_requests": {
+        "fax_key": "VARCHAR(10)",
+        "status_checked_at": "TIMESTAMP WITH TIME ZONE",
+        "send_started_at": "TIMESTAMP WITH TIME ZONE",
+    },
+    "patients": {
+        "last_name_key": "VARCHAR(4)",
+    },
+    "record_requests": {
+        "outstanding_count": "INTEGER NOT NULL DEFAULT 0",
+        "terminal_count": "INTEGER NOT NULL DEFAULT 0",
+    },
+}
+
+# Indexes to create: (index name, table, column list)
+NEW_INDEXES = [
+    ("ix_fax_files_processing_stage", "fax_files", ["processing_stage"]),
+    ("ix_providers_fax_key", "providers", ["fax_key"]),
+    ("ix_provider_requests_fax_key_status", "provider_requests", ["fax_key", "status"]),
+    ("ix_provider_requests_status_sent_at", "provider_requests", ["status", "sent_at"]),
+    ("ix_patients_last_name_key", "patients", ["last_name_key"]),
+    ("ix_patients_date_of_birth", "patients", ["date_of_birth"]),
+]
+
+# Unique indexes to create: (index name, table, column list[, partial
+# WHERE clause]). Duplicates must be merged first (see dedupe_fax_files and
+# dedupe_open_jobs).
+NEW_UNIQUE_INDEXES = [
+    ("ix_fax_files_job_id", "fax_files", ["job_id"]),
+    ("ix_jobs_kind_dedupe_key_open", "jobs", ["kind", "dedupe_key"], JOB_OPEN_CONDITION),
+]
+
+# Which duplicate fax_files row survives: furthest pipeline stage, then oldest
+STAGE_RANK = {"processed": 3, "acquired": 2, "received": 1}
+
+# Derived key columns to fill: (table, source column, key column, key function)
+DERIVED_KEY_COLUMNS = [
+    ("providers", "fax", "fax_key", normalize_phone_number),
+    ("provider_requests", "fax_number_used", "fax_key", normalize_phone_number),
+    ("patients", "last_name", "last_name_key", phonetic_key),
+]
+
+
+async def check_column_exists(db, table: str, column: str) -> bool:
+    """Check if a column exists in a table."""
+    if engine.dialect.name == "sqlite":
+        result = await db.execute(text(f"PRAGMA table_info({table})"))
+        columns = [row[1] for row in result.fetchall()]
+        return column in columns
+
+    result = await db.execute(
+        text(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_name = :table AND column_name = :column"
+        ),
+        {"table": table, "column": column},
+    )
+    return result.fetchone() is not None
+
+
+async def add_columns(db):
+    """Add any missing columns from NEW_COLUMNS."""
+    for table, columns in NEW_COLUMNS.items():
+        print(f"Checking columns on '{table}'...")
+        for column, col_type in columns.items():
+            if await check_column_exists(db, table, column):
+                print(f"  ✓ Column '{column}' already exists, skipping")
+                continue
+
+            print(f"  + Adding column '{column}' ({col_type})...")
+            try:
+                await db.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN {column} {col_type}"
+                ))
+                await db.commit()
+                print(f"    ✅ Successfully added '{column}'")
+            except Exception as e:
+                await db.rollback()
+                print(f"    ❌ Error adding '{column}': {e}")
+
+
+async def dedupe_fax_files(db):
+    """
+    Merge fax_files rows that share a job_id (webhook retries that raced
+    before the unique index existed), so the unique index can be created.
+
+    The surviving row keeps any provider request links; the duplicates'
+    pages and unmatched-queue entries are dropped with them.
+    """
+    result = await db.execute(text(
+        "SELECT id, job_id, processing_stage FROM fax_files WHERE job_id IN ("
+        "  SELECT job_id FROM fax_files WHERE job_id IS NOT NULL "
+        "  GROUP BY job_id HAVING COUNT(*) > 1"
+        ") ORDER BY job_id, id"
+    ))
+    groups = {}
+    for fax_id, job_id, stage in result.fetchall():
+        groups.setdefault(job_id, []).append((fax_id, stage))
+
+    removed = 0
+    for job_id, rows in groups.items():
+        keep = max(rows, key=lambda row: (STAGE_RANK.get(row[1], 0), -row[0]))[0]
+        for fax_id, _ in rows:
+            if fax_id == keep:
+                continue
+            params = {"keep": keep, "dup": fax_id}
+            await db.execute(text(
+                "UPDATE provider_requests SET inbound_fax_id = :keep WHERE inbound_fax_id = :dup"
+            ), params)
+            await db.execute(text("DELETE FROM fax_pages WHERE fax_file_id = :dup"), params)
+            await db.execute(text("DELETE FROM unmatched_faxes WHERE fax_file_id = :dup"), params)
+            await db.execute(text("DELETE FROM fax_files WHERE id = :dup"), params)
+            removed += 1
+    await db.commit()
+    print(f"  ✓ fax_files: {removed} duplicate row(s) merged across {len(groups)} job_id(s)")
+
+
+async def dedupe_open_jobs(db):
+    """
+    Dead-letter all but the oldest unfinished job per (kind, dedupe_key)
+    (concurrent enqueues before the unique index existed), so the index can
+    be created.
+    """
+    result = await db.execute(text(
+        "UPDATE jobs SET state = 'dead', last_error = 'Duplicate of an older open job' "
+        f"WHERE {JOB_OPEN_CONDITION} AND dedupe_key IS NOT NULL AND id NOT IN ("
+        f"  SELECT MIN(id) FROM jobs WHERE {JOB_OPEN_CONDITION} AND dedupe_key IS NOT NULL "
+        "  GROUP BY kind, dedupe_key"
+        ")"
+    ))
+    await db.commit()
+    print(f"  ✓ jobs: {result.rowcount} duplicate open job(s) dead-lettered")
+
+
+async def create_indexes(db):
+    """Create any missing indexes from NEW_INDEXES and NEW_UNIQUE_INDEXES."""
+    indexes = [("INDEX", *index) for index in NEW_INDEXES]
+    indexes += [("UNIQUE INDEX", *index) for index in NEW_UNIQUE_INDEXES]
+    for kind, name, table, columns, *where in indexes:
+        print(f"  + Ensuring index '{name}' on {table}({', '.join(columns)})...")
+        try:
+            await db.execute(text(
+                f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+                + (f" WHERE {where[0]}" if where else "")
+            ))
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            print(f"    ❌ Error creating index '{name}': {e}")
+
+
+async def backfill_derived_keys(db):
+    """Fill derived key columns for rows created before the column existed."""
+    for table, source, key, key_fn in DERIVED_KEY_COLUMNS:
+        result = await db.execute(text(
+            f"SELECT id, {source} FROM {table} "
+            f"WHERE {key} IS NULL AND {source} IS NOT NULL"
+        ))
+        params = [
+            {"id": row_id, "value": key_fn(value)}
+            for row_id, value in result.fetchall()
+            if key_fn(value)
+        ]
+        if params:
+            await db.execute(
+                text(f"UPDATE {table} SET {key} = :value WHERE id = :id"),
+                params,
+            )
+            await db.commit()
+        print(f"  ✓ {table}.{key}: {len(params)} row(s) filled")
+
+
+async def backfill_request_counters(db):
+    """Recompute outstanding/terminal counters on record_requests from provider_requests."""
+    terminal = "('response_received', 'fax_failed')"
+    await db.execute(text(
+        "UPDATE record_requests SET "
+        "outstanding_count = (SELECT COUNT(*) FROM provider_requests pr "
+        f"  WHERE pr.record_request_id = record_requests.id AND pr.status NOT IN {terminal}), "
+        "terminal_count = (SELECT COUNT(*) FROM provider_requests pr "
+        f"  WHERE pr.record_request_id = record_requests.id AND pr.status IN {terminal})"
+    ))
+    await db.commit()
+    print("  ✓ record_requests counters recomputed")
+
+
+async def backfill_unmatched_queue(db):
+    """Queue processed faxes that never matched a patient for re-matching."""
+    result = await db.execute(text(
+        "SELECT f.id, f.sender, f.parsed_last_name, f.parsed_dob FROM fax_files f "
+        "WHERE f.patient_id IS NULL "
+        "AND f.ocr_text IS NOT NULL AND f.ocr_text != '' "
+        "AND f.ocr_text NOT LIKE '[OCR%' AND f.ocr_text NOT LIKE '[ERROR%' "
+        "AND NOT EXISTS (SELECT 1 FROM unmatched_faxes u WHERE u.fax_file_id = f.id)"
+    ))
+    rows = [
+        _queue_row(fax_id, sender, last_name, _as_date(dob))
+        for fax_id, sender, last_name, dob in result.fetchall()
+    ]
+    if rows:
+        await db.execute(
+            text(
+                "INSERT INTO unmatched_faxes (fax_file_id, parsed_dob, last_name_key, sender_fax_key) "
+                "VALUES (:fax_file_id, :parsed_dob, :last_name_key, :sender_fax_key)"
+            ),
+            rows,
+        )
+        await db.commit()
+    print(f"  ✓ unmatched_faxes: {len(rows)} fax(es) queued")
+
+
+def _as_date(value):
+    """SQLite returns DATE columns from raw SQL as ISO strings."""
+    if isinstance(value, str):
+        from datetime import date
+        return date.fromisoformat(value)
+    return value
+
+
+async def migrate():
+    """Run the migration."""
+    print("=" * 70)
+    print("Fax Pipeline Migration - v3")
+    print("=" * 70)
+    print()
+
+    print("Creating new tables...")
+    await init_models()
+    print()
+
+    async with AsyncSessionLocal() as db:
+        await add_columns(db)
+        print()
+        print("Merging duplicate faxes...")
+        await dedupe_fax_files(db)
+        print()
+        print("Removing duplicate open jobs...")
+        await dedupe_open_jobs(db)
+        print()
+        if NEW_INDEXES or NEW_UNIQUE_INDEXES:
+            print("Creating indexes...")
+            await create_indexes(db)
+            print()
+        print("Backfilling derived keys...")
+        await backfill_derived_keys(db)
+        print()
+        print("Recomputing request counters...")
+        await backfill_request_counters(db)
+        print()
+        print("Seeding unmatched fax queue...")
+        await backfill_unmatched_queue(db)
+        print()
+
+    print("=" * 70)
+    print("✅ Migration complete!")
+    print("=" * 70)
+    print()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(migrate())
+    except KeyboardInterrupt:
+        print("\n\nAborted by user.")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
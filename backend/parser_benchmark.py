@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Parser Accuracy & Throughput Benchmark
+
+Measures the OCR text parsers in app/utils/parsing.py against a labeled corpus:
+- Per-field precision/recall for patient name, DOB, encounter date and hospital
+- Page classifier regression cases (app/services/page_classifier.py)
+- Per-document parse latency percentiles (p50/p95/p99), plus p95 as a ratio
+  to a fixed reference workload timed in the same run (machine-independent)
+
+The corpus is benchmarks/parser_corpus.json (hand-labeled, anonymized layouts)
+plus synthetic documents generated from a fixed seed, so every run sees the
+same inputs. Results are compared to benchmarks/parser_baseline.json and the
+script exits non-zero when accuracy or the latency ratio regresses beyond
+tolerance. Absolute milliseconds are reported but never compared, since the
+baseline may have been recorded on a different machine.
+
+Usage:
+    python parser_benchmark.py [--synthetic N] [--seed S] [--repeat R]
+                               [--update-baseline] [--json]
+
+Options:
+    --synthetic N        Number of synthetic documents (default 500)
+    --seed S             Synthetic corpus seed (default 1337)
+    --repeat R           Timed passes over the corpus (default 3)
+    --update-baseline    Store this run as the new baseline
+    --json               Print the full result as JSON
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from app.services.page_classifier import classify_page
+from app.utils.parsing import parse_name_and_dob, parse_encounter_date, extract_hospital_names
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+CORPUS_PATH = os.path.join(BENCH_DIR, "parser_corpus.json")
+BASELINE_PATH = os.path.join(BENCH_DIR, "parser_baseline.json")
+
+FIELDS = ("name", "dob", "encounter_date", "hospital")
+
+# Allowed regression before the benchmark fails
+ACCURACY_TOLERANCE = 0.01   # absolute drop in precision or recall
+LATENCY_TOLERANCE = 0.30    # relative increase in the p95 latency ratio
+
+
+# ============================================================================
+# SYNTHETIC CORPUS
+# ============================================================================
+
+FIRST_NAMES = [
+    "James", "Mary", "Robert", "Patricia", "Michael", "Linda", "David", "Elizabeth",
+    "William", "Barbara", "Carlos", "Sofia", "Wei", "Aisha", "Dmitri", "Fatima",
+    "Hiroshi", "Olga", "Kwame", "Ingrid",
+]
+LAST_NAMES = [
+    "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez",
+    "Martinez", "Hernandez", "Lopez", "Wilson", "Anderson", "Thomas", "Nguyen", "Kowalski",
+    "Okafor", "Lindqvist", "Tanaka", "Petrov",
+]
+HOSPITAL_PREFIXES = [
+    "Mercy", "Lakeside", "Saint Luke", "Riverside", "Northfield", "Summit",
+    "Cedar Valley", "Harbor View", "Pine Ridge", "Grandview",
+]
+HOSPITAL_SUFFIXES = [
+    "Hospital", "Medical Center", "Community Hospital", "Regional Medical Center",
+    "Clinic", "Health System",
+]
+
+STREETS = [
+    "Main Street", "Oak Avenue", "Hospital Drive", "Medical Parkway", "Center Road",
+]
+
+NAME_FORMATS = [
+    lambda f, l: f"Patient Name: {f} {l}",
+    lambda f, l: f"Patient: {f} {l}",
+    lambda f, l: f"Name: {f} {l}",
+    lambda f, l: f"Patient: {l}, {f}",
+    lambda f, l: f"PATIENT: {l.upper()}, {f.upper()}",
+]
+DOB_FORMATS = [
+    lambda d: f"DOB: {d.strftime('%m/%d/%Y')}",
+    lambda d: f"Date of Birth: {d.strftime('%m/%d/%Y')}",
+    lambda d: f"DOB: {d.isoformat()}",
+    lambda d: f"Birth Date: {d.month}/{d.day}/{d.strftime('%y')}",
+    lambda d: f"DOB: {d.strftime('%B')} {d.day}, {d.year}",
+    lambda d: f"D.O.B. {d.strftime('%m/%d/%Y')}",
+]
+ENCOUNTER_FORMATS = [
+    lambda d: f"Date of Service: {d.strftime('%m/%d/%Y')}",
+    lambda d: f"Visit Date: {d.strftime('%m/%d/%Y')}",
+    lambda d: f"Admission Date: {d.strftime('%m-%d-%Y')}",
+    lambda d: f"Service Date: {d.strftime('%m/%d/%y')}",
+    lambda d: f"DOS: {d.strftime('%m/%d/%Y')}",
+]
+BODY_LINES = [
+    "Chief Complaint: Follow-up visit.",
+    "Assessment: Stable. Continue current medications.",
+    "Labs reviewed with patient. Return in 3 months.",
+    "HISTORY OF PRESENT ILLNESS: Patient presents for routine follow-up.",
+    "Medications: metformin 500 mg BID, atorvastatin 20 mg daily.",
+    "Fax: (555) 010-2000   Phone: (555) 010-2001",
+]
+
+
+def _random_date(rng: random.Random, start: date, end: date) -> date:
+    return start + timedelta(days=rng.randint(0, (end - start).days))
+
+
+def generate_synthetic_corpus(count: int, seed: int) -> List[Dict]:
+    """Generate labeled synthetic OCR documents from a fixed seed."""
+    rng = random.Random(seed)
+    docs = []
+
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        dob = _random_date(rng, date(1935, 1, 1), date(2005, 12, 31))
+        encounter = _random_date(rng, date(2012, 1, 1), date(2024, 12, 31))
+        hospital = f"{rng.choice(HOSPITAL_PREFIXES)} {rng.choice(HOSPITAL_SUFFIXES)}"
+
+        has_name = rng.random() > 0.05
+        has_dob = rng.random() > 0.05
+        has_encounter = rng.random() > 0.2
+
+        # Street address under the letterhead, as on real cover sheets; it
+        # also ends the hospital name for extract_hospital_names
+        address = f"{rng.randint(10, 9999)} {rng.choice(STREETS)}"
+        lines = [hospital, address, "Health Information Management", ""]
+        if has_name:
+            lines.append(rng.choice(NAME_FORMATS)(first, last))
+        if has_dob:
+            lines.append(rng.choice(DOB_FORMATS)(dob))
+        lines.append(f"MRN: {rng.randint(100000, 999999)}")
+        if has_encounter:
+            lines.append(rng.choice(ENCOUNTER_FORMATS)(encounter))
+        lines.append("")
+        lines.extend(rng.sample(BODY_LINES, 3))
+
+        docs.append({
+            "id": f"synthetic-{seed}-{i}",
+            "source": "synthetic",
+            "text": "\n".join(lines) + "\n",
+            "labels": {
+                "first_name": first if has_name else None,
+                "last_name": last if has_name else None,
+                "dob": dob.isoformat() if has_dob else None,
+                "encounter_date": encounter.isoformat() if has_encounter else None,
+                "hospitals": [hospital],
+            },
+        })
+
+    return docs
+
+
+def load_corpus(synthetic: int, seed: int) -> List[Dict]:
+    """Load the hand-labeled corpus and append the synthetic documents."""
+    with open(CORPUS_PATH) as f:
+        docs = json.load(f)["documents"]
+    return docs + generate_synthetic_corpus(synthetic, seed)
+
+
+# ============================================================================
+# SCORING
+# ============================================================================
+
+def _norm(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    return " ".join(re.findall(r"[a-z0-9]+", value.lower()))
+
+
+def _predict(text: str) -> Dict:
+    """Run all parsers on one document."""
+    identity = parse_name_and_dob(text)
+    return {
+        "first_name": identity.get("first_name"),
+        "last_name": identity.get("last_name"),
+        "dob": identity.get("dob"),
+        "encounter_date": parse_encounter_date(text),
+        "hospitals": extract_hospital_names(text),
+    }
+
+
+def _field_values(record: Dict) -> Dict[str, set]:
+    """Reduce a prediction or label to comparable value sets per field."""
+    first, last = _norm(record.get("first_name")), _norm(record.get("last_name"))
+    dob, encounter = record.get("dob"), record.get("encounter_date")
+    return {
+        "name": {(first, last)} if first and last else set(),
+        "dob": {str(dob)} if dob else set(),
+        "encounter_date": {str(encounter)} if encounter else set(),
+        "hospital": {_norm(h) for h in record.get("hospitals") or [] if _norm(h)},
+    }
+
+
+def score(docs: List[Dict], predictions: List[Dict]) -> Dict[str, Dict]:
+    """Micro-averaged precision/recall per field."""
+    counts = {field: {"tp": 0, "fp": 0, "fn": 0} for field in FIELDS}
+
+    for doc, prediction in zip(docs, predictions):
+        expected = _field_values(doc["labels"])
+        actual = _field_values(prediction)
+        for field in FIELDS:
+            tp = len(expected[field] & actual[field])
+            counts[field]["tp"] += tp
+            counts[field]["fp"] += len(actual[field]) - tp
+            counts[field]["fn"] += len(expected[field]) - tp
+
+    metrics = {}
+    for field, c in counts.items():
+        predicted = c["tp"] + c["fp"]
+        labeled = c["tp"] + c["fn"]
+        metrics[field] = {
+            "precision": round(c["tp"] / predicted, 4) if predicted else 1.0,
+            "recall": round(c["tp"] / labeled, 4) if labeled else 1.0,
+            **c,
+        }
+    return metrics
+
+
+# Reference workload timed alongside the parsers. Latency is compared as
+# parser p95 / reference p95, which cancels out the speed of the machine.
+_CALIBRATION_PATTERNS = [
+    re.compile(r"[A-Za-z]+"),
+    re.compile(r"\d+"),
+    re.compile(r"\d{1,2}/\d{1,2}/\d{2,4}"),
+    re.compile(r"^[A-Z][A-Za-z ]+:", re.MULTILINE),
+]
+
+
+def _calibrate(text: str) -> int:
+    return sum(len(regex.findall(text)) for regex in _CALIBRATION_PATTERNS) + len(text.lower().split())
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_benchmark(synthetic: int = 500, seed: int = 1337, repeat: int = 3) -> Dict:
+    """Parse the corpus, score accuracy and time every document."""
+    # Per-document parser logging would dominate the timings
+    parser_logger = logging.getLogger("app.utils.parsing")
+    previous_level = parser_logger.level
+    parser_logger.setLevel(logging.CRITICAL)
+
+    try:
+        docs = load_corpus(synthetic, seed)
+        predictions = [_predict(doc["text"]) for doc in docs]
+
+        # Interleaved so both see the same machine load
+        timings_ms, reference_ms = [], []
+        for _ in range(repeat):
+            for doc in docs:
+                started = time.perf_counter()
+                _predict(doc["text"])
+                timings_ms.append((time.perf_counter() - started) * 1000)
+                started = time.perf_counter()
+                _calibrate(doc["text"])
+                reference_ms.append((time.perf_counter() - started) * 1000)
+        timings_ms.sort()
+        reference_ms.sort()
+    finally:
+        parser_logger.setLevel(previous_level)
+
+    return {
+        "documents": len(docs),
+        "seed": seed,
+        "synthetic": synthetic,
+        "accuracy": score(docs, predictions),
+        "latency_ms": {
+            "p50": round(_percentile(timings_ms, 50), 4),
+            "p95": round(_percentile(timings_ms, 95), 4),
+            "p99": round(_percentile(timings_ms, 99), 4),
+            "max": round(timings_ms[-1], 4),
+            "reference_p95": round(_percentile(reference_ms, 95), 4),
+        },
+        "latency_ratio": round(_percentile(timings_ms, 95) / _percentile(reference_ms, 95), 3),
+    }
+
+
+# ============================================================================
+# PAGE CLASSIFIER
+# ============================================================================
+
+# (page text, expected doc type); checked on every run, no baseline needed
+CLASSIFIER_CASES = [
+    # Short keywords ("ros", "hpi") must not fire inside names
+    ("Patient: Rosa Ross\nReferred by Dr. Ross\nRoss Family Practice", "other"),
+    ("Dear Mr. Hpiano,\nPlease find enclosed the authorization for Rose Hpiano.", "other"),
+    ("HPI: 3 days of cough.\nROS: negative except as above.\nChief Complaint: cough", "notes"),
+    ("Laboratory Results\nHemoglobin 13.2 g/dL\nGlucose 92 mg/dL\nReference range 70-99", "lab"),
+    ("Itemized Statement\nBalance due: $120.00\nCPT 99213 $85.00", "billing"),
+]
+
+
+def check_classifier() -> List[str]:
+    """Return a failure line for each classifier case that is mislabeled."""
+    failures = []
+    for text, expected in CLASSIFIER_CASES:
+        actual, page_score = classify_page(text)
+        if actual != expected:
+            first_line = text.splitlines()[0]
+            failures.append(f"classifier: {first_line!r} → {actual} ({page_score}), expected {expected}")
+    return failures
+
+
+# ============================================================================
+# BASELINE
+# ============================================================================
+
+def compare_to_baseline(result: Dict, baseline: Dict) -> List[str]:
+    """Return a list of regressions relative to the stored baseline."""
+    regressions = []
+
+    for field in FIELDS:
+        for metric in ("precision", "recall"):
+            old = baseline["accuracy"][field][metric]
+            new = result["accuracy"][field][metric]
+            if new < old - ACCURACY_TOLERANCE:
+                regressions.append(f"{field} {metric}: {old:.4f} → {new:.4f}")
+
+    old_ratio = baseline.get("latency_ratio")
+    new_ratio = result["latency_ratio"]
+    if old_ratio and new_ratio > old_ratio * (1 + LATENCY_TOLERANCE):
+        regressions.append(f"p95 latency ratio: {old_ratio:.2f}x → {new_ratio:.2f}x reference")
+
+    return regressions
+
+
+def print_report(result: Dict) -> None:
+    print("=" * 70)
+    print(f"PARSER BENCHMARK ({result['documents']} documents, seed {result['seed']})")
+    print("=" * 70)
+    print(f"{'Field':<16}{'Precision':>10}{'Recall':>10}{'TP':>8}{'FP':>8}{'FN':>8}")
+    for field, m in result["accuracy"].items():
+        print(f"{field:<16}{m['precision']:>10.3f}{m['recall']:>10.3f}"
+              f"{m['tp']:>8}{m['fp']:>8}{m['fn']:>8}")
+    latency = result["latency_ms"]
+    print()
+    print(f"Latency per document: p50={latency['p50']:.3f} ms  p95={latency['p95']:.3f} ms  "
+          f"p99={latency['p99']:.3f} ms  max={latency['max']:.3f} ms")
+    print(f"p95 vs reference workload: {result['latency_ratio']:.2f}x "
+          f"(reference p95={latency['reference_p95']:.3f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parser accuracy and latency benchmark")
+    parser.add_argument("--synthetic", type=int, default=500, help="Synthetic document count")
+    parser.add_argument("--seed", type=int, default=1337, help="Synthetic corpus seed")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the corpus")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as baseline")
+    parser.add_argument("--json", action="store_true", help="Print the full result as JSON")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.synthetic, args.seed, args.repeat)
+    classifier_failures = check_classifier()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+
+    if classifier_failures:
+        print("\n❌ Page classifier cases failed:")
+        for line in classifier_failures:
+            print(f"  - {line}")
+        return 1
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Baseline updated: {BASELINE_PATH}")
+        return 0
+
+    if not os.path.exists(BASELINE_PATH):
+        print("\n⚠️ No baseline stored; run with --update-baseline to create one")
+        return 0
+
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+
+    if (baseline["seed"], baseline["synthetic"]) != (result["seed"], result["synthetic"]):
+        print("\n⚠️ Corpus differs from baseline (seed/size); skipping comparison")
+        return 0
+
+    regressions = compare_to_baseline(result, baseline)
+    if regressions:
+        print("\n❌ Regressions against baseline:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+
+    print("\n✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,9 @@ without needing actual faxes from iFax.
 
 Usage:
     python test_fax_processing.py
+
+For reproducible parser accuracy/latency numbers (with a stored baseline),
+use parser_benchmark.py; TEST 1 below prints the same report.
 """
 
 import asyncio
@@ -24,7 +27,8 @@ import logging
 from app.database.db import AsyncSessionLocal
 from app.models import Patient, Provider, RecordRequest, ProviderRequest, FaxFile
 from app.services.fax_processor import IncomingFaxProcessor
-from app.utils.ocr import parse_name_and_dob, parse_with_confidence
+from app.utils.parsing import parse_name_and_dob
+from parser_benchmark import run_benchmark, print_report
 
 # Setup logging
 logging.basicConfig(
@@ -225,25 +229,19 @@ async def test_ocr_parsing():
     logger.info("TEST 1: OCR Text Parsing")
     logger.info("=" * 80)
 
-    print("\n--- Sample OCR Text 1 ---")
-    print(SAMPLE_OCR_TEXT_1[:200] + "...")
-
-    result1 = parse_with_confidence(SAMPLE_OCR_TEXT_1)
-    print(f"\nParsed Results:")
-    print(f"  First Name: {result1['first_name']}")
-    print(f"  Last Name: {result1['last_name']}")
-    print(f"  DOB: {result1['dob']}")
-    print(f"  Confidence: {result1['confidence']:.2%}")
-
-    print("\n--- Sample OCR Text 2 ---")
-    print(SAMPLE_OCR_TEXT_2[:200] + "...")
-
-    result2 = parse_with_confidence(SAMPLE_OCR_TEXT_2)
-    print(f"\nParsed Results:")
-    print(f"  First Name: {result2['first_name']}")
-    print(f"  Last Name: {result2['last_name']}")
-    print(f"  DOB: {result2['dob']}")
-    print(f"  Confidence: {result2['confidence']:.2%}")
+    for label, sample in (("1", SAMPLE_OCR_TEXT_1), ("2", SAMPLE_OCR_TEXT_2)):
+        print(f"\n--- Sample OCR Text {label} ---")
+        print(sample[:200] + "...")
+
+        result = parse_name_and_dob(sample)
+        print(f"\nParsed Results:")
+        print(f"  First Name: {result['first_name']}")
+        print(f"  Last Name: {result['last_name']}")
+        print(f"  DOB: {result['dob']}")
+
+    # Labeled corpus (includes both samples above) with precision/recall
+    print()
+    print_report(run_benchmark())
 
 
 async def test_patient_matching():